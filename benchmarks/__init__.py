@@ -0,0 +1,6 @@
+'''
+Benchmarks of metainfoyaml2py.
+
+Run from the repository root, for example:
+    python -m benchmarks.suite -o results.json
+'''
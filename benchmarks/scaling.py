@@ -0,0 +1,33 @@
+'''
+Benchmark showing that the code generation scales linearly with the schema size.
+
+Run with:
+    python -m benchmarks.scaling
+'''
+
+import time
+
+from metainfoyaml2py.metainfoyaml2py import iter_module, load_standard_content
+
+from .synthetic import synthetic_schema
+
+
+def main() -> None:
+    '''
+    Time the generation of modules with an increasing number of sections.
+    '''
+    content = load_standard_content()
+    print(f'{"sections":>10} {"quantities":>12} {"seconds":>10} {"us/quantity":>12}')
+    for n_sections in (250, 500, 1000, 2000, 4000):
+        n_quantities = 10
+        sections = synthetic_schema(n_sections, n_quantities)['definitions']['sections']
+        start = time.perf_counter()
+        code = ''.join(iter_module(content, 'Benchmark', sections, normalizers=True))
+        seconds = time.perf_counter() - start
+        total = n_sections * n_quantities
+        print(f'{n_sections:>10} {total:>12} {seconds:>10.3f} {seconds / total * 1e6:>12.1f}')
+        assert code
+
+
+if __name__ == '__main__':
+    main()
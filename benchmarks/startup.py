@@ -0,0 +1,70 @@
+'''
+Start up time check of the command line interface.
+
+Runs `metainfo-yaml2py --help` several times and exits with a non-zero status if the
+best time exceeds the budget. Also lists the slowest imports using `-X importtime`.
+
+Run with:
+    python -m benchmarks.startup [budget in ms, default 100]
+'''
+
+import subprocess
+import sys
+import time
+
+COMMAND = [sys.executable, '-c', 'from metainfoyaml2py.metainfoyaml2py import main; main()',
+           '--help']
+HEAVY_MODULES = ('yaml', 'toml', 'autopep8', 'pkg_resources')
+
+
+def best_time(command: list, repeat: int = 10) -> float:
+    '''
+    Return the best wall time in seconds of running `command`.
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def slowest_imports(n: int = 10) -> list:
+    '''
+    Return the `n` imports with the largest cumulative time and the heavy modules.
+    '''
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', *COMMAND[1:]],
+        check=True, capture_output=True, text=True,
+    )
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), name.strip()))
+    heavy = sorted({name for _, name in imports if name.split('.')[0] in HEAVY_MODULES})
+    return sorted(imports, reverse=True)[:n], heavy
+
+
+def main() -> None:
+    '''
+    Check the start up time against the budget.
+    '''
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 100.
+    baseline = best_time([sys.executable, '-c', 'pass'])
+    seconds = best_time(COMMAND)
+    imports, heavy = slowest_imports()
+    print('Slowest imports (cumulative us):')
+    for cumulative, name in imports:
+        print(f'{cumulative:>10} {name}')
+    print(f'Interpreter start up: {baseline * 1e3:.1f} ms')
+    print(f'metainfo-yaml2py --help: {seconds * 1e3:.1f} ms (budget {budget:.0f} ms)')
+    if heavy:
+        print(f'Heavy modules imported for --help: {", ".join(heavy)}')
+    if seconds * 1e3 > budget or heavy:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+'''
+Benchmark suite of the conversion phases with results stored as JSON.
+
+Run from the repository root with:
+    python -m benchmarks.suite -o results.json
+    python -m benchmarks.suite --compare old.json new.json
+'''
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import warnings
+from typing import Callable, Dict, Optional
+
+import yaml
+
+from metainfoyaml2py import metainfoyaml2py
+from metainfoyaml2py.cache import converter_version
+from metainfoyaml2py.metainfoyaml2py import (
+    format_code,
+    iter_module,
+    load_package,
+    load_standard_content,
+    parse_quantity,
+    parse_section,
+    read_yaml,
+    yaml2py,
+)
+
+from .synthetic import write_synthetic_schema
+
+
+def measure(function: Callable[[], None], repeat: int,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    '''
+    Time a function several times.
+
+    Args:
+        function (Callable[[], None]): The function to time.
+        repeat (int): The number of repetitions.
+        setup (Optional[Callable[[], None]], optional): A function called before each
+        repetition that is not timed. Defaults to None.
+
+    Returns:
+        Dict[str, float]: The best, mean and standard deviation of the times in seconds.
+    '''
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {
+        'best': min(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.,
+        'repeat': repeat,
+    }
+
+
+def run_suite(sections: int = 100, quantities: int = 10, depth: int = 1,
+              enum_size: int = 20, annotation_size: int = 5,
+              repeat: int = 5) -> dict:
+    '''
+    Run all benchmarks on a synthetic schema.
+
+    The parse functions do not modify their input, so all of them are timed on the same
+    loaded schema.
+
+    Args:
+        sections (int, optional): The number of top level sections. Defaults to 100.
+        quantities (int, optional): The number of quantities per section. Defaults to 10.
+        depth (int, optional): The nesting depth of inline `sub_sections`. Defaults to 1.
+        enum_size (int, optional): The number of values of enum quantities.
+        Defaults to 20.
+        annotation_size (int, optional): The number of entries in the annotations.
+        Defaults to 5.
+        repeat (int, optional): The number of repetitions of each benchmark.
+        Defaults to 5.
+
+    Returns:
+        dict: The parameters, environment and timings of all benchmarks.
+    '''
+    parameters = dict(
+        sections=sections,
+        quantities=quantities,
+        depth=depth,
+        enum_size=enum_size,
+        annotation_size=annotation_size,
+    )
+    results = {}
+    content = load_standard_content()
+    with tempfile.TemporaryDirectory() as tmp_dir, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yaml_path = os.path.join(tmp_dir, 'synthetic.schema.archive.yaml')
+        write_synthetic_schema(yaml_path, **parameters)
+        schema = read_yaml(yaml_path)['definitions']
+        first_name, first_section = next(iter(schema['sections'].items()))
+        quantity_name, quantity = next(iter(first_section['quantities'].items()))
+        state = {}
+        # The libyaml backend is only benchmarked if pyyaml is built with it
+        backends = ('c', 'python') if yaml.__with_libyaml__ else ('python',)
+        for backend in backends:
+            results[f'read_yaml[{backend}]'] = measure(
+                lambda backend=backend: read_yaml(yaml_path, backend), repeat)
+        # Create the on-disk cache and clear the in-process cache before each repetition
+        load_package(yaml_path)
+        for ir_cache in (False, True):
+            results[f'load_package[{"ir" if ir_cache else "yaml"}]'] = measure(
+                lambda ir_cache=ir_cache: load_package(yaml_path, ir_cache=ir_cache),
+                repeat,
+                setup=metainfoyaml2py._schema_cache.clear,
+            )
+        results['parse_quantity'] = measure(
+            lambda: parse_quantity(quantity_name, quantity), repeat * 100)
+        results['parse_section'] = measure(
+            lambda: parse_section(first_name, first_section, imports=[]), repeat * 10)
+        results['iter_module'] = measure(
+            lambda: state.update(code=''.join(iter_module(
+                content, schema['name'], schema['sections'], True))),
+            repeat,
+        )
+        results['format'] = measure(lambda: format_code(state['code']), repeat)
+        for formatter in ('autopep8', 'none'):
+            results[f'yaml2py[{formatter}]'] = measure(
+                lambda formatter=formatter: yaml2py(
+                    yaml_path, tmp_dir, normalizers=True, formatter=formatter),
+                repeat,
+            )
+        schema_bytes = os.path.getsize(yaml_path)
+    return {
+        'version': converter_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'schema_bytes': schema_bytes,
+        'results': results,
+    }
+
+
+def compare(old: dict, new: dict) -> str:
+    '''
+    Create a table comparing the best times of two benchmark runs.
+
+    Args:
+        old (dict): The results of the reference run.
+        new (dict): The results of the new run.
+
+    Returns:
+        str: The table with the ratio new/old of each benchmark.
+    '''
+    lines = [
+        f'old: {old["version"]} {old["parameters"]}',
+        f'new: {new["version"]} {new["parameters"]}',
+        f'{"benchmark":<22} {"old [s]":>10} {"new [s]":>10} {"new/old":>8}',
+    ]
+    for name, result in new['results'].items():
+        if name not in old['results']:
+            lines.append(f'{name:<22} {"-":>10} {result["best"]:>10.6f} {"-":>8}')
+            continue
+        old_best = old['results'][name]['best']
+        lines.append(
+            f'{name:<22} {old_best:>10.6f} {result["best"]:>10.6f} '
+            f'{result["best"] / old_best:>8.2f}'
+        )
+    return '\n'.join(lines)
+
+
+def format_results(run: dict) -> str:
+    '''
+    Create a table of the results of a benchmark run.
+
+    Args:
+        run (dict): The results of `run_suite`.
+
+    Returns:
+        str: The table with the best and mean time of each benchmark.
+    '''
+    lines = [
+        f'metainfoyaml2py {run["version"]}, python {run["python"]}',
+        f'{run["parameters"]}, {run["schema_bytes"] / 1e3:.1f} kB',
+        f'{"benchmark":<22} {"best [s]":>10} {"mean [s]":>10}',
+    ]
+    for name, result in run['results'].items():
+        lines.append(f'{name:<22} {result["best"]:>10.6f} {result["mean"]:>10.6f}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    '''
+    Run the benchmark suite or compare two result files.
+    '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sections', type=int, default=100)
+    parser.add_argument('--quantities', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--enum_size', type=int, default=20)
+    parser.add_argument('--annotation_size', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '-o', '--output', help='The JSON file the results are written to.')
+    parser.add_argument(
+        '--compare', nargs=2, metavar=('OLD', 'NEW'),
+        help='Compare two JSON result files instead of running the benchmarks.')
+    args = parser.parse_args()
+    if args.compare:
+        runs = []
+        for path in args.compare:
+            with open(path, 'r', encoding='utf8') as fh:
+                runs.append(json.load(fh))
+        print(compare(*runs))
+        return
+    run = run_suite(
+        sections=args.sections,
+        quantities=args.quantities,
+        depth=args.depth,
+        enum_size=args.enum_size,
+        annotation_size=args.annotation_size,
+        repeat=args.repeat,
+    )
+    print(format_results(run))
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as fh:
+            json.dump(run, fh, indent=4)
+
+
+if __name__ == '__main__':
+    main()
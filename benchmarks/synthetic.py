@@ -0,0 +1,130 @@
+'''
+Generator of synthetic NOMAD metainfo YAML schemas for benchmarking.
+'''
+
+from typing import Optional
+
+from metainfoyaml2py.metainfoyaml2py import yaml_dumper
+
+QUANTITY_TYPES = ('str', 'np.float64', 'int', 'bool', 'Datetime', 'Enum')
+
+
+def synthetic_quantity(index: int, enum_size: int = 10, annotation_size: int = 1) -> dict:
+    '''
+    Create the YAML content of a quantity, cycling through the common quantity types.
+
+    Args:
+        index (int): The index of the quantity, selecting its type.
+        enum_size (int, optional): The number of values of enum quantities.
+        Defaults to 10.
+        annotation_size (int, optional): The number of extra entries in the eln
+        annotation. Defaults to 1.
+
+    Returns:
+        dict: The YAML content of the quantity.
+    '''
+    quantity_type = QUANTITY_TYPES[index % len(QUANTITY_TYPES)]
+    quantity = {'description': f'Quantity number {index}.\n'}
+    if quantity_type == 'Enum':
+        quantity['type'] = {
+            'type_kind': 'Enum',
+            'type_data': [f'value_{k}' for k in range(enum_size)],
+        }
+    else:
+        quantity['type'] = quantity_type
+    if quantity_type == 'np.float64':
+        quantity['unit'] = 'meter'
+        quantity['shape'] = ['*']
+    eln = {'component': 'StringEditQuantity'}
+    eln.update({f'property_{k}': k for k in range(annotation_size)})
+    quantity['m_annotations'] = {'eln': eln}
+    return quantity
+
+
+def synthetic_section(index: int, quantities: int = 10, depth: int = 0,
+                      enum_size: int = 10, annotation_size: int = 1) -> dict:
+    '''
+    Create the YAML content of a section with a chain of nested inline sub sections.
+
+    Args:
+        index (int): The index of the section, used in names and descriptions.
+        quantities (int, optional): The number of quantities per section. Defaults to 10.
+        depth (int, optional): The nesting depth of inline `sub_sections`. Defaults to 0.
+        enum_size (int, optional): The number of values of enum quantities.
+        Defaults to 10.
+        annotation_size (int, optional): The number of entries in the annotations.
+        Defaults to 1.
+
+    Returns:
+        dict: The YAML content of the section.
+    '''
+    section = {
+        'base_sections': ['nomad.datamodel.data.EntryData'],
+        'description': f'Synthetic section number {index}.\nIt spans two lines.\n',
+        'm_annotations': {
+            'eln': {'hide': [f'hidden_{k}' for k in range(annotation_size)]},
+        },
+        'quantities': {
+            f'quantity_{j}': synthetic_quantity(j, enum_size, annotation_size)
+            for j in range(quantities)
+        },
+        'sub_sections': {
+            'reference': {
+                'repeats': True,
+                'section': 'nomad.datamodel.metainfo.eln.PublicationReference',
+            },
+        },
+    }
+    if depth > 0:
+        inline = synthetic_section(index, quantities, depth - 1, enum_size, annotation_size)
+        inline['base_sections'] = []
+        section['sub_sections'][f'level_{depth}_of_{index}'] = {'section': inline}
+    return section
+
+
+def synthetic_schema(sections: int = 10, quantities: int = 10, depth: int = 0,
+                     enum_size: int = 10, annotation_size: int = 1,
+                     name: Optional[str] = None) -> dict:
+    '''
+    Create the content of a synthetic NOMAD metainfo YAML schema.
+
+    Args:
+        sections (int, optional): The number of top level sections. Defaults to 10.
+        quantities (int, optional): The number of quantities per section. Defaults to 10.
+        depth (int, optional): The nesting depth of inline `sub_sections` in each top
+        level section. Defaults to 0.
+        enum_size (int, optional): The number of values of enum quantities.
+        Defaults to 10.
+        annotation_size (int, optional): The number of entries in the annotations.
+        Defaults to 1.
+        name (Optional[str], optional): The name of the package. Defaults to a name
+        containing the parameters.
+
+    Returns:
+        dict: The schema content with the `definitions` key.
+    '''
+    if name is None:
+        name = f'Synthetic {sections}x{quantities} depth {depth}'
+    return {
+        'definitions': {
+            'name': name,
+            'sections': {
+                f'Section{i}': synthetic_section(
+                    i, quantities, depth, enum_size, annotation_size)
+                for i in range(sections)
+            },
+        },
+    }
+
+
+def write_synthetic_schema(path: str, **parameters) -> None:
+    '''
+    Write a synthetic schema to a YAML file.
+
+    Args:
+        path (str): The path of the YAML file, ending with `.schema.archive.yaml`.
+        **parameters: The keyword arguments of `synthetic_schema`.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    with open(path, 'w', encoding='utf8') as fh:
+        yaml.dump(synthetic_schema(**parameters), fh, Dumper=yaml_dumper(), sort_keys=False)
@@ -0,0 +1,64 @@
+'''
+Benchmark comparing the libyaml and pure python YAML backends.
+
+Run with:
+    python -m benchmarks.yaml_backends
+'''
+
+import glob
+import os
+import time
+
+import yaml
+
+from metainfoyaml2py.metainfoyaml2py import yaml_dumper, yaml_loader
+
+from .synthetic import synthetic_schema
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example')
+
+
+def time_load(text: str, backend: str, repeat: int = 3) -> float:
+    '''
+    Return the best time in seconds of loading `text` with the given backend.
+    '''
+    loader = yaml_loader(backend)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        yaml.load(text, Loader=loader)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    '''
+    Time loading the example schemas and synthetic schemas with both backends.
+    '''
+    inputs = []
+    for path in sorted(glob.glob(
+            os.path.join(EXAMPLE_DIR, '**', '*.schema.archive.yaml'), recursive=True)):
+        with open(path, 'r', encoding='utf8') as fh:
+            inputs.append((os.path.basename(path), fh.read()))
+    for n_sections in (10, 100, 500):
+        inputs.append((
+            f'synthetic ({n_sections} sections)',
+            yaml.dump(
+                synthetic_schema(n_sections, 2, enum_size=100, annotation_size=20),
+                Dumper=yaml_dumper(),
+            ),
+        ))
+    print(f'{"schema":<40} {"kB":>8} {"python [s]":>11} {"c [s]":>9} {"speedup":>8}')
+    for name, text in inputs:
+        python_time = time_load(text, 'python')
+        # The libyaml backend is only timed if pyyaml is built with it
+        if yaml.__with_libyaml__:
+            c_time = time_load(text, 'c')
+            c_column = f'{c_time:>9.4f} {python_time / c_time:>8.1f}'
+        else:
+            c_column = f'{"n/a":>9}'
+        print(f'{name:<40} {len(text) / 1e3:>8.1f} {python_time:>11.4f} {c_column}')
+
+
+if __name__ == '__main__':
+    main()
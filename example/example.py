@@ -16,19 +16,19 @@
 # limitations under the License.
 #
 
-from nomad.datamodel.data import ArchiveSection
 from typing import (
     TYPE_CHECKING,
 )
+
+from nomad.datamodel.data import (
+    ArchiveSection,
+)
 from nomad.metainfo import (
+    Datetime,
     Package,
     Quantity,
-    Datetime,
     Section,
 )
-from nomad.datamodel.data import (
-    ArchiveSection,
-)
 if TYPE_CHECKING:
     from nomad.datamodel.datamodel import (
         EntryArchive,
@@ -52,7 +52,7 @@ class Activity(ArchiveSection):
         The starting date and time of the activity.
         ''',
         a_eln={
-            "component": "DateTimeEditQuantity"
+            'component': 'DateTimeEditQuantity'
         },
     )
     end_time = Quantity(
@@ -61,7 +61,7 @@ class Activity(ArchiveSection):
         The ending date and time of the activity.
         ''',
         a_eln={
-            "component": "DateTimeEditQuantity"
+            'component': 'DateTimeEditQuantity'
         },
     )
 
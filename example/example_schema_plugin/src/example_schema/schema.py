@@ -16,18 +16,26 @@
 # limitations under the License.
 #
 
-from structlog.stdlib import (
-    BoundLogger,
+from typing import (
+    TYPE_CHECKING,
+)
+
+from nomad.datamodel.data import (
+    ArchiveSection,
 )
 from nomad.metainfo import (
+    Datetime,
     Package,
     Quantity,
-    Datetime,
     Section,
 )
-from nomad.datamodel.data import (
-    ArchiveSection,
-)
+if TYPE_CHECKING:
+    from nomad.datamodel.datamodel import (
+        EntryArchive,
+    )
+    from structlog.stdlib import (
+        BoundLogger,
+    )
 
 m_package = Package(name='Example Schema')
 
@@ -35,20 +43,29 @@ m_package = Package(name='Example Schema')
 class Activity(ArchiveSection):
     '''
     A base class for any activity in relation to an entity.
+    This docstring can span multiple lines.
     '''
     m_def = Section()
     start_time = Quantity(
         type=Datetime,
-        description='The starting date and time of the activity.\n',
+        description='''
+        The starting date and time of the activity.
+        ''',
         a_eln={
-            "component": "DateTimeEditQuantity"})
+            'component': 'DateTimeEditQuantity'
+        },
+    )
     end_time = Quantity(
         type=Datetime,
-        description='The ending date and time of the activity.\n',
+        description='''
+        The ending date and time of the activity.
+        ''',
         a_eln={
-            "component": "DateTimeEditQuantity"})
+            'component': 'DateTimeEditQuantity'
+        },
+    )
 
-    def normalize(self, archive, logger: BoundLogger) -> None:
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         '''
         The normalizer for the `Activity` class.
 
@@ -57,7 +74,7 @@ class Activity(ArchiveSection):
             normalized.
             logger (BoundLogger): A structlog logger.
         '''
-        super(Activity, self).normalize(archive, logger)
+        super().normalize(archive, logger)
 
 
 class Entity(ArchiveSection):
@@ -66,7 +83,7 @@ class Entity(ArchiveSection):
     '''
     m_def = Section()
 
-    def normalize(self, archive, logger: BoundLogger) -> None:
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         '''
         The normalizer for the `Entity` class.
 
@@ -75,7 +92,7 @@ class Entity(ArchiveSection):
             normalized.
             logger (BoundLogger): A structlog logger.
         '''
-        super(Entity, self).normalize(archive, logger)
+        super().normalize(archive, logger)
 
 
 m_package.__init_metainfo__()
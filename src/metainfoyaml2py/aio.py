@@ -0,0 +1,123 @@
+'''
+Asyncio entry points running the conversions in an executor off the event loop.
+'''
+
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+from .batch import ConversionResult, _convert_one, check_outputs, expand_paths
+from .metainfoyaml2py import convert_text
+
+
+async def convert_text_async(yaml_text: str, executor: Optional[Executor] = None,
+                             **options) -> str:
+    '''
+    Convert the text of a schema into python code in an executor, see `convert_text`.
+
+    Args:
+        yaml_text (str): The content of the YAML schema.
+        executor (Optional[Executor], optional): The thread or process executor running
+        the conversion. Defaults to None, using the default executor of the event loop.
+        **options: Keyword arguments passed on to `convert_text`.
+
+    Returns:
+        str: The python code of the module.
+
+    Raises:
+        ValueError: If the YAML text is not a valid NOMAD metainfo schema.
+    '''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(convert_text, yaml_text, **options))
+
+
+async def convert_async(yaml_path: str, executor: Optional[Executor] = None,
+                        profile: bool = False, **options) -> ConversionResult:
+    '''
+    Convert a schema in an executor, keeping the event loop free.
+
+    Reading the schema, generating and formatting the code and writing the files all
+    happen in the executor. Like in `convert_many`, errors and warnings are captured in
+    the returned result. The warning filters are global to a process, so with a thread
+    executor the warnings of concurrent conversions may be attributed to each other; use
+    a process executor where they matter.
+
+    Cancelling the coroutine cancels the conversion if it has not started yet. A running
+    conversion is finished in the background, since threads and processes of an
+    executor can not be interrupted.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        executor (Optional[Executor], optional): The thread or process executor running
+        the conversion. Defaults to None, using the default executor of the event loop.
+        profile (bool, optional): Whether to profile the conversion, see
+        `convert_many`. Defaults to False.
+        **options: Keyword arguments passed on to `yaml2py`.
+
+    Returns:
+        ConversionResult: The result of the conversion.
+    '''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(_convert_one, yaml_path, options, profile))
+
+
+async def convert_many_async(paths: Iterable[str], executor: Optional[Executor] = None,
+                             limit: Optional[int] = None, profile: bool = False,
+                             **options) -> List[ConversionResult]:
+    '''
+    Convert many schemas concurrently without blocking the event loop.
+
+    The asynchronous counterpart of `convert_many`: the results are returned in the order
+    of the expanded input paths and a failing schema does not stop the others. When the
+    coroutine is cancelled, the conversions that have not started yet are cancelled and
+    a process pool created by this function is shut down.
+
+    Args:
+        paths (Iterable[str]): File paths, directories and glob patterns of the schemas.
+        executor (Optional[Executor], optional): The thread or process executor running
+        the conversions, see `convert_async`. Defaults to None, creating a process pool
+        with `limit` workers for this call.
+        limit (Optional[int], optional): The maximal number of conversions submitted to
+        the executor at once. Defaults to None, the number of CPUs with the own process
+        pool and no limit with a given executor.
+        profile (bool, optional): Whether to profile the conversions, see
+        `convert_many`. Defaults to False.
+        **options: Keyword arguments passed on to `yaml2py`.
+
+    Returns:
+        List[ConversionResult]: One result per converted schema.
+
+    Raises:
+        FileNotFoundError: If a path matches no schema files, see `expand_paths`.
+    '''
+    loop = asyncio.get_running_loop()
+    # Searching directories and glob patterns touches the file system
+    yaml_paths = await loop.run_in_executor(None, expand_paths, list(paths))
+    # With plugins, the package names are read from the schemas
+    results = await loop.run_in_executor(None, check_outputs, yaml_paths, options)
+    pending = [yaml_path for yaml_path in yaml_paths if yaml_path not in results]
+    if not pending:
+        return [results[yaml_path] for yaml_path in yaml_paths]
+    own_executor = executor is None
+    if own_executor:
+        limit = limit or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=min(limit, len(pending)))
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def convert(yaml_path: str) -> ConversionResult:
+        if semaphore is None:
+            return await convert_async(yaml_path, executor, profile, **options)
+        async with semaphore:
+            return await convert_async(yaml_path, executor, profile, **options)
+
+    try:
+        converted = await asyncio.gather(*(convert(path) for path in pending))
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    results.update(zip(pending, converted))
+    return [results[yaml_path] for yaml_path in yaml_paths]
@@ -0,0 +1,413 @@
+'''
+Generator of synthetic archive entries of a schema for load testing NOMAD.
+
+The values of the quantities follow their types, enum values and shapes, and the sub
+sections are filled recursively, so that the entries can be parsed and normalized like
+real data. The entries are generated and written one at a time, keeping the memory use
+independent of their number.
+'''
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import random
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .ir import Quantity, Section, SubSection
+from .metainfoyaml2py import (
+    YAML_BACKENDS, SymbolTable, _local_reference, _to_snake_case, load_package,
+    yaml_dumper)
+
+_INT_TYPES = (
+    'int', 'integer', 'np.int8', 'np.int16', 'np.int32', 'np.int64', 'np.uint8',
+    'np.uint16', 'np.uint32', 'np.uint64')
+_FLOAT_TYPES = ('float', 'np.float16', 'np.float32', 'np.float64')
+_START_TIME = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+_TIME_RANGE = 5 * 365 * 24 * 3600
+ARCHIVE_FORMATS = ('yaml', 'json')
+
+
+class Limits:
+    '''
+    The sizes of the generated values.
+
+    Args:
+        max_length (int, optional): The maximal length of dimensions of variable size,
+        like "*". Defaults to 10.
+        max_repeats (int, optional): The maximal number of repeated sub sections.
+        Defaults to 3.
+        max_depth (int, optional): The maximal nesting depth of sub sections, deeper
+        sub sections are left out. Defaults to 3.
+    '''
+
+    def __init__(self, max_length: int = 10, max_repeats: int = 3, max_depth: int = 3):
+        self.max_length = max_length
+        self.max_repeats = max_repeats
+        self.max_depth = max_depth
+
+
+@functools.lru_cache(maxsize=None)
+def archive_dumper(backend: str = 'auto') -> type:
+    '''
+    Get the YAML dumper class of the archive entries.
+
+    Lists of single values, like the values of quantities with a shape, are written in
+    flow style on one line, everything else in block style.
+
+    Args:
+        backend (str, optional): The YAML backend, see `yaml_dumper`. Defaults to 'auto'.
+
+    Returns:
+        type: The dumper class.
+    '''
+    dumper = type('ArchiveDumper', (yaml_dumper(backend),), {})
+
+    def represent_list(self, data: list):
+        flow_style = not any(isinstance(value, (list, dict)) for value in data)
+        return self.represent_sequence(
+            'tag:yaml.org,2002:seq', data, flow_style=flow_style)
+
+    dumper.add_representer(list, represent_list)
+    return dumper
+
+
+def _scalar_generator(quantity: Quantity) -> Optional[Callable[[random.Random], Any]]:
+    '''
+    Help function selecting the generator of single values by the type of a quantity.
+    '''
+    quantity_type = quantity.type
+    if isinstance(quantity_type, dict):
+        if quantity_type.get('type_kind') == 'Enum' and quantity_type.get('type_data'):
+            return lambda rng: rng.choice(quantity_type['type_data'])
+        return None
+    if quantity_type in ('str', 'string'):
+        return lambda rng: f'{quantity.name} {rng.randrange(10 ** 6)}'
+    if quantity_type in _INT_TYPES:
+        return lambda rng: rng.randrange(1000)
+    if quantity_type in _FLOAT_TYPES:
+        return lambda rng: rng.uniform(0., 1000.)
+    if quantity_type in ('bool', 'boolean'):
+        return lambda rng: rng.random() < 0.5
+    if quantity_type == 'Datetime':
+        return lambda rng: (_START_TIME + datetime.timedelta(
+            seconds=rng.randrange(_TIME_RANGE))).isoformat()
+    return None
+
+
+def quantity_value(quantity: Quantity, rng: random.Random, limits: Limits) -> Any:
+    '''
+    Generate the value of a quantity following its type and shape.
+
+    Strings, numbers, booleans, datetimes and enum values are generated. Dimensions of
+    fixed size are kept, all others, like "*" or "n_values", get a random size between 1
+    and `limits.max_length`.
+
+    Args:
+        quantity (Quantity): The quantity.
+        rng (random.Random): The random number generator.
+        limits (Limits): The sizes of the generated values.
+
+    Returns:
+        Any: The value, nested lists for quantities with a shape, or `None` for types
+        that can not be generated, like references.
+    '''
+    generator = _scalar_generator(quantity)
+    if generator is None:
+        return None
+
+    def generate(shape: List[Any]) -> Any:
+        if not shape:
+            return generator(rng)
+        size = shape[0]
+        if not isinstance(size, int):
+            size = rng.randint(1, limits.max_length)
+        return [generate(shape[1:]) for _ in range(size)]
+
+    return generate(list(dict(quantity.attributes).get('shape') or []))
+
+
+def _ancestors(symbols: SymbolTable, name: str) -> List[str]:
+    '''
+    Help function listing a section and the sections of the schema it inherits from,
+    the bases first.
+
+    The bases are walked depth first with an explicit stack, visiting each section once,
+    so that long chains stay within the recursion limit and shared bases are not walked
+    again. The symbol table has already rejected cyclic inheritance.
+    '''
+    order: List[str] = []
+    done: Set[str] = set()
+    stack = [(name, iter(symbols.symbols[name].bases))]
+    while stack:
+        for base in stack[-1][1]:
+            if base not in done:
+                stack.append((base, iter(symbols.symbols[base].bases)))
+                break
+        else:
+            section_name = stack.pop()[0]
+            done.add(section_name)
+            order.append(section_name)
+    return order
+
+
+def _members(symbols: SymbolTable, name: str) -> Tuple[
+        Dict[str, Quantity], Dict[str, Tuple[str, SubSection]]]:
+    '''
+    Help function collecting the quantities and sub sections of a section, including the
+    inherited ones, with the sub sections keyed together with the defining section.
+    '''
+    quantities = {}
+    sub_sections = {}
+    for ancestor in _ancestors(symbols, name):
+        section = symbols.symbols[ancestor].section
+        quantities.update((quantity.name, quantity) for quantity in section.quantities)
+        sub_sections.update(
+            (sub_section.name, (ancestor, sub_section))
+            for sub_section in section.sub_sections)
+    return quantities, sub_sections
+
+
+def section_data(symbols: SymbolTable, name: str, rng: random.Random,
+                 limits: Limits, depth: int = 0) -> Dict[str, Any]:
+    '''
+    Generate the data of a section.
+
+    Quantities that can not be generated, like references, and sub sections defined in
+    other schemas are left out.
+
+    Args:
+        symbols (SymbolTable): The sections of the schema.
+        name (str): The class name of the section.
+        rng (random.Random): The random number generator.
+        limits (Limits): The sizes of the generated values.
+        depth (int, optional): The nesting depth of the section. Defaults to 0.
+
+    Returns:
+        Dict[str, Any]: The data keyed by the quantity and sub section names.
+    '''
+    quantities, sub_sections = _members(symbols, name)
+    data = {}
+    for quantity_name, quantity in quantities.items():
+        value = quantity_value(quantity, rng, limits)
+        if value is not None:
+            data[quantity_name] = value
+    if depth >= limits.max_depth:
+        return data
+    for sub_section_name, (owner, sub_section) in sub_sections.items():
+        if isinstance(sub_section.section, Section):
+            sub_section_class = symbols.inline_name(owner, sub_section_name)
+        else:
+            sub_section_class = _local_reference(sub_section.section)
+        if sub_section_class not in symbols.symbols:
+            continue
+        if dict(sub_section.attributes).get('repeats'):
+            data[sub_section_name] = [
+                section_data(symbols, sub_section_class, rng, limits, depth + 1)
+                for _ in range(rng.randint(1, limits.max_repeats))
+            ]
+        else:
+            data[sub_section_name] = section_data(
+                symbols, sub_section_class, rng, limits, depth + 1)
+    return data
+
+
+def iter_entries(symbols: SymbolTable, name: str, count: int, m_def: str,
+                 seed: Any = 0, limits: Optional[Limits] = None) -> Iterator[dict]:
+    '''
+    Generate archive entries of a section one at a time.
+
+    The entries only depend on the seed and the section name, so the same arguments
+    always generate the same entries.
+
+    Args:
+        symbols (SymbolTable): The sections of the schema.
+        name (str): The class name of the section.
+        count (int): The number of entries.
+        m_def (str): The qualified name of the section class, like
+        "my_schema.Sample".
+        seed (Any, optional): The seed of the random number generator. Defaults to 0.
+        limits (Optional[Limits], optional): The sizes of the generated values.
+        Defaults to None, using the defaults of `Limits`.
+
+    Yields:
+        dict: The content of an archive file with the section as "data".
+    '''
+    limits = limits or Limits()
+    rng = random.Random(f'{seed}:{name}')
+    for _ in range(count):
+        data = {'m_def': m_def}
+        data.update(section_data(symbols, name, rng, limits))
+        yield {'data': data}
+
+
+def write_archives(yaml_path: str, output_dir: str = '', entries: int = 10,
+                   sections: Optional[Iterable[str]] = None, module: Optional[str] = None,
+                   seed: Any = 0, limits: Optional[Limits] = None,
+                   archive_format: str = 'yaml', yaml_backend: str = 'auto',
+                   ir_cache: bool = True) -> Dict[str, str]:
+    '''
+    Write synthetic archive entries of the sections of a schema.
+
+    The entries of each section are written to `<output_dir>/<section>/` as
+    `<section>_<number>.archive.yaml` files, one entry at a time. Large volumes are
+    written considerably faster as `.archive.json` files, which NOMAD parses as well.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        output_dir (str, optional): The output directory. Defaults to ''.
+        entries (int, optional): The number of entries per section. Defaults to 10.
+        sections (Optional[Iterable[str]], optional): The names of the top level
+        sections to generate entries of. Defaults to None, all top level sections.
+        module (Optional[str], optional): The python module of the generated schema,
+        used in the "m_def" of the entries. Defaults to None, the snake_case package
+        name like in the NOMAD plugins.
+        seed (Any, optional): The seed of the random number generator. Defaults to 0.
+        limits (Optional[Limits], optional): The sizes of the generated values.
+        Defaults to None, using the defaults of `Limits`.
+        archive_format (str, optional): The format of the archive files, either "yaml"
+        or "json". Defaults to 'yaml'.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use the on-disk cache of the schema, see
+        `load_package`. Defaults to True.
+
+    Returns:
+        Dict[str, str]: The directories of the entries keyed by the section names.
+
+    Raises:
+        ValueError: If the YAML file is not a valid NOMAD metainfo schema, a section is
+        not defined in it or the archive format is unknown.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f'Unknown archive format: {archive_format}')
+    package = load_package(yaml_path, yaml_backend, ir_cache)
+    symbols = SymbolTable(package.sections)
+    module = module or _to_snake_case(package.name)
+    sections = list(package.sections if sections is None else sections)
+    for name in sections:
+        if name not in package.sections:
+            raise ValueError(f'Section {name} is not defined in {yaml_path}.')
+    dumper = archive_dumper(yaml_backend)
+    directories = {}
+    for name in sections:
+        snake_name = _to_snake_case(name)
+        directory = os.path.join(output_dir, snake_name)
+        os.makedirs(directory, exist_ok=True)
+        digits = len(str(max(entries - 1, 0)))
+        for index, entry in enumerate(
+                iter_entries(symbols, name, entries, f'{module}.{name}', seed, limits)):
+            path = os.path.join(
+                directory, f'{snake_name}_{index:0{digits}d}.archive.{archive_format}')
+            with open(path, 'w', encoding='utf8') as fh:
+                if archive_format == 'json':
+                    json.dump(entry, fh)
+                else:
+                    yaml.dump(entry, fh, Dumper=dumper, sort_keys=False)
+        directories[name] = directory
+    return directories
+
+
+def main(argv: Optional[list] = None) -> None:
+    '''
+    Main function of the `metainfo-yaml2py generate` command.
+
+    Args:
+        argv (Optional[list], optional): The command line arguments after "generate".
+        Defaults to None, using `sys.argv`.
+    '''
+    parser = argparse.ArgumentParser(
+        prog='metainfo-yaml2py generate',
+        description=('Write synthetic archive entries of the sections of a schema for '
+                     'load testing.'),
+    )
+    parser.add_argument(
+        'yaml_path',
+        help='The path to the YAML schema.',
+    )
+    parser.add_argument(
+        '-o',
+        '--output_dir',
+        default='',
+        help=('The output directory, the entries of each section are written to a '
+              'sub directory. Defaults to the current directory.'),
+    )
+    parser.add_argument(
+        '-e',
+        '--entries',
+        type=int,
+        default=10,
+        help='The number of entries per section. Defaults to 10.',
+    )
+    parser.add_argument(
+        '-s',
+        '--section',
+        dest='sections',
+        action='append',
+        default=None,
+        help='Only generate entries of this top level section, can be repeated.',
+    )
+    parser.add_argument(
+        '--module',
+        default=None,
+        help=('The python module of the generated schema used in "m_def". Defaults to '
+              'the snake_case package name.'),
+    )
+    parser.add_argument(
+        '--seed',
+        default='0',
+        help='The seed of the random number generator. Defaults to "0".',
+    )
+    parser.add_argument(
+        '--max_length',
+        type=int,
+        default=10,
+        help='The maximal length of dimensions of variable size. Defaults to 10.',
+    )
+    parser.add_argument(
+        '--max_repeats',
+        type=int,
+        default=3,
+        help='The maximal number of repeated sub sections. Defaults to 3.',
+    )
+    parser.add_argument(
+        '--max_depth',
+        type=int,
+        default=3,
+        help='The maximal nesting depth of sub sections. Defaults to 3.',
+    )
+    parser.add_argument(
+        '-f',
+        '--format',
+        dest='archive_format',
+        choices=ARCHIVE_FORMATS,
+        default='yaml',
+        help=('The format of the archive files, "json" is written considerably faster. '
+              'Defaults to "yaml".'),
+    )
+    parser.add_argument(
+        '--yaml_backend',
+        choices=YAML_BACKENDS,
+        default='auto',
+        help='The YAML backend. Defaults to "auto".',
+    )
+    args = parser.parse_args(argv)
+    try:
+        directories = write_archives(
+            args.yaml_path,
+            output_dir=args.output_dir,
+            entries=args.entries,
+            sections=args.sections,
+            module=args.module,
+            seed=args.seed,
+            limits=Limits(args.max_length, args.max_repeats, args.max_depth),
+            archive_format=args.archive_format,
+            yaml_backend=args.yaml_backend,
+        )
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    for name, directory in directories.items():
+        print(f'{name}: {args.entries} entries in {directory}', file=sys.stderr)
@@ -0,0 +1,246 @@
+'''
+Batch conversion of many metainfo YAML schemas using a process pool.
+'''
+
+import glob
+import os
+import time
+import traceback
+import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .metainfoyaml2py import _to_snake_case, module_name, yaml2py
+from .profiling import Profiler
+
+SCHEMA_PATTERN = '*.schema.archive.yaml'
+
+
+class ConversionResult(NamedTuple):
+    '''
+    The outcome of converting a single YAML schema.
+
+    Attributes:
+        yaml_path (str): The path to the converted YAML schema.
+        error (Optional[str]): The error message if the conversion failed, else `None`.
+        warnings (List[str]): The messages of all warnings raised during the conversion.
+        seconds (float): The wall time spent on the conversion.
+        profile (Optional[dict]): The report of the `Profiler` if the conversion was
+        profiled, else `None`.
+        dependencies (Tuple[str, ...]): The paths of the schemas referenced by the
+        converted schema, see `yaml2py`.
+    '''
+    yaml_path: str
+    error: Optional[str]
+    warnings: List[str]
+    seconds: float
+    profile: Optional[dict] = None
+    dependencies: Tuple[str, ...] = ()
+
+    @property
+    def ok(self) -> bool:
+        '''
+        Whether the conversion succeeded.
+        '''
+        return self.error is None
+
+
+def expand_paths(paths: Iterable[str], pattern: str = SCHEMA_PATTERN) -> List[str]:
+    '''
+    Expand a mix of file paths, directories and glob patterns into a list of schema files.
+
+    Directories are searched recursively for files matching `pattern`. Matches of each
+    directory or glob are sorted and duplicates are dropped, so that the order of the
+    result only depends on the order of `paths`.
+
+    Args:
+        paths (Iterable[str]): The file paths, directories and glob patterns.
+        pattern (str, optional): The file name pattern used when searching directories.
+        Defaults to '*.schema.archive.yaml'.
+
+    Returns:
+        List[str]: The expanded list of YAML schema paths.
+
+    Raises:
+        FileNotFoundError: If a path is neither an existing file or directory nor a glob
+        with at least one match.
+    '''
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(glob.glob(
+                os.path.join(glob.escape(path), '**', pattern), recursive=True))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = sorted(
+                match for match in glob.glob(path, recursive=True)
+                if os.path.isfile(match)
+            )
+            if not matches:
+                raise FileNotFoundError(f'No schema files found for: {path}')
+        expanded.extend(matches)
+    return list(dict.fromkeys(expanded))
+
+
+def _convert_one(yaml_path: str, options: dict,
+                 profile: bool = False) -> ConversionResult:
+    '''
+    Worker function converting a single schema and capturing errors and warnings.
+    '''
+    start = time.perf_counter()
+    error = None
+    dependencies: List[str] = []
+    profiler = Profiler() if profile else None
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            dependencies = yaml2py(yaml_path=yaml_path, profiler=profiler, **options)
+        except Exception as exc:  # pylint: disable=broad-except
+            error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+    return ConversionResult(
+        yaml_path=yaml_path,
+        error=error,
+        warnings=[str(warning.message) for warning in caught],
+        seconds=time.perf_counter() - start,
+        profile=profiler.report() if profiler is not None else None,
+        dependencies=tuple(dependencies),
+    )
+
+
+def _plugin_name(yaml_path: str, options: dict) -> Optional[str]:
+    '''
+    Help function reading the folder name of the plugin of a schema, `None` if the
+    schema can not be read. Its conversion then reports the error.
+
+    Only the package name is read, without parsing the sections, so that conversions
+    restored from the cache still skip parsing.
+    '''
+    from .streaming import read_outline  # pylint: disable=import-outside-toplevel
+    try:
+        package_name = read_outline(yaml_path, options.get('yaml_backend', 'auto'))[0]
+    except Exception:  # pylint: disable=broad-except
+        return None
+    if package_name is None:
+        package_name = module_name(yaml_path)
+    return _to_snake_case(package_name) + '_plugin'
+
+
+def check_outputs(yaml_paths: List[str], options: dict) -> Dict[str, ConversionResult]:
+    '''
+    Find the schemas that would overwrite the output file of a schema before them.
+
+    With `plugin`, the schemas are written to the plugin named after their package name,
+    which is read from the schemas.
+
+    Args:
+        yaml_paths (List[str]): The paths to the schemas in the order of conversion.
+        options (dict): The keyword arguments of `yaml2py`.
+
+    Returns:
+        Dict[str, ConversionResult]: The failed results of the conflicting schemas keyed
+        by their paths.
+    '''
+    outputs = {}
+    results = {}
+    for yaml_path in yaml_paths:
+        if options.get('plugin'):
+            file_name = _plugin_name(yaml_path, options)
+            if file_name is None:
+                continue
+            output = f'plugin {file_name}'
+        else:
+            file_name = os.path.basename(yaml_path).split('.')[0]
+            output = f'package {file_name}' if options.get('split') else (
+                f'file {file_name}.py')
+        if file_name in outputs:
+            results[yaml_path] = ConversionResult(
+                yaml_path=yaml_path,
+                error=f'Output {output} is already written by: {outputs[file_name]}',
+                warnings=[],
+                seconds=0.,
+            )
+        outputs.setdefault(file_name, yaml_path)
+    return results
+
+
+def convert_many(paths: Iterable[str], jobs: Optional[int] = None,
+                 profile: bool = False, executor: Optional[Executor] = None,
+                 **options) -> List[ConversionResult]:
+    '''
+    Convert many NOMAD metainfo YAML schemas, optionally in parallel.
+
+    A failing schema does not stop the conversion of the others; its error is stored in
+    the corresponding `ConversionResult` instead. The results are returned in the order
+    of the expanded input paths, regardless of the order in which the conversions finish.
+
+    Args:
+        paths (Iterable[str]): File paths, directories and glob patterns of the schemas.
+        jobs (Optional[int], optional): The number of worker processes. `None` uses the
+        number of CPUs and 1 converts all schemas in the current process. A single
+        schema is converted in the current process, with its sections rendered in the
+        worker processes, see `yaml2py`. Defaults to None.
+        profile (bool, optional): Whether to profile the phases of each conversion and
+        store the report in `ConversionResult.profile`. Defaults to False.
+        executor (Optional[Executor], optional): An executor, e.g. a long lived process
+        pool, in which all schemas are converted instead. `jobs` is then not used.
+        Defaults to None.
+        **options: Keyword arguments passed on to `yaml2py`, like `output_dir`,
+        `normalizers`, `plugin`, `cache_dir` and `formatter`.
+
+    Returns:
+        List[ConversionResult]: One result per converted schema.
+    '''
+    yaml_paths = expand_paths(paths)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    # Schemas with the same file name would be written to the same output file
+    results = check_outputs(yaml_paths, options)
+    pending = [yaml_path for yaml_path in yaml_paths if yaml_path not in results]
+    if executor is None and len(pending) == 1:
+        # A single schema renders its sections in the worker processes instead
+        options = dict(options, jobs=max(1, jobs))
+    jobs = max(1, min(jobs, len(pending)))
+    if executor is None and jobs == 1:
+        for yaml_path in pending:
+            results[yaml_path] = _convert_one(yaml_path, options, profile)
+    else:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            futures = {
+                yaml_path: executor.submit(_convert_one, yaml_path, options, profile)
+                for yaml_path in pending
+            }
+            for yaml_path, future in futures.items():
+                results[yaml_path] = future.result()
+        finally:
+            if own_executor:
+                executor.shutdown()
+    return [results[yaml_path] for yaml_path in yaml_paths]
+
+
+def format_summary(results: List[ConversionResult], seconds: float) -> str:
+    '''
+    Create a human readable summary of a batch conversion.
+
+    Args:
+        results (List[ConversionResult]): The results of the conversions.
+        seconds (float): The total wall time of the batch conversion.
+
+    Returns:
+        str: The summary listing warnings, errors and the number of converted schemas.
+    '''
+    lines = []
+    for result in results:
+        for message in result.warnings:
+            lines.append(f'WARNING {result.yaml_path}: {message}')
+        if not result.ok:
+            lines.append(f'ERROR {result.yaml_path}: {result.error}')
+    n_ok = sum(result.ok for result in results)
+    summary = f'Converted {n_ok} of {len(results)} schemas in {seconds:.2f} s'
+    if n_ok < len(results):
+        summary += f', {len(results) - n_ok} failed'
+    lines.append(summary + '.')
+    return '\n'.join(lines)
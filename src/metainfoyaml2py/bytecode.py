@@ -0,0 +1,89 @@
+'''
+Byte compilation of generated modules, so that they can be shipped read-only.
+'''
+
+import os
+import py_compile
+from typing import Iterable, List
+
+# The invalidation modes of the compiled files, see `py_compile.PycInvalidationMode`
+INVALIDATION_MODES = ('checked-hash', 'unchecked-hash', 'timestamp')
+
+
+def _python_files(paths: Iterable[str]) -> List[str]:
+    '''
+    Help function listing the python files of the given files and folders.
+    '''
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            if path.endswith('.py'):
+                files.append(path)
+            continue
+        for root, folders, file_names in os.walk(path):
+            folders[:] = sorted(folder for folder in folders if folder != '__pycache__')
+            files.extend(
+                os.path.join(root, file_name) for file_name in sorted(file_names)
+                if file_name.endswith('.py'))
+    return files
+
+
+def check_source(code: str, path: str) -> None:
+    '''
+    Check that generated code is valid python before it is written.
+
+    Args:
+        code (str): The python code.
+        path (str): The path the code is written to, used in the error message.
+
+    Raises:
+        ValueError: If the code is not valid python.
+    '''
+    try:
+        compile(code, path, 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError) as exc:
+        raise ValueError(f'Invalid python code in {path}: {exc}') from exc
+
+
+def compile_files(paths: Iterable[str], optimize: Iterable[int] = (0,),
+                  invalidation_mode: str = 'checked-hash') -> List[str]:
+    '''
+    Byte compile python files into the `__pycache__` folders next to them.
+
+    With the default hash based invalidation, the compiled files stay valid when the
+    sources are copied, e.g. into a container image, since they are checked against the
+    hash of the source instead of its modification time.
+
+    Args:
+        paths (Iterable[str]): The python files and folders searched recursively for
+        python files.
+        optimize (Iterable[int], optional): The optimization levels to compile for, see
+        the `-O` option of python. Defaults to (0,).
+        invalidation_mode (str, optional): How python checks that a compiled file is up
+        to date: "checked-hash", "unchecked-hash" or "timestamp".
+        Defaults to 'checked-hash'.
+
+    Returns:
+        List[str]: The paths of the compiled files.
+
+    Raises:
+        ValueError: If a file is not valid python, an optimization level is not 0, 1
+        or 2, or the invalidation mode is unknown.
+    '''
+    if invalidation_mode not in INVALIDATION_MODES:
+        raise ValueError(f'Unknown invalidation mode: {invalidation_mode}')
+    mode = py_compile.PycInvalidationMode[invalidation_mode.upper().replace('-', '_')]
+    optimize = sorted(set(optimize))
+    for level in optimize:
+        if level not in (0, 1, 2):
+            raise ValueError(f'Invalid optimization level: {level}')
+    compiled = []
+    for file in _python_files(paths):
+        for level in optimize:
+            try:
+                compiled.append(py_compile.compile(
+                    file, doraise=True, optimize=level, invalidation_mode=mode))
+            except py_compile.PyCompileError as exc:
+                raise ValueError(
+                    f'Invalid python code in {file}: {exc.exc_value}') from exc
+    return compiled
@@ -0,0 +1,154 @@
+'''
+Content-hash based build cache for skipping the conversion of unchanged schemas.
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Iterable, Optional
+
+CACHE_DIR = '.yaml2py-cache'
+
+
+def converter_version() -> str:
+    '''
+    Help function for getting the installed version of the converter.
+
+    Returns:
+        str: The version of `metainfoyaml2py` or "unknown" if it is not installed.
+    '''
+    # pylint: disable=import-outside-toplevel
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version('metainfoyaml2py')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def cache_key(yaml_path: str, standard_content_path: str, options: dict) -> str:
+    '''
+    Compute the cache key of a conversion.
+
+    The key is a hash of the schema bytes, the converter version, the standard file
+    content and the conversion options, so that a change to any of them invalidates the
+    cached output.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        standard_content_path (str): The path to the `standard_file_content.yaml` file.
+        options (dict): The JSON serializable options of the conversion.
+
+    Returns:
+        str: The hexadecimal digest used as cache key.
+    '''
+    digest = hashlib.sha256()
+    for path in (yaml_path, standard_content_path):
+        with open(path, 'rb') as fh:
+            digest.update(hashlib.sha256(fh.read()).digest())
+    digest.update(converter_version().encode())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f'{key}.json')
+
+
+def _file_digest(path: str) -> Optional[str]:
+    '''
+    Help function for hashing a file, returning `None` if it does not exist.
+    '''
+    try:
+        with open(path, 'rb') as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def restore(cache_dir: str, key: str, output_dir: str, plugin: bool = False,
+            restored: Optional[list] = None, dependencies: Optional[list] = None) -> bool:
+    '''
+    Restore the output files of a cached conversion.
+
+    Files that already exist with the cached content are kept untouched, all other files
+    are (re)written. The cache entry is only used if the schemas referenced by the
+    converted schema are unchanged as well.
+
+    Args:
+        cache_dir (str): The directory of the cache.
+        key (str): The cache key of the conversion.
+        output_dir (str): The output directory of the conversion.
+        plugin (bool, optional): Whether the conversion creates a NOMAD plugin. Plugins
+        can only be restored if the plugin folder already exists. Defaults to False.
+        restored (Optional[list], optional): A list to which the paths of all output
+        files are appended if the output is restored. Defaults to None.
+        dependencies (Optional[list], optional): A list to which the paths of the
+        referenced schemas are appended if the output is restored. Defaults to None.
+
+    Returns:
+        bool: Whether the output was restored from the cache.
+    '''
+    try:
+        with open(_entry_path(cache_dir, key), 'r', encoding='utf8') as fh:
+            entry = json.load(fh)
+        files = entry['files']
+    except (OSError, ValueError, KeyError):
+        return False
+    for path, digest in entry.get('dependencies', {}).items():
+        if _file_digest(path) != digest:
+            return False
+    paths = {os.path.join(output_dir, name): content for name, content in files.items()}
+    if plugin and not all(os.path.isdir(os.path.dirname(path)) for path in paths):
+        return False
+    for path, content in paths.items():
+        try:
+            with open(path, 'r', encoding='utf8') as fh:
+                if fh.read() == content:
+                    continue
+        except OSError:
+            pass
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf8') as fh:
+            fh.write(content)
+    if restored is not None:
+        restored.extend(paths)
+    if dependencies is not None:
+        dependencies.extend(entry.get('dependencies', {}))
+    return True
+
+
+def store(cache_dir: str, key: str, output_dir: str, paths: Iterable[str],
+          yaml_path: Optional[str] = None,
+          dependencies: Iterable[str] = ()) -> None:
+    '''
+    Store the output files of a conversion in the cache.
+
+    Args:
+        cache_dir (str): The directory of the cache.
+        key (str): The cache key of the conversion.
+        output_dir (str): The output directory of the conversion.
+        paths (Iterable[str]): The paths of all files written by the conversion.
+        yaml_path (Optional[str], optional): The path to the converted schema, only
+        stored for information. Defaults to None.
+        dependencies (Iterable[str], optional): The paths of the schemas referenced by
+        the converted schema. Their hashes are stored and checked by `restore`.
+        Defaults to ().
+    '''
+    files = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf8') as fh:
+            files[os.path.relpath(path, output_dir or '.')] = fh.read()
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first so that parallel conversions never see a
+    # partially written cache entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf8') as fh:
+        json.dump({
+            'yaml_path': yaml_path,
+            'files': files,
+            'dependencies': {path: _file_digest(path) for path in dependencies},
+        }, fh)
+    os.replace(tmp_path, _entry_path(cache_dir, key))
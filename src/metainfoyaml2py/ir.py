@@ -0,0 +1,507 @@
+'''
+Typed intermediate representation of metainfo YAML schemas and its on-disk cache.
+'''
+
+import hashlib
+import hmac
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+# Increment when the classes below change, invalidating all cached representations
+IR_VERSION = 1
+_MAGIC = b'yaml2py-ir'
+# The file of the secret key signing the cached representations, see `_key`
+_KEY_FILE = 'key'
+
+
+class _Node:
+    '''
+    Base class of the representation with equality and repr based on the slots.
+    '''
+    __slots__ = ()
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{slot}={getattr(self, slot)!r}' for slot in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Annotation(_Node):
+    '''
+    An entry of the `m_annotations` of a definition, like the "eln" annotation.
+
+    Args:
+        name (str): The type of the annotation.
+        value (Any): The YAML content of the annotation.
+    '''
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: Any):
+        self.name = name
+        self.value = value
+
+
+def _annotations(definition: dict) -> Tuple[Annotation, ...]:
+    return tuple(
+        Annotation(name, value)
+        for name, value in (definition.get('m_annotations') or {}).items()
+    )
+
+
+def _attributes(definition: dict, keys: Tuple[str, ...]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple((key, value) for key, value in definition.items() if key not in keys)
+
+
+class Quantity(_Node):
+    '''
+    A quantity definition.
+
+    Args:
+        name (str): The name of the quantity.
+        type (Any): The type as given in the YAML, like "str", "#/Name" or an enum
+        mapping. `None` if the quantity has no type.
+        description (Optional[str], optional): The description. Defaults to None.
+        annotations (Tuple[Annotation, ...], optional): The annotations. Defaults to ().
+        attributes (Tuple[Tuple[str, Any], ...], optional): All other keyword arguments
+        of the quantity in the order of the YAML. Defaults to ().
+    '''
+    __slots__ = ('name', 'type', 'description', 'annotations', 'attributes')
+    KEYS = ('type', 'description', 'm_annotations')
+
+    def __init__(self, name: str, type: Any, description: Optional[str] = None,
+                 annotations: Tuple[Annotation, ...] = (),
+                 attributes: Tuple[Tuple[str, Any], ...] = ()):
+        # pylint: disable=redefined-builtin
+        self.name = name
+        self.type = type
+        self.description = description
+        self.annotations = annotations
+        self.attributes = attributes
+
+    @classmethod
+    def from_yaml(cls, name: str, quantity_dict: dict) -> 'Quantity':
+        '''
+        Create a quantity from its YAML content.
+
+        Args:
+            name (str): The name of the quantity.
+            quantity_dict (dict): The YAML content of the quantity.
+
+        Returns:
+            Quantity: The quantity.
+        '''
+        return cls(
+            name=name,
+            type=quantity_dict.get('type'),
+            description=quantity_dict.get('description'),
+            annotations=_annotations(quantity_dict),
+            attributes=_attributes(quantity_dict, cls.KEYS),
+        )
+
+
+class SubSection(_Node):
+    '''
+    A sub section definition.
+
+    Args:
+        name (str): The name of the sub section.
+        section (Union[str, Section, None]): The reference to the section definition or
+        the inline section definition.
+        annotations (Tuple[Annotation, ...], optional): The annotations. Defaults to ().
+        attributes (Tuple[Tuple[str, Any], ...], optional): All other keyword arguments
+        of the sub section in the order of the YAML, like `repeats`. Defaults to ().
+    '''
+    __slots__ = ('name', 'section', 'annotations', 'attributes')
+    KEYS = ('section', 'm_annotations')
+
+    def __init__(self, name: str, section: Union[str, 'Section', None],
+                 annotations: Tuple[Annotation, ...] = (),
+                 attributes: Tuple[Tuple[str, Any], ...] = ()):
+        self.name = name
+        self.section = section
+        self.annotations = annotations
+        self.attributes = attributes
+
+    @classmethod
+    def from_yaml(cls, name: str, sub_section_dict: dict,
+                  converted: Optional[Dict[Tuple[str, int], 'Section']] = None
+                  ) -> 'SubSection':
+        '''
+        Create a sub section from its YAML content.
+
+        Args:
+            name (str): The name of the sub section.
+            sub_section_dict (dict): The YAML content of the sub section.
+            converted (Optional[Dict[Tuple[str, int], Section]], optional): Already
+            converted inline section definitions, keyed by the name of the sub section
+            and the `id` of their YAML content. Defaults to None.
+
+        Returns:
+            SubSection: The sub section with inline section definitions converted.
+
+        Raises:
+            ValueError: If the sub section has no "section" key.
+        '''
+        if 'section' not in sub_section_dict:
+            raise ValueError(f'No "section" key found in sub section {name}.')
+        section = sub_section_dict['section']
+        if isinstance(section, dict):
+            key = (name, id(section))
+            if converted is not None and key in converted:
+                section = converted[key]
+            else:
+                section = Section.from_yaml(name, section)
+        return cls(
+            name=name,
+            section=section,
+            annotations=_annotations(sub_section_dict),
+            attributes=_attributes(sub_section_dict, cls.KEYS),
+        )
+
+
+class Section(_Node):
+    '''
+    A section definition.
+
+    Args:
+        name (str): The name of the section, for inline definitions the name of the sub
+        section.
+        description (Optional[str], optional): The description. Defaults to None.
+        base_sections (Tuple[str, ...], optional): The references to the base sections.
+        Defaults to ().
+        quantities (Tuple[Quantity, ...], optional): The quantities. Defaults to ().
+        sub_sections (Tuple[SubSection, ...], optional): The sub sections.
+        Defaults to ().
+        annotations (Tuple[Annotation, ...], optional): The annotations. Defaults to ().
+        attributes (Tuple[Tuple[str, Any], ...], optional): All other keyword arguments
+        of the section in the order of the YAML. Defaults to ().
+    '''
+    __slots__ = (
+        'name', 'description', 'base_sections', 'quantities', 'sub_sections',
+        'annotations', 'attributes',
+    )
+    KEYS = (
+        'sub_sections', 'base_sections', 'base_section', 'description', 'quantities',
+        'm_annotations',
+    )
+
+    def __init__(self, name: str, description: Optional[str] = None,
+                 base_sections: Tuple[str, ...] = (),
+                 quantities: Tuple[Quantity, ...] = (),
+                 sub_sections: Tuple[SubSection, ...] = (),
+                 annotations: Tuple[Annotation, ...] = (),
+                 attributes: Tuple[Tuple[str, Any], ...] = ()):
+        self.name = name
+        self.description = description
+        self.base_sections = base_sections
+        self.quantities = quantities
+        self.sub_sections = sub_sections
+        self.annotations = annotations
+        self.attributes = attributes
+
+    @classmethod
+    def from_yaml(cls, name: str, section_dict: dict) -> 'Section':
+        '''
+        Create a section from its YAML content.
+
+        Args:
+            name (str): The name of the section.
+            section_dict (dict): The YAML content of the section.
+
+        Returns:
+            Section: The section including its inline sub section definitions.
+
+        Raises:
+            ValueError: If an inline section definition contains itself, through a YAML
+            alias.
+        '''
+        # The inline definitions are converted innermost first from an explicit stack
+        # instead of recursively, so that deeply nested schemas stay within the
+        # recursion limit
+        converted: Dict[Tuple[str, int], Section] = {}
+        open_definitions: Set[int] = set()
+        stack = [(name, section_dict, False)]
+        while stack:
+            section_name, definition, expanded = stack.pop()
+            key = (section_name, id(definition))
+            if expanded:
+                open_definitions.discard(id(definition))
+                converted[key] = cls._from_yaml(section_name, definition, converted)
+                continue
+            if key in converted:
+                continue
+            if id(definition) in open_definitions:
+                raise ValueError(f'The inline section {section_name} contains itself.')
+            open_definitions.add(id(definition))
+            stack.append((section_name, definition, True))
+            sub_sections = definition.get('sub_sections') or {}
+            for sub_section_name, sub_section_dict in reversed(sub_sections.items()):
+                if isinstance(sub_section_dict, dict) and isinstance(
+                        sub_section_dict.get('section'), dict):
+                    stack.append((sub_section_name, sub_section_dict['section'], False))
+        return converted[(name, id(section_dict))]
+
+    @classmethod
+    def _from_yaml(cls, name: str, section_dict: dict,
+                   converted: Dict[Tuple[str, int], 'Section']) -> 'Section':
+        '''
+        Create a section from its YAML content with its inline definitions converted.
+        '''
+        base_sections = list(section_dict.get('base_sections') or [])
+        if 'base_section' in section_dict:
+            base_sections.append(section_dict['base_section'])
+        return cls(
+            name=name,
+            description=section_dict.get('description'),
+            base_sections=tuple(base_sections),
+            quantities=tuple(
+                Quantity.from_yaml(quantity_name, quantity_dict)
+                for quantity_name, quantity_dict in (
+                    section_dict.get('quantities') or {}).items()
+            ),
+            sub_sections=tuple(
+                SubSection.from_yaml(sub_section_name, sub_section_dict, converted)
+                for sub_section_name, sub_section_dict in (
+                    section_dict.get('sub_sections') or {}).items()
+            ),
+            annotations=_annotations(section_dict),
+            attributes=_attributes(section_dict, cls.KEYS),
+        )
+
+    def __reduce__(self) -> tuple:
+        # Pickled as a flat list of the nested definitions, since the pickle module
+        # recurses into nested objects and would exceed the recursion limit
+        return (_unflatten_section, (_flatten_section(self),))
+
+
+def _flatten_section(section: Section) -> List[tuple]:
+    '''
+    Help function listing the slot values of a section and its inline section
+    definitions, innermost first, with the inline definitions replaced by their index.
+    '''
+    entries: List[tuple] = []
+    indices: Dict[int, int] = {}
+    stack = [(section, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if id(current) in indices:
+            continue
+        if not expanded:
+            stack.append((current, True))
+            stack.extend(
+                (sub_section.section, False)
+                for sub_section in reversed(current.sub_sections)
+                if isinstance(sub_section.section, Section))
+            continue
+        sub_sections = tuple(
+            (
+                sub_section.name,
+                indices[id(sub_section.section)]
+                if isinstance(sub_section.section, Section) else sub_section.section,
+                sub_section.annotations,
+                sub_section.attributes,
+            )
+            for sub_section in current.sub_sections
+        )
+        indices[id(current)] = len(entries)
+        entries.append(tuple(
+            sub_sections if slot == 'sub_sections' else getattr(current, slot)
+            for slot in Section.__slots__))
+    return entries
+
+
+def _unflatten_section(entries: List[tuple]) -> Section:
+    '''
+    Help function creating a section from the output of `_flatten_section`.
+    '''
+    sections: List[Section] = []
+    for entry in entries:
+        values = dict(zip(Section.__slots__, entry))
+        values['sub_sections'] = tuple(
+            SubSection(
+                name, sections[section] if isinstance(section, int) else section,
+                annotations, attributes)
+            for name, section, annotations, attributes in values['sub_sections']
+        )
+        sections.append(Section(**values))
+    return sections[-1]
+
+
+class Package(_Node):
+    '''
+    The definitions of a schema.
+
+    Args:
+        name (str): The name of the metainfo package.
+        sections (Dict[str, Section]): The top level sections keyed by their names.
+    '''
+    __slots__ = ('name', 'sections')
+
+    def __init__(self, name: str, sections: Dict[str, Section]):
+        self.name = name
+        self.sections = sections
+
+    @classmethod
+    def from_yaml(cls, definitions: dict, default_name: str) -> 'Package':
+        '''
+        Create a package from the "definitions" of a schema.
+
+        Args:
+            definitions (dict): The content of the "definitions" key of the schema.
+            default_name (str): The package name used if the definitions have none.
+
+        Returns:
+            Package: The package.
+        '''
+        return cls(
+            name=definitions.get('name', default_name),
+            sections={
+                name: Section.from_yaml(name, section_dict)
+                for name, section_dict in (definitions.get('sections') or {}).items()
+            },
+        )
+
+
+def sections_from_yaml(sections: Dict[str, Union[Section, dict]]) -> Dict[str, Section]:
+    '''
+    Help function for converting the YAML content of sections, where needed.
+
+    Args:
+        sections (Dict[str, Union[Section, dict]]): The sections or their YAML content
+        keyed by the section names.
+
+    Returns:
+        Dict[str, Section]: The sections keyed by the section names.
+    '''
+    return {
+        name: section if isinstance(section, Section) else Section.from_yaml(
+            name, section)
+        for name, section in sections.items()
+    }
+
+
+def cache_dir() -> str:
+    '''
+    Get the per user directory of the cached representations.
+
+    Returns:
+        str: The folder "metainfoyaml2py" in `$XDG_CACHE_HOME`, defaulting to
+        "~/.cache".
+    '''
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'metainfoyaml2py')
+
+
+def cache_path(yaml_path: str) -> str:
+    '''
+    Get the path of the cached representation of a schema.
+
+    The cache is stored in the per user cache directory, see `cache_dir`, under a hash
+    of the absolute path of the schema, so that reading a schema never writes to its
+    folder.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+
+    Returns:
+        str: The path to the cache file.
+    '''
+    name = hashlib.sha256(os.path.abspath(yaml_path).encode()).hexdigest()
+    return os.path.join(cache_dir(), f'{name}.ir{IR_VERSION}.pickle')
+
+
+def _key(create: bool = False) -> bytes:
+    '''
+    Help function reading the secret key of the cache, which is only readable by the
+    user, optionally creating it.
+
+    Raises:
+        OSError: If the key does not exist and is not created, or can not be read.
+    '''
+    path = os.path.join(cache_dir(), _KEY_FILE)
+    if create and not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(os.urandom(32))
+    with open(path, 'rb') as fh:
+        key = fh.read()
+    if len(key) != 32:
+        raise OSError(f'Invalid key of the schema cache: {path}')
+    return key
+
+
+def _stamp(yaml_path: str, stat: os.stat_result, backend: str) -> tuple:
+    return (_MAGIC, IR_VERSION, os.path.abspath(yaml_path), stat.st_mtime_ns,
+            stat.st_size, backend)
+
+
+def _digest(key: bytes, data: bytes) -> bytes:
+    return hmac.new(key, data, hashlib.sha256).digest()
+
+
+def load_cached(yaml_path: str, stat: os.stat_result, backend: str) -> Optional[Package]:
+    '''
+    Load the cached representation of a schema if it is up to date.
+
+    The cache file is only unpickled if it is signed with the key of the cache, so that
+    files not written by `store_cached` are never unpickled.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        stat (os.stat_result): The current stat result of the schema.
+        backend (str): The YAML backend the representation was created with.
+
+    Returns:
+        Optional[Package]: The package or `None` if there is no up to date cache.
+    '''
+    try:
+        key = _key()
+        with open(cache_path(yaml_path), 'rb') as fh:
+            digest, data = fh.read(32), fh.read()
+        if not hmac.compare_digest(digest, _digest(key, data)):
+            return None
+        stamp, package = pickle.loads(data)
+    except Exception:  # pylint: disable=broad-except
+        # Missing, truncated or otherwise unreadable caches are recreated
+        return None
+    if stamp != _stamp(yaml_path, stat, backend):
+        return None
+    return package if isinstance(package, Package) else None
+
+
+def store_cached(yaml_path: str, stat: os.stat_result, backend: str,
+                 package: Package) -> None:
+    '''
+    Store the signed representation of a schema in the cache.
+
+    Failures, like a read-only cache directory, are ignored.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        stat (os.stat_result): The stat result of the schema the package was read from.
+        backend (str): The YAML backend the representation was created with.
+        package (Package): The package.
+    '''
+    path = cache_path(yaml_path)
+    try:
+        key = _key(create=True)
+        data = pickle.dumps(
+            (_stamp(yaml_path, stat, backend), package), protocol=pickle.HIGHEST_PROTOCOL)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(_digest(key, data))
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
@@ -3,21 +3,31 @@ metainfoyaml2py module
 '''
 
 import argparse
+import ast
+import datetime
+import functools
 import os
-import shutil
 import json
-from typing import Any, Iterable
+import math
+from typing import (
+    Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union)
 import warnings
 import re
+import sys
+import time
 
-import toml
-import yaml
-import autopep8
-import autoflake
+from importlib.resources import files
 
-from pkg_resources import resource_filename
+from . import cache, ir, scaffold
+from .ir import Package, Quantity, Section, SubSection
+from .profiling import Profiler, profile_phase
 
-resource_path = resource_filename(__name__, 'resources')
+# The heavy dependencies yaml, toml and autopep8 are imported in the functions
+# using them to keep the start up of the command line interface fast.
+resource_path = str(files(__package__).joinpath('resources'))
+
+MAX_LINE_LENGTH = 90
+YAML_BACKENDS = ('auto', 'c', 'python')
 
 
 def _to_camel_case(input_string: str) -> str:
@@ -60,111 +70,444 @@ def _to_snake_case(input_string: str) -> str:
     return '_'.join(word.lower() for word in words)
 
 
-def set_nested(mapping: dict, nested_key: list, value: Any) -> None:
+def yaml_loader(backend: str = 'auto') -> type:
     '''
-    Helper function for setting a nested value in a dict.
+    Help function for selecting the pyyaml loader class of a YAML backend.
 
     Args:
-        mapping (dict): The nested dictionary.
-        nested_key (list): A list of the nested keys from outer to inner.
-        value (Any): The value to set.
+        backend (str, optional): The YAML backend, either "c" for the libyaml based
+        `CSafeLoader`, "python" for the pure python `SafeLoader` or "auto" for using the
+        C loader if libyaml is available and the python loader otherwise.
+        Defaults to 'auto'.
 
     Returns:
-        _type_: The nested dictionary with the set value.
-    '''
-    _nested_dict = mapping.copy()
-    _keys = nested_key.copy()
-    key = _keys.pop(0)
-    if len(_keys) == 0:
-        _nested_dict[key] = value
-        return _nested_dict
-    else:
-        _nested_dict[key] = set_nested(_nested_dict.get(key, {}), _keys, value)
-        return _nested_dict
+        type: The loader class.
+
+    Raises:
+        ValueError: If the backend is unknown or "c" is requested without libyaml.
+    '''
+    return _yaml_backend_class(backend, 'SafeLoader')
+
+
+def yaml_dumper(backend: str = 'auto') -> type:
+    '''
+    Help function for selecting the pyyaml dumper class of a YAML backend.
+
+    Args:
+        backend (str, optional): The YAML backend, either "c" for the libyaml based
+        `CSafeDumper`, "python" for the pure python `SafeDumper` or "auto" for using the
+        C dumper if libyaml is available and the python dumper otherwise.
+        Defaults to 'auto'.
+
+    Returns:
+        type: The dumper class.
+
+    Raises:
+        ValueError: If the backend is unknown or "c" is requested without libyaml.
+    '''
+    return _yaml_backend_class(backend, 'SafeDumper')
+
+
+def _yaml_backend_class(backend: str, name: str) -> type:
+    '''
+    Help function for getting the C or python variant of a pyyaml class.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    if backend not in YAML_BACKENDS:
+        raise ValueError(f'Unknown YAML backend: {backend}')
+    if backend != 'python':
+        c_class = getattr(yaml, f'C{name}', None)
+        if c_class is not None:
+            return c_class
+        if backend == 'c':
+            raise ValueError('The "c" YAML backend requires pyyaml built with libyaml.')
+    return getattr(yaml, name)
+
+
+def load_yaml(stream: Any, backend: str = 'auto') -> Any:
+    '''
+    Help function for loading a YAML document using pyyaml.
+
+    The composer of the pure python backend is recursive, so its documents are composed
+    with `streaming.load_document` instead, which has no limit on the nesting.
+
+    Args:
+        stream (Any): The YAML text or an open file.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+
+    Returns:
+        Any: The content of the document.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    loader = yaml_loader(backend)
+    if loader is yaml.SafeLoader:
+        from .streaming import load_document  # pylint: disable=import-outside-toplevel
+        return load_document(stream, backend)
+    return yaml.load(stream, Loader=loader)
 
 
-def read_yaml(path: str) -> dict:
+def read_yaml(path: str, backend: str = 'auto') -> dict:
     '''
     Help function for reading YAML file into dict using pyyaml.
 
     Args:
         path (str): The path to the YAML file including the `.yaml` extension.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
 
     Returns:
         dict: Dictionary representation of the YAML file.
     '''
     with open(path, 'r', encoding="utf8") as file:
-        return yaml.safe_load(file)
-    
+        return load_yaml(file, backend)
 
-def update_mapping_file(path: str, nested_keys: Iterable[list], values: Iterable) -> None:
+
+def update_mapping_file(path: str, nested_keys: Iterable[list], values: Iterable,
+                        yaml_backend: str = 'auto') -> None:
     '''
-    Help function for updating a nested key value in a yaml or toml file.
+    Help function for updating nested key values in a yaml or toml file.
+
+    All keys are updated with a single read and write of the file, keeping the key order
+    and, where possible, the comments, see `patch.patch_file`.
 
     Args:
         path (str): The path to the file.
         nested_keys (Iterable[list]): An iterable of lists with the nested keys as items.
         values (Iterable): An iterable of the values corresponding to the keys.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
 
     Raises:
         ValueError: For unsupported file endings.
     '''
-    with open(path, 'r', encoding='utf-8') as fh:
-        if path.endswith('.yaml'):
-            mapping = yaml.safe_load(fh)
-        elif path.endswith('.toml'):
-            mapping = toml.load(fh)
-        else:
-            raise ValueError(f'Unsupported file ending for: {path}')
-    for nested_key, value in zip(nested_keys, values):
-        mapping = set_nested(mapping=mapping, nested_key=nested_key, value=value)
-    with open(path, 'w', encoding='utf-8') as fh:
-        if path.endswith('.yaml'):
-            yaml.dump(mapping, fh)
-        elif path.endswith('.toml'):
-            toml.dump(mapping, fh)
+    from .patch import patch_file  # pylint: disable=import-outside-toplevel
+    patch_file(
+        path=path,
+        updates={
+            tuple(nested_key): value for nested_key, value in zip(nested_keys, values)},
+        yaml_backend=yaml_backend,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_standard_content(backend: str = 'auto') -> dict:
+    '''
+    Help function for reading the standard file content used in all generated modules.
+
+    The content is read once per process and shared between conversions, so it must not
+    be modified.
+
+    Args:
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+
+    Returns:
+        dict: The templates of the header, imports, package, footer and normalizers.
+    '''
+    return read_yaml(os.path.join(resource_path, 'standard_file_content.yaml'), backend)
+
+
+# The packages of the read schemas by absolute path, with the modification time and
+# size of the file they were read from
+_schema_cache: Dict[str, tuple] = {}
+
+
+def load_package(path: str, backend: str = 'auto', ir_cache: bool = True) -> Package:
+    '''
+    Help function for reading the definitions of a schema into a `Package`.
+
+    Every file is read once per process and only read again when its modification time
+    or size changes, so that schemas referenced by many others are not parsed
+    repeatedly. Across processes, the package is cached in the per user cache
+    directory, see `ir.cache_path`, which is much faster to load than the YAML. The
+    returned package is shared and must not be modified.
+
+    Args:
+        path (str): The path to the YAML schema.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use and update the on-disk cache.
+        Defaults to True.
+
+    Returns:
+        Package: The package with the sections of the schema.
+
+    Raises:
+        ValueError: If the schema has no "definitions" key.
+    '''
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size, backend)
+    cached = _schema_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    package = ir.load_cached(path, stat, backend) if ir_cache else None
+    if package is None:
+        definitions = (read_yaml(path, backend) or {}).get('definitions')
+        if not isinstance(definitions, dict):
+            raise ValueError(f'No "definitions" key found in YAML file: {path}')
+        package = Package.from_yaml(definitions, module_name(path))
+        if ir_cache:
+            ir.store_cached(path, stat, backend, package)
+    _schema_cache[path] = (stamp, package)
+    return package
+
 
-def parse_annotation(section_dict: dict) -> str:
+def module_name(yaml_path: str) -> str:
+    '''
+    Help function for getting the name of the module generated from a schema.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+
+    Returns:
+        str: The file name up to the first ".", like "example" for
+        "example.schema.archive.yaml".
+    '''
+    return os.path.basename(yaml_path).split('.')[0]
+
+
+def _is_file_reference(reference: Any) -> bool:
+    '''
+    Help function for checking if a reference points to a section of another file, like
+    "../upload/raw/base_classes.schema.archive.yaml#Experiment".
+    '''
+    return (
+        isinstance(reference, str) and '#' in reference and not reference.startswith('#'))
+
+
+def referenced_schema_path(reference: str, yaml_path: str) -> Optional[str]:
+    '''
+    Find the schema file of a reference to a section of another file.
+
+    The path of the reference is relative to the directory of the referencing schema.
+    NOMAD upload paths, starting with "../upload/raw/", point to the root of the upload;
+    if they do not exist as given, they are looked up relative to the directory of the
+    referencing schema and then relative to each of its parent directories.
+
+    Args:
+        reference (str): The reference, like "base_classes.schema.archive.yaml#Name".
+        yaml_path (str): The path to the referencing schema.
+
+    Returns:
+        Optional[str]: The normalized path to the referenced schema or `None` if it does
+        not exist.
+    '''
+    path = reference.split('#', 1)[0]
+    directory = os.path.abspath(os.path.dirname(yaml_path))
+    candidates = [os.path.join(directory, path)]
+    if path.startswith('../upload/raw/'):
+        while True:
+            candidates.append(os.path.join(directory, path[len('../upload/raw/'):]))
+            if os.path.dirname(directory) == directory:
+                break
+            directory = os.path.dirname(directory)
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return os.path.normpath(candidate)
+    return None
+
+
+def resolve_reference(reference: str, yaml_path: str, plugin: bool = False,
+                      backend: str = 'auto', ir_cache: bool = True) -> tuple:
+    '''
+    Resolve a reference to a section of another schema into an import.
+
+    The referenced file is found by `referenced_schema_path`. The section is given by
+    its name after the "#", optionally as "#/Name" or "#/definitions/sections/Name".
+    The referenced schema is expected to be converted to the same output directory.
+
+    Args:
+        reference (str): The reference, like "base_classes.schema.archive.yaml#Name".
+        yaml_path (str): The path to the referencing schema.
+        plugin (bool, optional): Whether the schemas are converted to NOMAD plugins, in
+        which case the section is imported from the plugin package of the referenced
+        schema. Defaults to False.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use the on-disk cache of the referenced
+        schema, see `load_package`. Defaults to True.
+
+    Returns:
+        tuple: The `(module, name)` tuple of the import.
+
+    Raises:
+        ValueError: If the referenced file does not exist or does not define the
+        section.
+    '''
+    path = referenced_schema_path(reference, yaml_path)
+    if path is None:
+        raise ValueError(f'Referenced schema not found: {reference.split("#", 1)[0]}')
+    name = reference.split('#', 1)[1].lstrip('/')
+    if name.startswith('definitions/sections/'):
+        name = name[len('definitions/sections/'):]
+    package = load_package(path, backend, ir_cache)
+    if name not in package.sections:
+        raise ValueError(f'Section {name} is not defined in: {path}')
+    if plugin:
+        return f'{_to_snake_case(package.name)}.schema', name
+    return f'.{module_name(path)}', name
+
+
+def _python_literal(value: Any, indent: int = 0, multiline: bool = True) -> str:
+    '''
+    Help function for rendering a YAML value as a Python literal.
+
+    Args:
+        value (Any): The value, consisting of dicts, lists, strings, numbers, booleans,
+        `None` and dates.
+        indent (int, optional): The indentation in spaces of the line the value starts on.
+        Defaults to 0.
+        multiline (bool, optional): Whether non-empty dicts and lists are rendered with
+        one item per line. Defaults to True.
+
+    Returns:
+        str: The Python literal.
+
+    Raises:
+        ValueError: If the value has a type that YAML does not produce.
+    '''
+    if value is None or isinstance(value, (bool, int, str)):
+        return repr(value)
+    if isinstance(value, float):
+        if math.isfinite(value):
+            return repr(value)
+        return f"float('{value}')"
+    if isinstance(value, datetime.date):
+        return repr(value.isoformat())
+    if isinstance(value, dict):
+        items = [
+            f'{_python_literal(key)}: {_python_literal(item, indent + 4, multiline)}'
+            for key, item in value.items()
+        ]
+        brackets = '{}'
+    elif isinstance(value, list):
+        items = [_python_literal(item, indent + 4, multiline) for item in value]
+        brackets = '[]'
+    else:
+        raise ValueError(f'Unable to render a value of type {type(value).__name__}.')
+    if not items:
+        return brackets
+    if not multiline:
+        return brackets[0] + ', '.join(items) + brackets[1]
+    item_indent = ' ' * (indent + 4)
+    return (
+        f'{brackets[0]}\n{item_indent}' + f',\n{item_indent}'.join(items)
+        + f'\n{" " * indent}{brackets[1]}'
+    )
+
+
+def _format_value(value: Any, indent: int, inline_width: Optional[int] = None) -> str:
+    '''
+    Help function for rendering a YAML value as a Python literal indented to the given
+    level.
+
+    Args:
+        value (Any): The value to render.
+        indent (int): The indentation in spaces of the line the value starts on.
+        inline_width (Optional[int], optional): If given, lists are rendered on a single
+        line as long as they are at most this many characters long. Defaults to None.
+
+    Returns:
+        str: The rendered value where all continuation lines are indented by `indent`.
+    '''
+    if inline_width is not None and isinstance(value, list):
+        inline = _python_literal(value, multiline=False)
+        if len(inline) <= inline_width:
+            return inline
+    return _python_literal(value, indent)
+
+
+def _format_description(description: str, indent: int) -> str:
+    '''
+    Help function for rendering a multi-line description inside triple quotes.
+
+    Backslashes and triple quotes are escaped, trailing whitespace is removed and all
+    non-empty lines are indented by `indent` spaces.
+
+    Args:
+        description (str): The description text.
+        indent (int): The indentation in spaces of the description lines.
+
+    Returns:
+        str: The description lines joined by newlines.
+    '''
+    description = description.replace('\\', '\\\\').replace("'''", "\\'\\'\\'")
+    return '\n'.join(
+        ' ' * indent + line.rstrip() if line.strip() else ''
+        for line in description.split('\n')
+    )
+
+
+def iter_annotation(
+        definition: Union[Section, Quantity, SubSection, dict]) -> Iterator[str]:
+    '''
+    Generate the code of all m_annotations as python variables prepended by "a_".
+
+    Args:
+        definition (Union[Section, Quantity, SubSection, dict]): The definition
+        containing the annotations or its YAML content.
+
+    Yields:
+        str: The code fragments of the m_annotations.
+    '''
+    if isinstance(definition, dict):
+        annotations = definition.get("m_annotations", {}).items()
+    else:
+        annotations = ((annotation.name, annotation.value)
+                       for annotation in definition.annotations)
+    for annotation_type, annotation in annotations:
+        yield f"        a_{annotation_type}={_format_value(annotation, 8)},\n"
+
+
+def parse_annotation(definition: Union[Section, Quantity, SubSection, dict]) -> str:
     '''
     Parse all m_annotations into python variables which are prepended by "a_".
 
     Args:
-        section_dict (dict): The yaml dictionary for the MSection containing the
-        annotations.
+        definition (Union[Section, Quantity, SubSection, dict]): The definition
+        containing the annotations or its YAML content.
 
     Returns:
         str: The m_annotations as a str of python variables.
     '''
-    code = ""
-    for annotation_type, annotation in section_dict.pop("m_annotations", {}).items():
-        code += f"        a_{annotation_type}={json.dumps(annotation, indent=4)},\n"
-    return code
+    return ''.join(iter_annotation(definition))
 
 
-def parse_quantity(quantity_name: str, quantity_dict: dict) -> str:
+def iter_quantity(quantity_name: str, quantity_dict: Union[Quantity, dict],
+                  proxies: Iterable[str] = (),
+                  type_names: Optional[Dict[str, str]] = None) -> Iterator[str]:
     '''
-    Parse the content of metainfo quantity into Python instance.
+    Generate the code of a metainfo quantity as a Python instance.
 
     Args:
         quantity_name (str): The name of the quantity.
-        quantity_dict (dict): A dictionary representation for the YAML content for the 
-        quantity to be parsed.
+        quantity_dict (Union[Quantity, dict]): The quantity or a dictionary
+        representation of its YAML content.
+        proxies (Iterable[str], optional): The names of the sections that are defined
+        after the quantity and are therefore referenced through a `SectionProxy`.
+        Defaults to ().
+        type_names (Optional[Dict[str, str]], optional): The imported class names of
+        types referencing sections of other files, see `resolve_reference`.
+        Defaults to None.
 
-    Returns:
-        str: The instantiated quantity variable of the parsed quantity as python code.
+    Yields:
+        str: The code fragments of the instantiated quantity variable.
 
     Raises:
         ValueError: If the YAML file is not a valid NOMAD metainfo schema.
     '''
-    code = ""
-    code += f"{quantity_name} = Quantity(\n"
-    try:
-        quantity_type = quantity_dict.pop('type')
-    except KeyError as exc:
-        raise ValueError(f'No "type" key found in quantity {quantity_name}.') from exc
+    quantity = quantity_dict
+    if isinstance(quantity, dict):
+        quantity = Quantity.from_yaml(quantity_name, quantity)
+    yield f"{quantity_name} = Quantity(\n"
+    quantity_type = quantity.type
+    if quantity_type is None:
+        raise ValueError(f'No "type" key found in quantity {quantity_name}.')
     if isinstance(quantity_type, dict):
         if quantity_type['type_kind'] == 'Enum':
-            quantity_type = f"MEnum({quantity_type['type_data']})"
+            enum_values = quantity_type['type_data']
+            quantity_type = f"MEnum({_python_literal(enum_values, multiline=False)})"
+            if len(quantity_type) + 14 > MAX_LINE_LENGTH:
+                quantity_type = 'MEnum([\n' + ''.join(
+                    f'            {_python_literal(value)},\n' for value in enum_values
+                ) + '        ])'
         else:
             raise ValueError('Unknown type_kind in quantity.')
     elif quantity_type == 'string':
@@ -173,153 +516,1428 @@ def parse_quantity(quantity_name: str, quantity_dict: dict) -> str:
         quantity_type = 'int'
     elif quantity_type == 'boolean':
         quantity_type = 'bool'
-    code += f"        type={quantity_type.replace('#/','')},\n"
-    if "description" in quantity_dict:
-        description = quantity_dict.pop('description')
+    elif _is_file_reference(quantity_type):
+        if quantity_type not in (type_names or {}):
+            raise ValueError(
+                f'Unable to resolve the type of quantity {quantity_name}: {quantity_type}')
+        quantity_type = type_names[quantity_type]
+    quantity_type = quantity_type.replace('#/','')
+    if quantity_type in proxies:
+        quantity_type = f"Reference(SectionProxy('{quantity_type}'))"
+    yield f"        type={quantity_type},\n"
+    if quantity.description is not None:
+        description = quantity.description
         if description.endswith('\n'):
-            description = description[:-1].replace('\n', '\n        ')
-            code += f"        description='''\n        {description}\n        ''',\n"
+            description = _format_description(description[:-1], 8)
+            yield f"        description='''\n{description}\n        ''',\n"
         else:
-            code += f"        description='{description}',\n"
-    code += parse_annotation(quantity_dict)
-    for keyword, value in quantity_dict.items():
-        indent = 4
-        if isinstance(value, list):
-            indent = None
-        code += f"        {keyword}={json.dumps(value, indent=indent)},\n"
-    code += "    )\n"
-    return code
+            yield f"        description={description!r},\n"
+    yield from iter_annotation(quantity)
+    for keyword, value in quantity.attributes:
+        inline_width = MAX_LINE_LENGTH - len(keyword) - 10
+        yield f"        {keyword}={_format_value(value, 8, inline_width)},\n"
+    yield "    )\n"
 
 
-def parse_section(section_name: str, section_dict: dict) -> str:
+def parse_quantity(quantity_name: str, quantity_dict: Union[Quantity, dict]) -> str:
     '''
-    Parse the content of a metainfo section into a Python class.
+    Parse the content of metainfo quantity into Python instance.
 
     Args:
-        section_name (str): The name of the section.
-        section_dict (dict): A dictionary representation of the YAML content for the 
-        section to be parsed.
+        quantity_name (str): The name of the quantity.
+        quantity_dict (Union[Quantity, dict]): The quantity or a dictionary
+        representation of its YAML content.
 
     Returns:
-        str: The class definition of the parsed section as python code.
+        str: The instantiated quantity variable of the parsed quantity as python code.
+
+    Raises:
+        ValueError: If the YAML file is not a valid NOMAD metainfo schema.
+    '''
+    return ''.join(iter_quantity(quantity_name, quantity_dict))
+
+
+def iter_section(section_name: str, section_dict: Union[Section, dict], imports: list,
+                 symbols: Optional['SymbolTable'] = None) -> Iterator[str]:
+    '''
+    Generate the code of a metainfo section as a Python class.
+
+    The section is only read, never modified, so a loaded schema can be rendered
+    repeatedly and from several threads at once.
+
+    Without a symbol table, the classes of inline sub section definitions are generated
+    before the class of the section itself. With a symbol table, they are generated
+    separately in the order of `SymbolTable.order` and references to sections defined
+    later are made through a `SectionProxy`.
+
+    Args:
+        section_name (str): The name of the section.
+        section_dict (Union[Section, dict]): The section or a dictionary representation
+        of its YAML content.
+        imports (list): A list or `ImportRegistry` to which the `(module, name)` tuples of
+        the imports needed by the section are appended.
+        symbols (Optional[SymbolTable], optional): The symbol table of the module.
+        Defaults to None.
+
+    Yields:
+        str: The code fragments of the class definition.
     '''
-    code = ""
-    # Recursive definition of subsections
-    sub_sections_code = ''
-    sub_sections_dict = section_dict.pop("sub_sections", {})
-    for sub_section, kwargs in sub_sections_dict.items():
-        camel_name = _to_camel_case(sub_section)
-        sub_section_def = kwargs.pop("section")
-        if isinstance(sub_section_def, dict):
-            code += parse_section(
-                section_name=camel_name,
-                section_dict=sub_section_def,
-            ) + '\n'
+    section = section_dict
+    if isinstance(section, dict):
+        section = Section.from_yaml(section_name, section)
+    if symbols is None:
+        for inline_name, inline_section in _inline_sections(section):
+            yield from _iter_class(inline_name, inline_section, imports)
+            yield '\n\n'
+    yield from _iter_class(section_name, section, imports, symbols)
+
+
+def _inline_sections(section: Section) -> List[Tuple[str, Section]]:
+    '''
+    Help function listing the inline sub section definitions of a section, innermost
+    first, with their sub section names in CamelCase.
+
+    Only used without a symbol table, which names the inline definitions of the whole
+    schema itself, see `SymbolTable.inline_name`.
+
+    The definitions are walked with an explicit stack instead of recursively, so that
+    schemas nested thousands of levels deep stay within the recursion limit.
+    '''
+    inline_sections = []
+    stack = [('', section, iter(section.sub_sections))]
+    while stack:
+        for sub_section in stack[-1][2]:
+            if isinstance(sub_section.section, Section):
+                stack.append((
+                    _to_camel_case(sub_section.name),
+                    sub_section.section,
+                    iter(sub_section.section.sub_sections),
+                ))
+                break
+        else:
+            name, inline_section, _ = stack.pop()
+            if stack:
+                inline_sections.append((name, inline_section))
+    return inline_sections
+
+
+def _iter_class(section_name: str, section: Section, imports: list,
+                symbols: Optional['SymbolTable'] = None) -> Iterator[str]:
+    '''
+    Help function generating the class of a section without its inline sub section
+    definitions, see `iter_section`.
+    '''
+    proxies = symbols.proxies(section_name) if symbols is not None else set()
+    # The names are memoized by the symbol table for all sub sections of the schema
+    camel_case = symbols.class_name if symbols is not None else _to_camel_case
+    sub_sections_code = []
+    for sub_section in section.sub_sections:
+        sub_section_def = sub_section.section
+        if isinstance(sub_section_def, Section):
+            camel_name = (
+                symbols.inline_name(section_name, sub_section.name) if symbols is not None
+                else _to_camel_case(sub_section.name))
         elif sub_section_def.startswith('nomad'):
             modules = sub_section_def.split('.')
             camel_name = modules.pop()
-            code = f'from {".".join(modules)} import (\n    {camel_name},\n)' + '\n' + code
+            imports.append(('.'.join(modules), camel_name))
         elif sub_section_def.startswith('#/'):
             camel_name = sub_section_def[2:]
         elif '.' not in sub_section_def:
             camel_name = sub_section_def
+        elif symbols is not None and _is_file_reference(sub_section_def):
+            external = symbols.resolve(sub_section_def)
+            if external is None:
+                warnings.warn(f"Unable to import subsection: {sub_section.name}.")
+                camel_name = camel_case(sub_section.name)
+            else:
+                imports.append(external)
+                camel_name = external[1]
         else:
-            warnings.warn(f"Unable to import subsection: {sub_section}.")
-        sub_sections_code += f'    {sub_section} = SubSection(\n'
-        sub_sections_code += f'        section_def={camel_name},\n'
-        sub_sections_code += parse_annotation(kwargs)
-        for keyword, arg in kwargs.items():
-            sub_sections_code += f'        {keyword}={json.dumps(arg, indent=4)},\n'
-        sub_sections_code += ')\n'
+            warnings.warn(f"Unable to import subsection: {sub_section.name}.")
+            camel_name = camel_case(sub_section.name)
+        if camel_name in proxies:
+            camel_name = f"SectionProxy('{camel_name}')"
+        sub_sections_code.append(f'    {sub_section.name} = SubSection(\n')
+        sub_sections_code.append(f'        section_def={camel_name},\n')
+        sub_sections_code.extend(iter_annotation(sub_section))
+        for keyword, arg in sub_section.attributes:
+            sub_sections_code.append(f'        {keyword}={_format_value(arg, 8)},\n')
+        sub_sections_code.append('    )\n')
     # Inheritance from base sections
     base_sections = []
-    base_section_list = section_dict.pop("base_sections", [])
-    if "base_section" in section_dict:
-        base_section_list.append(section_dict.pop("base_section"))
-    for base_section in base_section_list:
+    for base_section in section.base_sections:
+        if symbols is not None and _is_file_reference(base_section):
+            # Unresolved references are reported by the symbol table
+            external = symbols.resolve(base_section)
+            if external is not None and external[1] not in base_sections:
+                imports.append(external)
+                base_sections.append(external[1])
+            continue
         base_section = base_section.replace('#/','')
         if not '.' in base_section:
             base_sections.append(base_section)
         elif base_section.startswith('nomad'):
             modules = base_section.split('.')
             base_class = modules.pop()
-            code = f'from {".".join(modules)} import {base_class}' + '\n' + code
+            imports.append(('.'.join(modules), base_class))
             base_sections.append(base_class)
         else:
             warnings.warn(f"Unable to inherit from referenced base section: {base_section}.")
     if 'ArchiveSection' not in base_sections:
         base_sections.append('ArchiveSection')
-    base_classes = ""
-    if len(base_sections) > 0:
-        base_classes = f"({','.join(base_sections)})"
+    base_classes = f"({', '.join(base_sections)})"
+    if len(section_name) + len(base_classes) + 7 > MAX_LINE_LENGTH:
+        base_classes = '(\n' + ''.join(
+            f'        {base_section},\n' for base_section in base_sections) + ')'
     # Description as docstring
-    description = section_dict.pop(
-        'description', 'Class autogenerated from yaml schema.')
+    description = section.description or 'Class autogenerated from yaml schema.'
     if description[-1] == '\n':
         description = description[:-1]
-    code += f"class {section_name}{base_classes}:\n    '''"
-    description = description.replace('\n', '\n    ')
-    code += f"\n    {description}\n    '''\n"
-    # Pop quantities
-    quantities = section_dict.pop('quantities', {})
-    code += "    m_def = Section(\n" 
-    code += parse_annotation(section_dict)
+    yield f"class {section_name}{base_classes}:\n    '''\n"
+    yield f"{_format_description(description, 4)}\n    '''\n"
+    section_code = list(iter_annotation(section))
     # Add remaining keys in section dictionary as keyword arguments to section definition
-    for keyword in section_dict:
-        code += f"        {keyword}={json.dumps(section_dict.get(keyword), indent=4)},\n"
-    if code.endswith('\n'):
-        code = code[:-1]
-    code += ')\n'
-    for quantity in quantities:
-        code += '    ' + \
-            parse_quantity(quantity_name=quantity,
-                           quantity_dict=quantities[quantity])
+    for keyword, value in section.attributes:
+        section_code.append(f"        {keyword}={_format_value(value, 8)},\n")
+    if section_code:
+        yield "    m_def = Section(\n"
+        yield from section_code
+        yield "    )\n"
+    else:
+        yield "    m_def = Section()\n"
+    for quantity in section.quantities:
+        type_names = {}
+        if symbols is not None and _is_file_reference(quantity.type):
+            external = symbols.resolve(quantity.type)
+            if external is not None:
+                imports.append(external)
+                type_names[quantity.type] = external[1]
+        yield '    '
+        yield from iter_quantity(quantity_name=quantity.name,
+                                 quantity_dict=quantity,
+                                 proxies=proxies,
+                                 type_names=type_names)
     # Sub section references
-    code += sub_sections_code
+    yield from sub_sections_code
+
+
+def parse_section(section_name: str, section_dict: Union[Section, dict],
+                  imports: Optional[list] = None) -> str:
+    '''
+    Parse the content of a metainfo section into a Python class.
+
+    Args:
+        section_name (str): The name of the section.
+        section_dict (Union[Section, dict]): The section or a dictionary representation
+        of its YAML content.
+        imports (Optional[list], optional): A list or `ImportRegistry` to which the
+        `(module, name)` tuples of the imports needed by the section are appended. If not
+        given, the import statements are prepended to the returned code instead.
+        Defaults to None.
+
+    Returns:
+        str: The class definition of the parsed section as python code.
+    '''
+    if imports is not None:
+        return ''.join(iter_section(section_name, section_dict, imports))
+    imports = ImportRegistry()
+    code = ''.join(iter_section(section_name, section_dict, imports))
+    import_code = imports.render()
+    if import_code:
+        return import_code + '\n\n' + code
     return code
 
 
-def create_plugin(location: str, package_name: str) -> str:
+def _local_reference(reference: Any) -> Optional[str]:
     '''
-    Function for creating a nomad plugin package at a given location.
+    Help function for getting the class name of a reference to a section of the schema.
+
+    Args:
+        reference (Any): The reference, like "#/Name" or "Name".
+
+    Returns:
+        Optional[str]: The class name or `None` if the reference is not a string or
+        points to another module.
+    '''
+    if not isinstance(reference, str):
+        return None
+    reference = reference.replace('#/', '')
+    if '.' in reference:
+        return None
+    return reference
+
+
+class Symbol(NamedTuple):
+    '''
+    A section definition of a schema, as collected by `SymbolTable`.
+
+    Attributes:
+        name (str): The class name of the section.
+        parent (Optional[str]): The class name of the section containing the inline
+        definition, `None` for top level sections. See `SymbolTable.path` for the
+        location of the definition in the schema.
+        section (Section): The section definition.
+        top_level (bool): Whether the section is defined directly in `sections`, as
+        opposed to an inline sub section definition.
+        bases (List[str]): The names of the sections of the schema that the section
+        inherits from.
+        references (List[str]): The names of the sections of the schema used as sub
+        sections or quantity types.
+    '''
+    name: str
+    parent: Optional[str]
+    section: Section
+    top_level: bool
+    bases: List[str]
+    references: List[str]
+
+
+class SymbolTable:
+    '''
+    Table of all section definitions of a schema, including inline sub sections.
+
+    The table is built in a pre-pass over the schema, without modifying it, and
+    determines the order in which the classes are defined: Every section is defined
+    after the sections it inherits from and, where possible, after the sections it
+    references. References that can not be resolved this way, like a section that
+    contains itself as a sub section, are made through a `SectionProxy`. Sections keep
+    the order of the schema, with inline sub sections before their parents, unless a
+    reference requires otherwise.
+
+    Inline sub sections are named by their sub section name in CamelCase. If that name
+    is already taken, for example by an inline definition extending a top level section
+    of the same name, the name of the parent section is prepended.
+
+    References to sections of other schema files are resolved by `resolve` if the path
+    to the schema is given.
+
+    When the sections of a schema are converted a few at a time, see
+    `iter_streamed_classes`, the names of the other sections of the schema are given as
+    `reserved` and those already defined as `defined`. Inline sub sections are not named
+    like any of them and references to sections that are not defined yet are made
+    through a `SectionProxy`.
+
+    Args:
+        sections (Dict[str, Union[Section, dict]]): The sections or their YAML content
+        keyed by the section names.
+        yaml_path (Optional[str], optional): The path to the schema, used for resolving
+        references to other files. Defaults to None.
+        plugin (bool, optional): Whether the schemas are converted to NOMAD plugins, see
+        `resolve_reference`. Defaults to False.
+        yaml_backend (str, optional): The YAML backend used for reading referenced
+        schemas, see `yaml_loader`. Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use the on-disk cache of referenced
+        schemas, see `load_package`. Defaults to True.
+        reserved (Optional[Set[str]], optional): The class names of the other sections
+        of the schema. Defaults to None.
+        defined (Optional[Set[str]], optional): The class names of the sections of the
+        schema that are defined before these sections. Defaults to None.
+
+    Raises:
+        ValueError: If the sections inherit from each other in a cycle.
+    '''
+
+    def __init__(self, sections: Dict[str, Union[Section, dict]],
+                 yaml_path: Optional[str] = None, plugin: bool = False,
+                 yaml_backend: str = 'auto', ir_cache: bool = True,
+                 reserved: Optional[Set[str]] = None,
+                 defined: Optional[Set[str]] = None):
+        self.yaml_path = yaml_path
+        self.plugin = plugin
+        self.yaml_backend = yaml_backend
+        self.ir_cache = ir_cache
+        self.dependencies: Set[str] = set()
+        self._external: Dict[str, Optional[tuple]] = {}
+        self.symbols: Dict[str, Symbol] = {}
+        self._class_names: Dict[str, str] = {}
+        self._inline_names: Dict[tuple, str] = {}
+        self._proxies: Dict[str, Set[str]] = {}
+        self._reserved = reserved if reserved is not None else set()
+        defined = defined if defined is not None else set()
+        collected = []
+        taken = set(sections)
+        for section_name, section in ir.sections_from_yaml(sections).items():
+            self._collect(section_name, section, collected, taken)
+        for symbol in collected:
+            self.symbols[symbol.name] = symbol
+        # The names of the base sections outside of the table that are not defined yet
+        self.undefined_bases: Set[str] = set()
+        for name, symbol in self.symbols.items():
+            self.undefined_bases.update(
+                base for base in symbol.bases
+                if base is not None and base not in self.symbols and base not in defined)
+            forward = {
+                reference for reference in symbol.references
+                if reference in self._reserved and reference not in self.symbols
+                and reference not in defined
+            }
+            if forward:
+                self._proxies[name] = forward
+        # Only keep references to sections of the schema
+        for name, symbol in self.symbols.items():
+            self.symbols[name] = symbol._replace(
+                bases=[base for base in symbol.bases if base in self.symbols],
+                references=[
+                    reference for reference in symbol.references
+                    if reference in self.symbols
+                ],
+            )
+        self._ancestors: Dict[str, Set[str]] = {}
+        for name in self.symbols:
+            self._inheritance_closure(name)
+        self.order: List[str] = self._sort()
+
+    def class_name(self, sub_section: str) -> str:
+        '''
+        Get the CamelCase class name of an inline sub section definition.
+
+        Args:
+            sub_section (str): The name of the sub section.
+
+        Returns:
+            str: The class name, memoized for all sub sections of the schema.
+        '''
+        if sub_section not in self._class_names:
+            self._class_names[sub_section] = _to_camel_case(sub_section)
+        return self._class_names[sub_section]
+
+    def inline_name(self, section_name: str, sub_section: str) -> str:
+        '''
+        Get the unique class name of an inline sub section definition.
+
+        Args:
+            section_name (str): The class name of the parent section.
+            sub_section (str): The name of the sub section.
+
+        Returns:
+            str: The class name of the definition, see `SymbolTable`.
+        '''
+        return self._inline_names[(section_name, sub_section)]
+
+    def resolve(self, reference: str) -> Optional[tuple]:
+        '''
+        Resolve a reference to a section of another schema file into an import.
+
+        The resolved references are memoized and the referenced files are added to
+        `dependencies`. A warning is raised once for each reference that can not be
+        resolved.
+
+        Args:
+            reference (str): The reference, see `resolve_reference`.
+
+        Returns:
+            Optional[tuple]: The `(module, name)` tuple of the import or `None` if the
+            reference can not be resolved.
+        '''
+        if reference in self._external:
+            return self._external[reference]
+        if self.yaml_path is None:
+            warnings.warn(
+                f'Unable to resolve reference {reference}: the path of the schema is '
+                'unknown.')
+            self._external[reference] = None
+        else:
+            path = referenced_schema_path(reference, self.yaml_path)
+            if path is None:
+                path = os.path.join(
+                    os.path.dirname(self.yaml_path), reference.split('#', 1)[0])
+            self.dependencies.add(os.path.abspath(path))
+            try:
+                self._external[reference] = resolve_reference(
+                    reference, self.yaml_path, self.plugin, self.yaml_backend,
+                    self.ir_cache)
+            except (OSError, ValueError) as exc:
+                warnings.warn(f'Unable to resolve reference {reference}: {exc}')
+                self._external[reference] = None
+        return self._external[reference]
+
+    def resolve_all(self) -> None:
+        '''
+        Resolve all references to sections of other schema files up front, see
+        `resolve`, in the order in which the classes are defined.
+        '''
+        for name in self.order:
+            section = self.symbols[name].section
+            references = [
+                sub_section.section for sub_section in section.sub_sections
+                if not isinstance(sub_section.section, Section)
+            ]
+            references.extend(section.base_sections)
+            references.extend(quantity.type for quantity in section.quantities)
+            for reference in references:
+                if _is_file_reference(reference):
+                    self.resolve(reference)
+
+    def proxies(self, name: str) -> Set[str]:
+        '''
+        Get the sections that a section references before they are defined.
+
+        Args:
+            name (str): The class name of the referencing section.
+
+        Returns:
+            Set[str]: The class names that need to be referenced through a
+            `SectionProxy`.
+        '''
+        return self._proxies.get(name, set())
+
+    def path(self, name: str) -> str:
+        '''
+        Get the location of a section definition in the schema.
+
+        Args:
+            name (str): The class name of the section.
+
+        Returns:
+            str: The location, like "Sample.sub_sections.layer" for an inline
+            definition.
+        '''
+        parts = []
+        symbol = self.symbols[name]
+        while symbol.parent is not None:
+            parts.append(f'sub_sections.{symbol.section.name}')
+            symbol = self.symbols[symbol.parent]
+        parts.append(symbol.name)
+        return '.'.join(reversed(parts))
+
+    def _collect(self, section_name: str, section: Section, collected: List[Symbol],
+                 taken: Set[str]) -> None:
+        '''
+        Collect a top level section and its inline sub sections, the latter first.
+
+        The inline sub sections are walked with an explicit stack instead of
+        recursively, so that schemas nested thousands of levels deep stay within the
+        recursion limit. The names are assigned in the order of the schema.
+        '''
+        stack = [(section_name, section, iter(section.sub_sections), [])]
+        while stack:
+            parent_name, parent, sub_sections, references = stack[-1]
+            for sub_section in sub_sections:
+                sub_section_def = sub_section.section
+                if not isinstance(sub_section_def, Section):
+                    references.append(_local_reference(sub_section_def))
+                    continue
+                class_name = self.class_name(sub_section.name)
+                if class_name in taken or class_name in self._reserved:
+                    sub_section_path = '.'.join(
+                        [section_name]
+                        + [f'sub_sections.{frame[1].name}' for frame in stack[1:]]
+                        + [f'sub_sections.{sub_section.name}'])
+                    unique_name = parent_name + class_name
+                    counter = 1
+                    while unique_name in taken or unique_name in self._reserved:
+                        counter += 1
+                        unique_name = f'{parent_name}{class_name}{counter}'
+                    warnings.warn(
+                        f'The class name {class_name} of {sub_section_path} is already '
+                        f'used, naming it {unique_name} instead.')
+                    class_name = unique_name
+                taken.add(class_name)
+                self._inline_names[(parent_name, sub_section.name)] = class_name
+                references.append(class_name)
+                stack.append((
+                    class_name, sub_section_def, iter(sub_section_def.sub_sections), []))
+                break
+            else:
+                stack.pop()
+                for quantity in parent.quantities:
+                    references.append(_local_reference(quantity.type))
+                collected.append(Symbol(
+                    name=parent_name,
+                    parent=stack[-1][0] if stack else None,
+                    section=parent,
+                    top_level=not stack,
+                    bases=[_local_reference(base) for base in parent.base_sections],
+                    references=references,
+                ))
+
+    def _inheritance_closure(self, name: str) -> None:
+        '''
+        Determine the sections that a section inherits from, directly or indirectly,
+        and those of its bases, by a depth first search with an explicit stack.
+        '''
+        if name in self._ancestors:
+            return
+        path = [name]
+        on_path = {name}
+        bases = [iter(self.symbols[name].bases)]
+        while bases:
+            for base in bases[-1]:
+                if base in self._ancestors:
+                    continue
+                if base in on_path:
+                    cycle = ' -> '.join(path[path.index(base):] + [base])
+                    raise ValueError(f'Cyclic inheritance between the sections: {cycle}.')
+                path.append(base)
+                on_path.add(base)
+                bases.append(iter(self.symbols[base].bases))
+                break
+            else:
+                bases.pop()
+                current = path.pop()
+                on_path.discard(current)
+                ancestors = {current}
+                for base in self.symbols[current].bases:
+                    ancestors |= self._ancestors[base]
+                self._ancestors[current] = ancestors
+
+    def _sort(self) -> List[str]:
+        '''
+        Sort the sections topologically by a depth first search in the schema order.
+
+        The search uses an explicit stack, so that long chains of references, like
+        deeply nested inline sub sections, stay within the recursion limit.
+        '''
+        order = []
+        done = set()
+        visiting = set()
+
+        def dependencies(name: str) -> Iterator[str]:
+            for base in self.symbols[name].bases:
+                if base not in done:
+                    yield base
+            for reference in self.symbols[name].references:
+                if reference in done:
+                    continue
+                if not visiting.isdisjoint(self._ancestors[reference]):
+                    # The reference depends on a section that is still being visited
+                    self._proxies.setdefault(name, set()).add(reference)
+                else:
+                    yield reference
+
+        for root in self.symbols:
+            if root in done:
+                continue
+            visiting.add(root)
+            stack = [(root, dependencies(root))]
+            while stack:
+                name, pending = stack[-1]
+                dependency = next(pending, None)
+                if dependency is None:
+                    stack.pop()
+                    visiting.discard(name)
+                    done.add(name)
+                    order.append(name)
+                else:
+                    visiting.add(dependency)
+                    stack.append((dependency, dependencies(dependency)))
+        return order
+
+
+def _used_names(code: str) -> set:
+    '''
+    Help function for finding all names used in a piece of python code.
+
+    Names in string annotations, like `'EntryArchive'`, are included.
+
+    Args:
+        code (str): The python code.
+
+    Returns:
+        set: The used names or `None` if the code is not valid python.
+    '''
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    names = set()
+    for node in ast.walk(tree):
+        annotation = None
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            annotation = node.annotation
+        elif isinstance(node, ast.FunctionDef):
+            annotation = node.returns
+        if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+            names |= _used_names(annotation.value) or set()
+    return names
+
+
+# The standard library modules, used for grouping the imports of generated modules
+STDLIB_MODULES = getattr(sys, 'stdlib_module_names', frozenset((
+    'abc', 'collections', 'dataclasses', 'datetime', 'enum', 'functools', 'itertools',
+    'json', 'math', 'os', 're', 'sys', 'typing',
+)))
+
+
+def _bound_name(module: str, name: Optional[str], alias: Optional[str]) -> str:
+    '''
+    Help function for getting the name an import statement binds.
+    '''
+    return alias or name or module.split('.')[0]
+
+
+class ImportRegistry:
+    '''
+    Registry collecting the imports of a generated module.
+
+    Imports are deduplicated while they are collected and rendered as one sorted block:
+    standard library, third party and relative imports, separated by empty lines and
+    each sorted by module, with one `from` statement per module listing the sorted
+    names. Conditional imports, like those under `if TYPE_CHECKING:`, follow in a block
+    per condition.
+    '''
+
+    def __init__(self):
+        # Keyed by condition, module and name with the alias as value, where the name is
+        # `None` for plain `import module` statements
+        self._imports: Dict[tuple, Optional[str]] = {}
+
+    def add(self, module: str, name: Optional[str] = None, alias: Optional[str] = None,
+            condition: Optional[str] = None) -> None:
+        '''
+        Add an import.
+
+        Args:
+            module (str): The module, starting with "." for relative imports.
+            name (Optional[str], optional): The name imported from the module or `None`
+            for importing the module itself. Defaults to None.
+            alias (Optional[str], optional): The name the import is bound to.
+            Defaults to None.
+            condition (Optional[str], optional): The condition of an `if` statement
+            guarding the import, like "TYPE_CHECKING". Defaults to None.
+        '''
+        self._imports.setdefault((condition, module, name), alias)
+
+    def append(self, item: tuple) -> None:
+        '''
+        Add a `(module, name)` import, so that the registry can be used like a list.
+
+        Args:
+            item (tuple): The module and the name imported from it.
+        '''
+        self.add(*item)
+
+    def add_code(self, code: str) -> None:
+        '''
+        Add all imports of a piece of python code.
+
+        Args:
+            code (str): The import statements. `if` statements containing imports, like
+            `if TYPE_CHECKING:`, are supported.
+        '''
+        self._add_statements(ast.parse(code).body, None)
+
+    def _add_statements(self, statements: list, condition: Optional[str]) -> None:
+        for statement in statements:
+            if isinstance(statement, ast.If):
+                self._add_statements(statement.body, ast.unparse(statement.test))
+            elif isinstance(statement, ast.Import):
+                for alias in statement.names:
+                    self.add(alias.name, None, alias.asname, condition)
+            elif isinstance(statement, ast.ImportFrom):
+                module = '.' * statement.level + (statement.module or '')
+                for alias in statement.names:
+                    self.add(module, alias.name, alias.asname, condition)
+
+    def update(self, other: 'ImportRegistry') -> None:
+        '''
+        Add all imports of another registry, keeping the alias of imports already added.
+
+        Args:
+            other (ImportRegistry): The registry, e.g. of a part of the module that was
+            generated separately.
+        '''
+        for key, alias in other._imports.items():  # pylint: disable=protected-access
+            self._imports.setdefault(key, alias)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self._imports)
+
+    def __len__(self) -> int:
+        return len(self._imports)
+
+    def render(self, used: Optional[set] = None) -> str:
+        '''
+        Render the import block.
+
+        Args:
+            used (Optional[set], optional): The names used in the module. Imports of
+            other names are left out. Defaults to None, keeping all imports.
+
+        Returns:
+            str: The import statements.
+        '''
+        if used is not None:
+            used = set(used)
+            # The names in the conditions of used conditional imports, like
+            # `TYPE_CHECKING`, are used as well
+            for (condition, module, name), alias in self._imports.items():
+                if condition is not None and _bound_name(module, name, alias) in used:
+                    used |= _used_names(condition) or set()
+        kept = {}
+        for (condition, module, name), alias in self._imports.items():
+            if used is None or _bound_name(module, name, alias) in used:
+                kept.setdefault(condition, []).append((module, name, alias))
+        code = self._render_group(kept.pop(None, []), '')
+        for condition in sorted(kept):
+            code += f'if {condition}:\n' + self._render_group(kept[condition], '    ')
+        return code
+
+    @staticmethod
+    def _render_group(imports: List[tuple], indent: str) -> str:
+        '''
+        Render the sorted import statements of the imports with the same condition.
+        '''
+        def section(module: str) -> int:
+            if module.startswith('.'):
+                return 2
+            return 0 if module.split('.')[0] in STDLIB_MODULES else 1
+
+        plain = sorted({
+            (section(module), module, alias) for module, name, alias in imports
+            if name is None
+        }, key=lambda item: (item[0], item[1], item[2] or ''))
+        from_names: Dict[str, list] = {}
+        for module, name, alias in imports:
+            if name is not None:
+                from_names.setdefault(module, []).append(
+                    name + (f' as {alias}' if alias else ''))
+        groups = []
+        for group in range(3):
+            code = ''
+            for _, module, alias in plain:
+                if section(module) == group:
+                    code += f'{indent}import {module}'
+                    code += f' as {alias}\n' if alias else '\n'
+            for module in sorted(from_names):
+                if section(module) != group:
+                    continue
+                code += f'{indent}from {module} import (\n'
+                code += ''.join(
+                    f'{indent}    {name},\n' for name in sorted(set(from_names[module])))
+                code += f'{indent})\n'
+            if code:
+                groups.append(code)
+        return '\n'.join(groups)
+
+
+def _format_package(content: dict, package_name: Any) -> str:
+    '''
+    Help function for rendering the definition of the metainfo package.
+    '''
+    return content['package_name'] % _python_literal(str(package_name))
+
+
+def _format_normalizer(content: dict, section_name: str) -> str:
+    '''
+    Help function for rendering the empty normalizer of a section.
+    '''
+    return '\n' + ''.join(
+        f'    {line}\n' if line else '\n'
+        for line in (content['normalizer'] % section_name).rstrip('\n').split('\n')
+    )
+
+
+def iter_module_body(content: dict, package_name: str,
+                     sections: Dict[str, Union[Section, dict]],
+                     imports: ImportRegistry, normalizers: bool = False,
+                     profiler: Optional[Profiler] = None,
+                     symbols: Optional[SymbolTable] = None) -> Iterator[str]:
+    '''
+    Generate the code of a module, without header and imports, from the sections.
+
+    The classes are defined in the order of the `SymbolTable` of the sections, so that
+    sections are defined before they are used.
+
+    Args:
+        content (dict): The standard file content.
+        package_name (str): The name of the metainfo package.
+        sections (Dict[str, Union[Section, dict]]): The sections or their YAML content
+        keyed by the section names.
+        imports (ImportRegistry): The registry collecting the imports needed by the
+        sections.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        profiler (Optional[Profiler], optional): A profiler measuring each section.
+        Defaults to None.
+        symbols (Optional[SymbolTable], optional): The symbol table of the sections. If
+        not given, it is created without resolving references to other files.
+        Defaults to None.
+
+    Yields:
+        str: The code fragments of the module body.
+
+    Raises:
+        ValueError: If the sections inherit from each other in a cycle.
+    '''
+    if symbols is None:
+        with profile_phase(profiler, 'symbol table'):
+            symbols = SymbolTable(sections)
+    yield _format_package(content, package_name)
+    yield '\n\n'
+    yield from _iter_classes(
+        content, symbols.order, imports, normalizers, profiler, symbols)
+    yield content['footer']
+
+
+def _iter_classes(content: dict, names: Iterable[str], imports: list, normalizers: bool,
+                  profiler: Optional[Profiler], symbols: SymbolTable) -> Iterator[str]:
+    '''
+    Help function generating the classes of the given sections of a symbol table.
+    '''
+    for section_name in names:
+        symbol = symbols.symbols[section_name]
+        with profile_phase(profiler, section_name, kind='section'):
+            yield from iter_section(
+                section_name=section_name,
+                section_dict=symbol.section,
+                imports=imports,
+                symbols=symbols,
+            )
+            if normalizers and symbol.top_level:
+                yield _format_normalizer(content, section_name)
+            yield '\n\n'
+
+
+def _render_import_block(content: dict, body: str, imports: ImportRegistry) -> str:
+    '''
+    Help function for rendering the import statements of a module.
+
+    Only the standard and collected imports that are used in the module body are kept.
+
+    Args:
+        content (dict): The standard file content.
+        body (str): The code of the module body.
+        imports (ImportRegistry): The imports collected while generating the classes.
+
+    Returns:
+        str: The import statements.
+    '''
+    imports.add_code(content['imports'])
+    return imports.render(_used_names(body))
+
+
+def format_code(code: str, profiler: Optional[Profiler] = None) -> str:
+    '''
+    Help function for cleaning up the code using autopep8.
+    '''
+    import autopep8  # pylint: disable=import-outside-toplevel
+    with profile_phase(profiler, 'autopep8'):
+        return autopep8.fix_code(
+            code, options={'aggressive': 2, 'max_line_length': MAX_LINE_LENGTH})
+
+
+def iter_module(content: dict, package_name: str,
+                sections: Dict[str, Union[Section, dict]],
+                normalizers: bool = False,
+                profiler: Optional[Profiler] = None,
+                symbols: Optional[SymbolTable] = None) -> Iterator[str]:
+    '''
+    Generate the code of a complete module from the sections.
+
+    The module body is generated into a list of fragments first, since the import
+    statements at the top depend on the names used in the body.
+
+    Args:
+        content (dict): The standard file content.
+        package_name (str): The name of the metainfo package.
+        sections (Dict[str, Union[Section, dict]]): The sections or their YAML content
+        keyed by the section names.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        profiler (Optional[Profiler], optional): A profiler measuring the sections and the
+        import rendering. Defaults to None.
+        symbols (Optional[SymbolTable], optional): The symbol table of the sections, see
+        `iter_module_body`. Defaults to None.
+
+    Yields:
+        str: The code fragments of the module.
+    '''
+    imports = ImportRegistry()
+    with profile_phase(profiler, 'sections'):
+        body = list(iter_module_body(
+            content, package_name, sections, imports, normalizers, profiler, symbols))
+    with profile_phase(profiler, 'imports'):
+        import_code = _render_import_block(content, ''.join(body), imports)
+    yield content['header']
+    yield '\n'
+    yield import_code
+    yield '\n'
+    yield from body
+
+
+def iter_streamed_classes(yaml_path: str, content: dict, reserved: Set[str],
+                          imports: ImportRegistry, normalizers: bool = False,
+                          plugin: bool = False, yaml_backend: str = 'auto',
+                          ir_cache: bool = True, profiler: Optional[Profiler] = None
+                          ) -> Iterator[Tuple[SymbolTable, str]]:
+    '''
+    Generate the classes of a schema one top level section at a time.
+
+    The sections are read with `streaming.iter_sections` and their classes are generated
+    as soon as they are complete, in the order of the schema. A section inheriting from
+    a section further down in the schema is kept until its base sections are defined.
+    References to sections that are defined later are made through a `SectionProxy`.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        content (dict): The standard file content.
+        reserved (Set[str]): The names of the top level sections, see
+        `streaming.read_outline`, to which the names of the inline sub sections are
+        added.
+        imports (ImportRegistry): The registry collecting the imports needed by the
+        sections.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        plugin (bool, optional): Whether the schemas are converted to NOMAD plugins, see
+        `resolve_reference`. Defaults to False.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use the on-disk cache of referenced
+        schemas, see `load_package`. Defaults to True.
+        profiler (Optional[Profiler], optional): A profiler measuring each section.
+        Defaults to None.
+
+    Yields:
+        Tuple[SymbolTable, str]: The symbol table of a top level section and its inline
+        sub sections, and the code of their classes.
+
+    Raises:
+        ValueError: If the schema has no "definitions" key or the sections inherit from
+        each other in a cycle.
+    '''
+    from . import streaming  # pylint: disable=import-outside-toplevel
+    defined: Set[str] = set()
+    # The symbol tables with the base sections they are waiting for, by base section
+    waiting: Dict[str, List[Tuple[SymbolTable, Set[str]]]] = {}
+
+    def release(ready: List[SymbolTable]) -> Iterator[Tuple[SymbolTable, str]]:
+        while ready:
+            symbols = ready.pop(0)
+            code = ''.join(_iter_classes(
+                content, symbols.order, imports, normalizers, profiler, symbols))
+            defined.update(symbols.symbols)
+            yield symbols, code
+            for name in symbols.symbols:
+                for waiter, missing in waiting.pop(name, ()):
+                    missing.discard(name)
+                    if not missing:
+                        ready.append(waiter)
+
+    for section_name, section in streaming.iter_sections(yaml_path, yaml_backend):
+        symbols = SymbolTable(
+            {section_name: section}, yaml_path, plugin, yaml_backend, ir_cache, reserved,
+            defined)
+        reserved.update(symbols.symbols)
+        for base in symbols.undefined_bases:
+            waiting.setdefault(base, []).append((symbols, symbols.undefined_bases))
+        if not symbols.undefined_bases:
+            yield from release([symbols])
+    # Base sections that are not part of the schema are left as they are, like in
+    # `SymbolTable`
+    for name in [name for name in waiting if name not in reserved]:
+        ready = []
+        for waiter, missing in waiting.pop(name):
+            missing.discard(name)
+            if not missing:
+                ready.append(waiter)
+        yield from release(ready)
+    if waiting:
+        cycle = ', '.join(sorted({
+            name for waiters in waiting.values() for symbols, _ in waiters
+            for name, symbol in symbols.symbols.items() if symbol.top_level
+        }))
+        raise ValueError(f'Cyclic inheritance between the sections: {cycle}.')
+
+
+def write_streamed_module(yaml_path: str, output_file: str, content: dict,
+                          package_name: str, reserved: Set[str],
+                          normalizers: bool = False, formatter: str = 'autopep8',
+                          plugin: bool = False, yaml_backend: str = 'auto',
+                          ir_cache: bool = True, profiler: Optional[Profiler] = None,
+                          test_data_dir: Optional[str] = None, check: bool = False
+                          ) -> Tuple[Set[str], List[str]]:
+    '''
+    Write the module of a schema that is read and converted one section at a time.
+
+    The classes are written to a temporary file next to the module as soon as they are
+    generated, see `iter_streamed_classes`, and copied into the module below the import
+    statements once the whole schema is read. With the "autopep8" formatter, each top
+    level section is formatted on its own. The memory needed is therefore bounded by the
+    largest section instead of the whole schema.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        output_file (str): The path of the module.
+        content (dict): The standard file content.
+        package_name (str): The name of the metainfo package.
+        reserved (Set[str]): The names of the top level sections of the schema, see
+        `streaming.read_outline`.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        formatter (str, optional): The formatter applied to the generated code, either
+        "autopep8" or "none". Defaults to 'autopep8'.
+        plugin (bool, optional): Whether the schemas are converted to NOMAD plugins, see
+        `resolve_reference`. Defaults to False.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use the on-disk cache of referenced
+        schemas, see `load_package`. Defaults to True.
+        profiler (Optional[Profiler], optional): A profiler measuring each section.
+        Defaults to None.
+        test_data_dir (Optional[str], optional): The folder of the plugin to which test
+        data of each top level section is written, see `yaml2py`. Defaults to None.
+        check (bool, optional): Whether to check that the code of each top level section
+        is valid python before the module is written, see `bytecode.check_source`. The
+        line numbers of errors are relative to the code of the section.
+        Defaults to False.
+
+    Returns:
+        Tuple[Set[str], List[str]]: The paths of the schemas referenced by the schema and
+        the paths of the written test data files.
+
+    Raises:
+        ValueError: If the schema has no "definitions" key, the sections inherit from
+        each other in a cycle or, with `check`, the generated code is not valid python.
+    '''
+    # pylint: disable=import-outside-toplevel
+    import shutil
+    import tempfile
+    imports = ImportRegistry()
+    package_code = _format_package(content, package_name) + '\n\n'
+    used = _used_names(package_code + content['footer'])
+    dependencies: Set[str] = set()
+    test_files: List[str] = []
+    fd, body_path = tempfile.mkstemp(
+        dir=os.path.dirname(output_file) or None, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf8') as body:
+            for symbols, code in iter_streamed_classes(
+                    yaml_path, content, reserved, imports, normalizers, plugin,
+                    yaml_backend, ir_cache, profiler):
+                if formatter == 'autopep8':
+                    code = format_code(code.rstrip('\n') + '\n', profiler) + '\n\n'
+                if check:
+                    _check_source(code, output_file)
+                code_used = _used_names(code)
+                # Without the used names of invalid code, all imports are kept
+                if used is not None and code_used is not None:
+                    used |= code_used
+                else:
+                    used = None
+                body.write(code)
+                dependencies |= symbols.dependencies
+                if test_data_dir is not None:
+                    files = _test_data_files(symbols, [
+                        name for name, symbol in symbols.symbols.items()
+                        if symbol.top_level
+                    ], package_name, yaml_backend)
+                    scaffold.write_files(test_data_dir, files)
+                    test_files.extend(
+                        os.path.join(test_data_dir, *file.split('/')) for file in files)
+        with profile_phase(profiler, 'imports'):
+            imports.add_code(content['imports'])
+            import_code = imports.render(used)
+        with profile_phase(profiler, 'write'), \
+                open(body_path, 'r', encoding='utf8') as body, \
+                open(output_file, 'w', encoding='utf8') as file:
+            file.writelines((content['header'], '\n', import_code, '\n', package_code))
+            shutil.copyfileobj(body, file)
+            file.write(content['footer'])
+    finally:
+        os.remove(body_path)
+    return dependencies, test_files
+
+
+def module_groups(symbols: SymbolTable) -> Dict[str, List[str]]:
+    '''
+    Group the sections of a schema into the modules of a split package.
+
+    Every top level section is placed in its own module together with its inline sub
+    section definitions. Top level sections that depend on each other in a cycle,
+    through base sections, sub sections or references, share a module, so that the
+    modules import each other without cycles.
+
+    Args:
+        symbols (SymbolTable): The symbol table of the schema.
+
+    Returns:
+        Dict[str, List[str]]: The class names of the sections in the order of
+        `SymbolTable.order`, keyed by the module names, like "_sample". Every module
+        comes after the modules it imports from.
+    '''
+    owners = {}
+    # Parents are collected after their inline sub sections
+    for name, symbol in reversed(symbols.symbols.items()):
+        owners[name] = name if symbol.parent is None else owners[symbol.parent]
+    dependencies: Dict[str, Set[str]] = {
+        name: set() for name, symbol in symbols.symbols.items() if symbol.top_level}
+    for name, symbol in symbols.symbols.items():
+        for reference in symbol.bases + symbol.references:
+            if owners[reference] != owners[name]:
+                dependencies[owners[name]].add(owners[reference])
+    positions = {name: position for position, name in enumerate(dependencies)}
+    # Tarjan's algorithm yields the strongly connected components dependencies first,
+    # with an explicit stack instead of recursion for long chains of dependencies
+    indices: Dict[str, int] = {}
+    low_links: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    clusters: List[List[str]] = []
+
+    def connect(name: str) -> tuple:
+        indices[name] = low_links[name] = len(indices)
+        stack.append(name)
+        on_stack.add(name)
+        return name, iter(sorted(dependencies[name], key=positions.get))
+
+    for root in dependencies:
+        if root in indices:
+            continue
+        work = [connect(root)]
+        while work:
+            name, pending = work[-1]
+            for dependency in pending:
+                if dependency not in indices:
+                    work.append(connect(dependency))
+                    break
+                if dependency in on_stack:
+                    low_links[name] = min(low_links[name], indices[dependency])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[name])
+                if low_links[name] == indices[name]:
+                    cluster = [stack.pop()]
+                    while cluster[-1] != name:
+                        cluster.append(stack.pop())
+                    on_stack.difference_update(cluster)
+                    clusters.append(cluster[::-1])
+    cluster_modules = {}
+    taken = {'__init__'}
+    for cluster in clusters:
+        first = min(cluster, key=positions.get)
+        module = '_' + _to_snake_case(first)
+        counter = 1
+        while module in taken:
+            counter += 1
+            module = f'_{_to_snake_case(first)}_{counter}'
+        taken.add(module)
+        cluster_modules.update((name, module) for name in cluster)
+    groups: Dict[str, List[str]] = {
+        cluster_modules[cluster[0]]: [] for cluster in clusters}
+    for name in symbols.order:
+        groups[cluster_modules[owners[name]]].append(name)
+    return groups
+
+
+def iter_split_package(content: dict, package_name: str,
+                       sections: Dict[str, Union[Section, dict]],
+                       normalizers: bool = False,
+                       profiler: Optional[Profiler] = None,
+                       symbols: Optional[SymbolTable] = None) -> Iterator[tuple]:
+    '''
+    Generate the modules of a package defining the sections, imported on first access.
+
+    The sections are split into modules as described in `module_groups`. The
+    `__init__.py` of the package defines `m_package` and imports the module of a section
+    when the section is accessed the first time through the module level `__getattr__`
+    of the package, so importing the package does not define any section. The package is
+    initialized once, by the `__init__.py`. The modules register their sections in the
+    shared `m_package` and import the sections of other modules they depend on.
+
+    Args:
+        content (dict): The standard file content.
+        package_name (str): The name of the metainfo package.
+        sections (Dict[str, Union[Section, dict]]): The sections or their YAML content
+        keyed by the section names.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        profiler (Optional[Profiler], optional): A profiler measuring the sections and the
+        import rendering. Defaults to None.
+        symbols (Optional[SymbolTable], optional): The symbol table of the sections, see
+        `iter_module_body`. Defaults to None.
+
+    Yields:
+        tuple: The file name, like "__init__.py", and the code of each module.
+    '''
+    if symbols is None:
+        with profile_phase(profiler, 'symbol table'):
+            symbols = SymbolTable(sections)
+    groups = module_groups(symbols)
+    modules = {name: module for module, names in groups.items() for name in names}
+    for module, names in groups.items():
+        collected: List[tuple] = []
+        with profile_phase(profiler, 'sections'):
+            body = ['\n\n']
+            body.extend(_iter_classes(
+                content, names, collected, normalizers, profiler, symbols))
+        imports = ImportRegistry()
+        imports.add('.', 'm_package')
+        for import_module, name in collected:
+            # Sibling modules of other schemas are siblings of the package
+            if import_module.startswith('.'):
+                import_module = '.' + import_module
+            imports.add(import_module, name)
+        for name in names:
+            symbol = symbols.symbols[name]
+            for dependency in symbol.bases + symbol.references:
+                if modules[dependency] != module:
+                    imports.add(f'.{modules[dependency]}', dependency)
+        with profile_phase(profiler, 'imports'):
+            imports.add_code(content['imports'])
+            used = _used_names(''.join(body))
+            # NOMAD registers the sections in the `m_package` of their module
+            import_code = imports.render(
+                used | {'m_package'} if used is not None else None)
+        # Without the empty lines after the last class, since the package is initialized
+        # by the `__init__.py`
+        yield f'{module}.py', ''.join(
+            [content['header'], '\n', import_code, *body]).rstrip('\n') + '\n'
+    imports = ImportRegistry()
+    imports.add_code(content['lazy_imports'])
+    for name, module in modules.items():
+        imports.add(f'.{module}', name, condition='TYPE_CHECKING')
+    body = ''.join([
+        _format_package(content, package_name),
+        '\n',
+        content['lazy_loader'] % _python_literal(
+            {name: f'.{module}' for name, module in modules.items()}),
+        '\n\n',
+        content['footer'],
+    ])
+    import_code = imports.render(_used_names(body) | set(modules))
+    yield '__init__.py', ''.join([content['header'], '\n', import_code, '\n', body])
+
+
+def create_plugin(location: str, package_name: str, split: bool = False) -> str:
+    '''
+    Function for creating or updating a nomad plugin package at a given location.
+
+    The files of the plugin are rendered from the templates in
+    `resources/standard_plugin_content` and written in a single pass. If the plugin
+    already exists, only the missing files are written, so that changes made to files
+    like `pyproject.toml` or `README.md` are kept. The `__init__.py` of the python
+    package, which depends on `split`, is always updated.
 
     Args:
         location (str): The location where the nomad plugin folder will be created.
         package_name (str): The name of the package.
+        split (bool, optional): Whether the schema is written as split package, see
+        `iter_split_package`, into the python package of the plugin. Its `__init__.py`
+        is then left to the schema. Defaults to False.
 
     Returns:
-        str: The location with filename where the schema should be placed.
+        str: The location with filename where the schema should be placed, for split
+        packages the folder of the python package.
     '''
     snake_package_name = _to_snake_case(package_name)
     plugin_loc = os.path.join(location, snake_package_name + '_plugin')
-    shutil.copytree(
-        src=os.path.join(resource_path, 'standard_plugin_content'),
-        dst=plugin_loc,
-    )
-    os.rename(
-        src=os.path.join(plugin_loc, 'src', 'plugin_name'),
-        dst=os.path.join(plugin_loc, 'src', snake_package_name),
-    )
-    update_mapping_file(
-        path=os.path.join(plugin_loc, 'src', snake_package_name, 'nomad_plugin.yaml'),
-        nested_keys=(['name'],),
-        values=(package_name,)
-    )
-    update_mapping_file(
-        path=os.path.join(plugin_loc, 'pyproject.toml'),
-        nested_keys=(['project','name'],),
-        values=(snake_package_name,)
-    )
-    update_mapping_file(
-        path=os.path.join(plugin_loc, 'nomad.yaml'),
-        nested_keys=(['plugins','options','schemas/example','python_package'],),
-        values=(snake_package_name,)
+    files = scaffold.render_templates(
+        directory=os.path.join(resource_path, 'standard_plugin_content'),
+        values={
+            # JSON strings are valid YAML and TOML strings
+            'name': json.dumps(package_name, ensure_ascii=False),
+            'module': snake_package_name,
+        },
+        renames={'plugin_name': snake_package_name},
     )
+    init_file = f'src/{snake_package_name}/__init__.py'
+    init_code = files.pop(init_file)
+    scaffold.write_files(plugin_loc, files, overwrite=False)
+    if split:
+        return os.path.join(plugin_loc, 'src', snake_package_name)
+    scaffold.write_files(plugin_loc, {init_file: init_code})
     return os.path.join(plugin_loc, 'src', snake_package_name, 'schema.py')
 
 
+def convert_text(yaml_text: str, normalizers: bool = False, formatter: str = 'autopep8',
+                 yaml_backend: str = 'auto', package_name: str = 'schema',
+                 profiler: Optional[Profiler] = None) -> str:
+    '''
+    Convert the text of a NOMAD metainfo YAML schema into python code in memory.
+
+    Unlike `yaml2py`, no files are read or written, so references to sections of other
+    schema files can not be resolved and are reported as warnings.
+
+    Args:
+        yaml_text (str): The content of the YAML schema.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        formatter (str, optional): The formatter applied to the generated code, see
+        `yaml2py`. Defaults to 'autopep8'.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+        package_name (str, optional): The name of the metainfo package if the schema
+        does not define one. Defaults to 'schema'.
+        profiler (Optional[Profiler], optional): A profiler recording the phases of the
+        conversion, see `yaml2py`. Defaults to None.
+
+    Returns:
+        str: The python code of the module.
+
+    Raises:
+        ValueError: If the YAML text is not a valid NOMAD metainfo schema or the
+        formatter is unknown.
+    '''
+    if formatter not in ('autopep8', 'none'):
+        raise ValueError(f'Unknown formatter: {formatter}')
+    with profile_phase(profiler, 'load_package'):
+        yaml_dict = load_yaml(yaml_text, yaml_backend)
+        definitions = (
+            yaml_dict.get('definitions') if isinstance(yaml_dict, dict) else None)
+        if not isinstance(definitions, dict):
+            raise ValueError('No "definitions" key found in YAML text.')
+        package = Package.from_yaml(definitions, package_name)
+        content = load_standard_content(yaml_backend)
+    with profile_phase(profiler, 'generate'):
+        code = ''.join(iter_module(
+            content, package.name, package.sections, normalizers, profiler))
+    if formatter == 'autopep8':
+        with profile_phase(profiler, 'format'):
+            code = format_code(code, profiler)
+    return code
+
+
+def _test_data_files(symbols: SymbolTable, sections: Iterable[str], package_name: str,
+                     yaml_backend: str = 'auto') -> Dict[str, str]:
+    '''
+    Help function generating an archive entry of each of the given sections as test
+    data of a plugin, keyed by the path in the plugin.
+    '''
+    # pylint: disable=import-outside-toplevel
+    import yaml
+    from .archives import archive_dumper, iter_entries
+    return {
+        f'tests/data/test_{_to_snake_case(section)}.archive.yaml': yaml.dump(
+            next(iter_entries(
+                symbols, section, 1, f'{_to_snake_case(package_name)}.{section}')),
+            Dumper=archive_dumper(yaml_backend),
+            sort_keys=False,
+        )
+        for section in sections
+    }
+
+
+def _check_source(code: str, path: str) -> None:
+    '''
+    Help function for checking generated code before writing it, see
+    `bytecode.check_source`.
+    '''
+    from .bytecode import check_source  # pylint: disable=import-outside-toplevel
+    check_source(code, path)
+
+
+def _compile_files(paths: List[str], optimize: Iterable[int],
+                   invalidation_mode: str) -> None:
+    '''
+    Help function for byte compiling the generated modules, see `bytecode.compile_files`.
+    '''
+    from .bytecode import compile_files  # pylint: disable=import-outside-toplevel
+    compile_files(paths, optimize, invalidation_mode)
+
+
 def yaml2py(yaml_path: str, output_dir: str = '', normalizers: bool = False,
-            plugin: bool = False) -> None:
+            plugin: bool = False, cache_dir: Optional[str] = None,
+            formatter: str = 'autopep8', yaml_backend: str = 'auto',
+            profiler: Optional[Profiler] = None, ir_cache: bool = True,
+            split: bool = False, bytecode: Optional[Iterable[int]] = None,
+            invalidation_mode: str = 'checked-hash', stream: bool = False,
+            jobs: int = 1) -> List[str]:
     '''
     Function for parsing a NOMAD metainfo YAML schema into a python file of class definitions.
 
@@ -331,82 +1949,205 @@ def yaml2py(yaml_path: str, output_dir: str = '', normalizers: bool = False,
         Defaults to False.
         plugin (bool, optional): Whether or not to create the files needed for a NOMAD plugin.
         Defaults to False.
+        cache_dir (Optional[str], optional): The directory of the incremental build
+        cache. If given, the conversion is skipped when the schema, the converter and the
+        options are unchanged since the cached run. Defaults to None.
+        formatter (str, optional): The formatter applied to the generated code, either
+        "autopep8" or "none". The generated code is PEP 8
+        compliant without formatting, except for lines with long string literals.
+        Defaults to 'autopep8'.
+        yaml_backend (str, optional): The YAML backend used for reading and writing YAML
+        files, see `yaml_loader`. Defaults to 'auto'.
+        profiler (Optional[Profiler], optional): A profiler recording the wall time and
+        peak memory of the phases of the conversion and of each section.
+        Defaults to None.
+        ir_cache (bool, optional): Whether to cache the schema and the schemas it
+        references in the per user cache directory, see `load_package`.
+        Defaults to True.
+        split (bool, optional): Whether to write a package with one module per top level
+        section, or group of sections that depend on each other, which are imported on
+        first access, see `iter_split_package`. The package is written to a folder
+        named like the module, or to the python package of the plugin.
+        Defaults to False.
+        bytecode (Optional[Iterable[int]], optional): The optimization levels, like
+        `[0]`, to byte compile the generated modules for, see `bytecode.compile_files`.
+        With `plugin`, all modules of the python package of the plugin are compiled. The
+        generated code is checked before it is written, so that invalid code is neither
+        written nor cached. Defaults to None, not compiling.
+        invalidation_mode (str, optional): The invalidation mode of the compiled files,
+        see `bytecode.compile_files`. Defaults to 'checked-hash'.
+        stream (bool, optional): Whether to read and convert the schema one top level
+        section at a time, bounding the memory by the largest section instead of the
+        whole schema, see `write_streamed_module`. The parsed schema is not cached and
+        the test data of plugins only covers the quantities and sub sections of the
+        section itself. Not supported with `split`.
+        Defaults to False.
+        jobs (int, optional): The number of worker processes rendering and formatting the
+        sections of the module, see `parallel.render_module`. Not used with `split` or
+        `stream`. Defaults to 1.
+
+    Returns:
+        List[str]: The sorted paths of the schemas referenced by the schema, whose
+        changes affect the generated code.
 
     Raises:
-        ValueError: If the YAML file is not a valid NOMAD metainfo schema.
+        ValueError: If the YAML file is not a valid NOMAD metainfo schema, the
+        formatter is unknown, `stream` is combined with `split` or the generated code
+        is not valid python.
     '''
-    # Read the YAML file into dict and get the definitions key
-    try:
-        yaml_dict = read_yaml(yaml_path).get('definitions')
-    except KeyError as exc:
-        raise ValueError('No "definitions" key found in YAML file.') from exc
-    # Get the standard contents from the 'standard_file_content.yaml' file
-    content = read_yaml(os.path.join(
-        resource_path, 'standard_file_content.yaml'))
-    # Get the package name, defaults to YAML file name (without
-    # .schema.archive.yaml)
-    file_name = os.path.basename(yaml_path).split("/")[-1].split('.')[0]
-    package_name = yaml_dict.get('name', file_name)
+    if formatter not in ('autopep8', 'none'):
+        raise ValueError(f'Unknown formatter: {formatter}')
+    if stream and split:
+        raise ValueError('A schema can not be streamed into a split package.')
+    standard_content_path = os.path.join(resource_path, 'standard_file_content.yaml')
+    if cache_dir is not None:
+        with profile_phase(profiler, 'cache lookup'):
+            key = cache.cache_key(
+                yaml_path=yaml_path,
+                standard_content_path=standard_content_path,
+                # Schemas with the same content still generate different modules
+                options={
+                    'module_name': module_name(yaml_path), 'normalizers': normalizers,
+                    'plugin': plugin, 'formatter': formatter, 'split': split,
+                    'stream': stream,
+                },
+            )
+            restored = []
+            cached_dependencies = []
+            if cache.restore(
+                    cache_dir, key, output_dir, plugin, restored, cached_dependencies):
+                if bytecode is not None:
+                    with profile_phase(profiler, 'compile'):
+                        _compile_files(restored, bytecode, invalidation_mode)
+                return sorted(cached_dependencies)
+    written_files = []
+    # The package name defaults to the YAML file name (without .schema.archive.yaml)
+    file_name = module_name(yaml_path)
+    if stream:
+        from . import streaming  # pylint: disable=import-outside-toplevel
+        with profile_phase(profiler, 'outline'):
+            package_name, section_names = streaming.read_outline(yaml_path, yaml_backend)
+            if package_name is None:
+                package_name = file_name
+            content = load_standard_content(yaml_backend)
+    else:
+        # Read the definitions of the YAML file, shared with other conversions in this
+        # process
+        with profile_phase(profiler, 'load_package'):
+            package = load_package(yaml_path, yaml_backend, ir_cache)
+            # Get the standard contents from the 'standard_file_content.yaml' file
+            content = load_standard_content(yaml_backend)
+        package_name = package.name
     if plugin:
-        output_file = create_plugin(output_dir, package_name)
+        with profile_phase(profiler, 'create_plugin'):
+            output_file = create_plugin(output_dir, package_name, split)
+    elif split:
+        output_file = os.path.join(output_dir, file_name)
     else:
         output_file = os.path.join(output_dir, f'{file_name}.py')
-    # Create output file with context manager
-    with open(output_file, 'w', encoding="utf8") as file:
-        # Write the file content to string variable `code`
-        code = content['imports'] + '\n'
-        code += content['package_name'] % package_name + '\n'
-        sections = yaml_dict.get('sections', {})
-        for section in sections:
-            section_dict = sections[section]
-            code += parse_section(
-                section_name=section,
-                section_dict=section_dict,
-            ) + '\n'
-            if normalizers:
-                code += (
-                    '    ' + content['normalizer'].replace('\n','\n    ') % section + '\n'
-                )
-                if plugin:
-                    test_loc = os.path.join(
-                        output_dir,
-                        _to_snake_case(package_name) + '_plugin',
-                        'tests'
-                    )
-                    test_file = os.path.join(
-                        test_loc,'data',f'test_{_to_snake_case(section)}.archive.yaml'
-                    )
-                    with open(test_file, 'w') as fh:
-                        yaml.dump(
-                            {
-                                'data': {
-                                    'm_def': f'{_to_snake_case(package_name)}.{section}'
-                                }
-                            },
-                            fh
-                        )
-        code += content['footer'] + '\n'
-        code = content['header'] + '\n' + code
-        code = code.replace('true', 'True')
-        code = code.replace('false', 'False')
-        code = code.replace('null', 'None')
-        # Clean up the code using autopep8 and autoflake
-        flake8_cleaned_code = autoflake.fix_code(
-            code, remove_all_unused_imports=True)
-        cleaned_code = autopep8.fix_code(
-            flake8_cleaned_code, options={'aggressive': 2, 'max_line_length': 90})
-        # write the code to file
-        file.write(cleaned_code)
+    plugin_loc = os.path.join(output_dir, _to_snake_case(package_name) + '_plugin')
+    if not stream:
+        sections = package.sections
+        with profile_phase(profiler, 'symbol table'):
+            symbols = SymbolTable(sections, yaml_path, plugin, yaml_backend, ir_cache)
+        dependencies = symbols.dependencies
+    if stream:
+        with profile_phase(profiler, 'generate'):
+            dependencies, test_files = write_streamed_module(
+                yaml_path, output_file, content, package_name, set(section_names),
+                normalizers, formatter, plugin, yaml_backend, ir_cache, profiler,
+                plugin_loc if normalizers and plugin else None, bytecode is not None)
+        written_files.extend(test_files)
+    elif split:
+        with profile_phase(profiler, 'generate'):
+            modules = dict(iter_split_package(
+                content, package_name, sections, normalizers, profiler, symbols))
+        if formatter == 'autopep8':
+            with profile_phase(profiler, 'format'):
+                modules = {
+                    file: format_code(code, profiler) for file, code in modules.items()}
+        if bytecode is not None:
+            with profile_phase(profiler, 'compile'):
+                for file, code in modules.items():
+                    _check_source(code, os.path.join(output_file, file))
+        with profile_phase(profiler, 'write'):
+            scaffold.write_files(output_file, modules)
+        written_files.extend(os.path.join(output_file, file) for file in modules)
+    elif jobs > 1:
+        from .parallel import render_module  # pylint: disable=import-outside-toplevel
+        with profile_phase(profiler, 'generate'):
+            code = render_module(
+                yaml_path, content, package_name, symbols, normalizers, formatter,
+                plugin, yaml_backend, ir_cache, jobs, profiler)
+        if bytecode is not None:
+            with profile_phase(profiler, 'compile'):
+                _check_source(code, output_file)
+        with profile_phase(profiler, 'write'), \
+                open(output_file, 'w', encoding="utf8") as file:
+            file.write(code)
+    else:
+        fragments = iter_module(
+            content, package_name, sections, normalizers, profiler, symbols)
+        if profiler is not None:
+            # Generate all code up front to separate the generation from the writing
+            with profile_phase(profiler, 'generate'):
+                fragments = list(fragments)
+        if formatter == 'autopep8':
+            with profile_phase(profiler, 'format'):
+                fragments = [format_code(''.join(fragments), profiler)]
+        if bytecode is not None:
+            with profile_phase(profiler, 'compile'):
+                fragments = [''.join(fragments)]
+                _check_source(fragments[0], output_file)
+        with profile_phase(profiler, 'write'), \
+                open(output_file, 'w', encoding="utf8") as file:
+            file.writelines(fragments)
+    if normalizers and plugin and not stream:
+        test_files = _test_data_files(symbols, sections, package_name, yaml_backend)
+        scaffold.write_files(plugin_loc, test_files)
+        written_files.extend(
+            os.path.join(plugin_loc, *test_file.split('/')) for test_file in test_files)
+    if not split:
+        written_files.append(output_file)
+    if bytecode is not None:
+        with profile_phase(profiler, 'compile'):
+            _compile_files(
+                [os.path.dirname(output_file) if plugin and not split else output_file],
+                bytecode, invalidation_mode)
+    if cache_dir is not None:
+        cache.store(cache_dir, key, output_dir, written_files, yaml_path=yaml_path,
+                    dependencies=sorted(dependencies))
+    return sorted(dependencies)
 
 
 def main() -> None:
     '''
     Main function for running the metainfo YAML to Python class definition parser.
+
+    `metainfo-yaml2py serve` starts the conversion server instead, see `server.main`,
+    and `metainfo-yaml2py generate` writes synthetic archive entries, see
+    `archives.main`.
     '''
-    parser = argparse.ArgumentParser()
+    # pylint: disable=import-outside-toplevel
+    if sys.argv[1:2] == ['serve']:
+        from .server import main as serve
+        serve(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['generate']:
+        from .archives import main as generate
+        generate(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(
+        epilog=('Run "metainfo-yaml2py serve --help" for the conversion server and '
+                '"metainfo-yaml2py generate --help" for generating synthetic archive '
+                'entries.'))
     parser.add_argument(
-        'yaml_path',
-        help='The path to the YAML schema that should be converted to Python classes.',
+        'yaml_paths',
+        nargs='+',
+        metavar='yaml_path',
+        help=('The paths to the YAML schemas that should be converted to Python classes. '
+              'Directories are searched recursively for "*.schema.archive.yaml" files '
+              'and glob patterns are expanded.'),
     )
     parser.add_argument(
         '-o',
@@ -427,13 +2168,150 @@ def main() -> None:
         action='store_true',
         help='Create all the necessary files for a nomad plugin.',
     )
+    parser.add_argument(
+        '-s',
+        '--split',
+        action='store_true',
+        help=('Write a package with one module per top level section, which are '
+              'imported on first access, instead of a single module.'),
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help=('Read and convert the schemas one top level section at a time, which '
+              'bounds the memory by the largest section. Not available with --split.'),
+    )
+    parser.add_argument(
+        '--compile',
+        action='store_true',
+        help=('Byte compile the generated modules. Fails on generated code that is not '
+              'valid python.'),
+    )
+    parser.add_argument(
+        '--optimize',
+        action='append',
+        type=int,
+        choices=(0, 1, 2),
+        default=None,
+        metavar='LEVEL',
+        help=('The optimization level to byte compile for with --compile, can be '
+              'repeated. Defaults to 0.'),
+    )
+    parser.add_argument(
+        '--invalidation_mode',
+        choices=('checked-hash', 'unchecked-hash', 'timestamp'),
+        default='checked-hash',
+        help=('How python checks that the compiled files are up to date with --compile. '
+              'Defaults to "checked-hash", which stays valid when the files are copied.'),
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help=('The number of worker processes used for converting several schemas, or '
+              'for rendering the sections of a single schema. '
+              'Defaults to the number of CPUs.'),
+    )
+    parser.add_argument(
+        '-c',
+        '--cache',
+        action='store_true',
+        help='Skip the conversion of schemas that are unchanged since the last cached run.',
+    )
+    parser.add_argument(
+        '--cache_dir',
+        default=cache.CACHE_DIR,
+        help='The directory of the build cache. Defaults to ".yaml2py-cache".',
+    )
+    parser.add_argument(
+        '-f',
+        '--format',
+        dest='formatter',
+        choices=('autopep8', 'none'),
+        default='autopep8',
+        help=('The formatter applied to the generated code. The code is generated PEP 8 '
+              'compliant, "none" skips the slow autopep8 pass. '
+              'Defaults to "autopep8".'),
+    )
+    parser.add_argument(
+        '--yaml_backend',
+        choices=YAML_BACKENDS,
+        default='auto',
+        help=('The YAML backend, "c" uses libyaml and "python" the pure python '
+              'implementation. Defaults to "auto", using libyaml if available.'),
+    )
+    parser.add_argument(
+        '--no_ir_cache',
+        action='store_true',
+        help='Do not cache the parsed schemas in the per user cache directory.',
+    )
+    parser.add_argument(
+        '-w',
+        '--watch',
+        action='store_true',
+        help=('Keep running and regenerate the schemas that change. '
+              'Stop with Ctrl+C.'),
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help=('Print the wall time and peak memory of each phase and section of the '
+              'conversions.'),
+    )
+    parser.add_argument(
+        '--profile_json',
+        default=None,
+        help='Write the profiling reports of all conversions to this JSON file.',
+    )
     args = parser.parse_args()
-    yaml2py(
-        yaml_path=args.yaml_path,
+    if args.stream and args.split:
+        parser.error('--stream can not be combined with --split')
+    options = dict(
         output_dir=args.output_dir,
         normalizers=args.normalizers,
         plugin=args.plugin,
+        cache_dir=args.cache_dir if args.cache else None,
+        formatter=args.formatter,
+        yaml_backend=args.yaml_backend,
+        ir_cache=not args.no_ir_cache,
+        split=args.split,
+        stream=args.stream,
+        bytecode=(args.optimize or [0]) if args.compile else None,
+        invalidation_mode=args.invalidation_mode,
     )
+    profile = args.profile or args.profile_json is not None
+    if args.watch:
+        from .watch import print_results, watch
+        try:
+            watch(args.yaml_paths, jobs=args.jobs,
+                  callback=functools.partial(print_results, profiles=args.profile),
+                  profile=args.profile, profile_json=args.profile_json, **options)
+        except KeyboardInterrupt:
+            pass
+        return
+    from .batch import convert_many, format_summary
+    from .profiling import format_report
+    start = time.perf_counter()
+    try:
+        results = convert_many(
+            args.yaml_paths, jobs=args.jobs, profile=profile, **options)
+    except FileNotFoundError as exc:
+        parser.error(str(exc))
+    if args.profile:
+        for result in results:
+            if result.profile is not None:
+                print(f'Profile of {result.yaml_path}:')
+                print(format_report(result.profile))
+    if args.profile_json is not None:
+        with open(args.profile_json, 'w', encoding='utf8') as fh:
+            json.dump({
+                result.yaml_path: result.profile
+                for result in results if result.profile is not None
+            }, fh, indent=4)
+    print(format_summary(results, time.perf_counter() - start))
+    if not all(result.ok for result in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
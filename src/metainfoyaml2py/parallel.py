@@ -0,0 +1,173 @@
+'''
+Rendering the sections of a single metainfo YAML schema in a pool of worker processes.
+'''
+
+import math
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+from .metainfoyaml2py import (
+    ImportRegistry, SymbolTable, _format_package, _iter_classes, _used_names, format_code,
+    load_package)
+from .profiling import Profiler, profile_phase
+
+# The number of chunks per worker process, so that chunks of slow sections are balanced
+CHUNKS_PER_JOB = 4
+# The minimal number of classes per chunk, below which the overhead of the worker
+# processes outweighs the rendering
+MIN_CHUNK_SIZE = 50
+
+# The symbol table and the options of a worker process, see `_init_worker`
+_worker: dict = {}
+
+
+def split_order(symbols: SymbolTable, chunks: int) -> List[List[str]]:
+    '''
+    Split the classes of a symbol table into contiguous chunks of similar size.
+
+    The chunks keep the order in which the classes are defined and each chunk ends with
+    a top level section, so that a top level section and its inline sub sections are
+    rendered together.
+
+    Args:
+        symbols (SymbolTable): The symbol table of the schema.
+        chunks (int): The maximal number of chunks.
+
+    Returns:
+        List[List[str]]: The class names of each chunk.
+    '''
+    size = max(1, math.ceil(len(symbols.order) / max(1, chunks)))
+    result: List[List[str]] = [[]]
+    for name in symbols.order:
+        result[-1].append(name)
+        if len(result[-1]) >= size and symbols.symbols[name].top_level:
+            result.append([])
+    if not result[-1]:
+        result.pop()
+    return result
+
+
+def _render(content: dict, symbols: SymbolTable, names: List[str], normalizers: bool,
+            formatter: str, profiler: Optional[Profiler] = None
+            ) -> Tuple[str, ImportRegistry, Optional[Set[str]]]:
+    '''
+    Help function rendering and formatting the classes of a chunk.
+    '''
+    imports = ImportRegistry()
+    code = ''.join(_iter_classes(content, names, imports, normalizers, profiler, symbols))
+    if formatter == 'autopep8':
+        # Formatted without the trailing empty lines, which autopep8 would remove
+        code = format_code(code.rstrip('\n') + '\n', profiler) + '\n\n'
+    return code, imports, _used_names(code)
+
+
+def _init_worker(yaml_path: str, content: dict, normalizers: bool, formatter: str,
+                 plugin: bool, yaml_backend: str, ir_cache: bool) -> None:
+    '''
+    Help function loading the schema and building its symbol table in a worker process.
+
+    The table is built again instead of being sent to the worker, since it is
+    deterministic and the schema is read from the cache of `load_package`. Its
+    warnings are already raised in the main process.
+    '''
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        package = load_package(yaml_path, yaml_backend, ir_cache)
+        symbols = SymbolTable(package.sections, yaml_path, plugin, yaml_backend, ir_cache)
+        symbols.resolve_all()
+    _worker.update(
+        content=content, symbols=symbols, normalizers=normalizers, formatter=formatter)
+
+
+def _render_chunk(names: List[str]
+                  ) -> Tuple[str, ImportRegistry, Optional[Set[str]], List[tuple]]:
+    '''
+    Worker function rendering a chunk and capturing its warnings.
+    '''
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        code, imports, used = _render(
+            _worker['content'], _worker['symbols'], names, _worker['normalizers'],
+            _worker['formatter'])
+    return code, imports, used, [
+        (warning.message, warning.category, warning.filename, warning.lineno)
+        for warning in caught
+    ]
+
+
+def render_module(yaml_path: str, content: dict, package_name: str,
+                  symbols: SymbolTable, normalizers: bool = False,
+                  formatter: str = 'autopep8', plugin: bool = False,
+                  yaml_backend: str = 'auto', ir_cache: bool = True, jobs: int = 1,
+                  profiler: Optional[Profiler] = None) -> str:
+    '''
+    Generate the code of a complete module, rendering its sections in parallel.
+
+    The classes are split into contiguous chunks, see `split_order`, which are rendered
+    and formatted in a pool of worker processes. The chunks are assembled in the order
+    of the symbol table with their imports merged, so that the module is the same as
+    the one generated by `iter_module` and formatted as a whole. Schemas with too few
+    sections for more than one chunk are rendered in the current process.
+
+    Args:
+        yaml_path (str): The path to the YAML schema.
+        content (dict): The standard file content.
+        package_name (str): The name of the metainfo package.
+        symbols (SymbolTable): The symbol table of the schema, built like in `yaml2py`.
+        normalizers (bool, optional): Whether to add empty normalizers or not.
+        Defaults to False.
+        formatter (str, optional): The formatter applied to the generated code, either
+        "autopep8" or "none". Defaults to 'autopep8'.
+        plugin (bool, optional): Whether the schemas are converted to NOMAD plugins, see
+        `resolve_reference`. Defaults to False.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+        ir_cache (bool, optional): Whether to use the on-disk cache of the schema and
+        the schemas it references, see `load_package`. Defaults to True.
+        jobs (int, optional): The number of worker processes. Defaults to 1.
+        profiler (Optional[Profiler], optional): A profiler measuring the phases of the
+        generation. The sections rendered by the workers are not measured individually.
+        Defaults to None.
+
+    Returns:
+        str: The code of the module.
+    '''
+    with profile_phase(profiler, 'resolve'):
+        symbols.resolve_all()
+    chunks = split_order(symbols, min(
+        jobs * CHUNKS_PER_JOB, len(symbols.order) // MIN_CHUNK_SIZE))
+    imports = ImportRegistry()
+    package_code = _format_package(content, package_name) + '\n\n'
+    used = _used_names(package_code + content['footer'])
+    body = [package_code]
+    with profile_phase(profiler, 'sections'):
+        if len(chunks) < 2:
+            results = [
+                (*_render(content, symbols, names, normalizers, formatter, profiler), [])
+                for names in chunks
+            ]
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=min(jobs, len(chunks)), initializer=_init_worker,
+                initargs=(yaml_path, content, normalizers, formatter, plugin,
+                          yaml_backend, ir_cache))
+            with executor:
+                results = list(executor.map(_render_chunk, chunks))
+    # The warnings of the workers are raised again with the registry of the module that
+    # raised them, so that repeated warnings are filtered like in `iter_module`
+    registry = vars(sys.modules[_iter_classes.__module__]).setdefault(
+        '__warningregistry__', {})
+    for code, chunk_imports, chunk_used, caught in results:
+        for message, category, filename, lineno in caught:
+            warnings.warn_explicit(message, category, filename, lineno, registry=registry)
+        body.append(code)
+        imports.update(chunk_imports)
+        # Without the used names of invalid code, all imports are kept
+        used = used | chunk_used if used is not None and chunk_used is not None else None
+    body.append(content['footer'])
+    with profile_phase(profiler, 'imports'):
+        imports.add_code(content['imports'])
+        import_code = imports.render(used)
+    return ''.join([content['header'], '\n', import_code, '\n'] + body)
@@ -0,0 +1,507 @@
+'''
+Batched updates of nested keys in YAML and TOML files that keep their layout.
+
+The updates of a file are applied to its text where possible: the value of each key is
+located and only its text is replaced, keeping the order of the keys, the comments and
+the formatting of the rest of the file. If a key does not exist yet, lies inside a
+sequence or an updated key contains another one, the file is parsed, updated and dumped
+once instead, which keeps the key order but not the comments.
+'''
+
+import re
+from abc import ABC, abstractmethod
+from typing import (
+    Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union)
+
+from .metainfoyaml2py import yaml_dumper, yaml_loader
+
+Key = Union[str, Sequence[str]]
+
+# A part of a dotted key, either quoted or bare
+_KEY_PART = re.compile(
+    r'\s*(?:"((?:[^"\\]|\\.)*)"|\'([^\']*)\'|([^.\'"]+?))\s*(?:\.|$)')
+_YAML_KEY_LINE = re.compile(
+    r'^(?P<indent> *)(?P<key>"(?:[^"\\]|\\.)*"|\'[^\']*\'|[^\s#\'"\-?:][^:#]*?)'
+    r' *(?P<colon>:)(?: +(?P<value>.*?))? *$')
+_YAML_SEQUENCE_LINE = re.compile(r'^(?P<indent> *)- ')
+_TOML_TABLE_LINE = re.compile(r'^\s*(?P<array>\[)?\[(?P<key>[^\[\]]+)\]\]?\s*(?:#.*)?$')
+_TOML_KEY_LINE = re.compile(
+    r'^(?P<indent>\s*)(?P<key>[^=#\s][^=#]*?)\s*=\s*(?P<value>.*?)\s*$')
+
+
+def split_key(key: Key) -> Tuple[str, ...]:
+    '''
+    Split a dotted key into its parts.
+
+    Parts containing dots are quoted like in TOML, e.g.
+    `plugins.options."schemas/example".python_package`.
+
+    Args:
+        key (Key): The dotted key or a sequence of its parts.
+
+    Returns:
+        Tuple[str, ...]: The parts of the key from outer to inner.
+
+    Raises:
+        ValueError: If the key is empty or not a valid dotted key.
+    '''
+    if not isinstance(key, str):
+        parts = tuple(key)
+    else:
+        parts = []
+        position = 0
+        while position < len(key):
+            match = _KEY_PART.match(key, position)
+            if match is None or match.end() == position:
+                raise ValueError(f'Invalid dotted key: {key}')
+            double, single, bare = match.groups()
+            parts.append(
+                bare.strip() if bare is not None else
+                single if single is not None else
+                re.sub(r'\\(.)', r'\1', double))
+            position = match.end()
+        parts = tuple(parts)
+    if not parts:
+        raise ValueError(f'Invalid dotted key: {key!r}')
+    return parts
+
+
+def _unquote(key: str) -> str:
+    '''
+    Help function removing the quotes of a single key.
+    '''
+    if len(key) >= 2 and key[0] == key[-1] and key[0] in '"\'':
+        return re.sub(r'\\(.)', r'\1', key[1:-1]) if key[0] == '"' else key[1:-1]
+    return key
+
+
+def _split_comment(text: str, parses: Callable[[str], bool]) -> Optional[Tuple[str, str]]:
+    '''
+    Split the text after a key into the value and a trailing comment.
+
+    Returns `None` if the value does not parse on its own, e.g. if it continues on the
+    next lines.
+    '''
+    for match in re.finditer(r'\s+#', text):
+        if parses(text[:match.start()]):
+            return text[:match.start()], text[match.start():]
+    if text and not text.lstrip().startswith('#') and parses(text):
+        return text, ''
+    return None
+
+
+class _Span(NamedTuple):
+    '''
+    The location of a value in the lines of a file.
+
+    Attributes:
+        first_line (int): The index of the line of the key.
+        start (int): The column where the value starts, for block values the column
+        after the colon of the key.
+        last_line (int): The index of the last line of the value.
+        end (int): The column after the value in the last line.
+        indent (int): The indentation of the key.
+        block (bool): Whether the value is replaced starting from the colon of the key,
+        like YAML block values continuing on the following lines.
+        comment (str): The comment after the key of a block value, which is kept.
+    '''
+    first_line: int
+    start: int
+    last_line: int
+    end: int
+    indent: int = 0
+    block: bool = False
+    comment: str = ''
+
+
+class _Format(ABC):
+    '''
+    The parsing and dumping of a file format.
+    '''
+    # Prefix making a single value a parsable document
+    prefix = ''
+
+    def __init__(self, yaml_backend: str = 'auto'):
+        self.yaml_backend = yaml_backend
+
+    @abstractmethod
+    def locate(self, lines: List[str]) -> Dict[Tuple[str, ...], _Span]:
+        '''
+        Find the values of the keys in the lines of a file.
+
+        Args:
+            lines (List[str]): The lines of the file.
+
+        Returns:
+            Dict[Tuple[str, ...], _Span]: The locations of the values, without trailing
+            comments, keyed by the key parts.
+        '''
+
+    @abstractmethod
+    def render(self, value: Any, span: _Span) -> Optional[str]:
+        '''
+        Render a value replacing the text of a span, `None` if this is not possible.
+        '''
+
+    @abstractmethod
+    def loads(self, text: str) -> Any:
+        '''
+        Parse the text of a file.
+        '''
+
+    @abstractmethod
+    def dumps(self, mapping: dict) -> str:
+        '''
+        Dump the mapping of a file, keeping the key order.
+        '''
+
+    def parses(self, value: str) -> bool:
+        '''
+        Check if the text is a complete value.
+        '''
+        try:
+            self.loads(self.prefix + value)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _is_content(line: str) -> bool:
+    return bool(line.strip()) and not line.lstrip().startswith('#')
+
+
+def _line_end(line: str) -> int:
+    return len(line.rstrip('\r\n'))
+
+
+class _Yaml(_Format):
+    '''
+    Block style YAML, keys inside sequences and flow collections are not located.
+    '''
+    prefix = 'key: '
+
+    def locate(self, lines: List[str]) -> Dict[Tuple[str, ...], _Span]:
+        located = {}
+        stack: List[Tuple[int, Optional[str]]] = []
+        # The keys whose value continues on the following lines, from outer to inner
+        blocks: List[Tuple[Tuple[str, ...], _Span]] = []
+        content = [index for index, line in enumerate(lines) if _is_content(line)]
+        skip_deeper_than = None
+        for position, index in enumerate(content + [len(lines)]):
+            line = lines[index] if index < len(lines) else ''
+            indent = _indent(line) if line else -1
+            is_sequence = _YAML_SEQUENCE_LINE.match(line) is not None
+            while blocks and (
+                    blocks[-1][1].indent > indent or
+                    blocks[-1][1].indent == indent and not is_sequence):
+                keys, span = blocks.pop()
+                located[keys] = span
+            if index == len(lines):
+                break
+            # Sequence items at the indentation of the key are part of its value
+            blocks = [
+                (keys, span._replace(last_line=index, end=_line_end(line)))
+                for keys, span in blocks
+            ]
+            if skip_deeper_than is not None:
+                if indent > skip_deeper_than:
+                    continue
+                skip_deeper_than = None
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            match = _YAML_KEY_LINE.match(line)
+            if match is None or is_sequence:
+                # Keys below sequence items and flow collections are not located
+                stack.append((indent, None))
+                continue
+            stack.append((indent, _unquote(match.group('key').strip())))
+            value = match.group('value') or ''
+            if value[:1] in ('&', '*', '!'):
+                # Anchors, aliases and tags are kept
+                skip_deeper_than = indent
+                continue
+            keys = tuple(key for _, key in stack)
+            next_indent = _indent(lines[content[position + 1]]) if (
+                position + 1 < len(content)) else -1
+            if value and value[:1] not in ('#', '|', '>') and next_indent <= indent:
+                split = _split_comment(value, self.parses)
+                if split is not None:
+                    if None not in keys:
+                        start = match.start('value')
+                        located[keys] = _Span(
+                            index, start, index, start + len(split[0]), indent)
+                    continue
+            # The value continues on the following lines or is empty
+            if value and value[:1] != '#':
+                skip_deeper_than = indent
+            if None not in keys:
+                comment = line[match.end('colon'):_line_end(line)] if (
+                    value[:1] == '#') else ''
+                blocks.append((keys, _Span(
+                    index, match.end('colon'), index, _line_end(line), indent, True,
+                    comment)))
+        return located
+
+    def _dump_inline(self, value: Any) -> Optional[str]:
+        import yaml  # pylint: disable=import-outside-toplevel
+        text = yaml.dump(
+            value, Dumper=yaml_dumper(self.yaml_backend), default_flow_style=True,
+            width=2 ** 31 - 1)
+        text = text[:-len('\n...\n')] if text.endswith('\n...\n') else text.rstrip('\n')
+        return None if '\n' in text else text
+
+    def render(self, value: Any, span: _Span) -> Optional[str]:
+        if not span.block:
+            return self._dump_inline(value)
+        if not isinstance(value, (dict, list)) or not value:
+            inline = self._dump_inline(value)
+            return None if inline is None else ' ' + inline + span.comment
+        import yaml  # pylint: disable=import-outside-toplevel
+        block = yaml.dump(
+            value, Dumper=yaml_dumper(self.yaml_backend), default_flow_style=False,
+            sort_keys=False)
+        indent = ' ' * (span.indent + 2)
+        return span.comment + ''.join(
+            '\n' + indent + line for line in block.rstrip('\n').split('\n'))
+
+    def loads(self, text: str) -> Any:
+        import yaml  # pylint: disable=import-outside-toplevel
+        return yaml.load(text, Loader=yaml_loader(self.yaml_backend))
+
+    def dumps(self, mapping: dict) -> str:
+        import yaml  # pylint: disable=import-outside-toplevel
+        return yaml.dump(
+            mapping, Dumper=yaml_dumper(self.yaml_backend), sort_keys=False)
+
+
+def _balanced(value: str) -> bool:
+    '''
+    Help function checking that all brackets and strings of a TOML value are closed.
+    '''
+    depth = 0
+    index = 0
+    while index < len(value):
+        char = value[index]
+        if char in '"\'':
+            quote = value[index:index + 3] if value[index:index + 3] == char * 3 else char
+            index += len(quote)
+            while not value.startswith(quote, index):
+                if index >= len(value):
+                    return False
+                index += 2 if char == '"' and value[index] == '\\' else 1
+            index += len(quote)
+            continue
+        if char == '#':
+            # Comments run to the end of the line, also within multi-line arrays
+            newline = value.find('\n', index)
+            if newline < 0:
+                break
+            index = newline
+            continue
+        depth += char in '[{'
+        depth -= char in ']}'
+        index += 1
+    return depth == 0
+
+
+class _Toml(_Format):
+    '''
+    TOML, keys inside arrays of tables are not located.
+    '''
+    prefix = 'key = '
+
+    def locate(self, lines: List[str]) -> Dict[Tuple[str, ...], _Span]:
+        located = {}
+        table: Optional[Tuple[str, ...]] = ()
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            first_line = index
+            index += 1
+            if not _is_content(line):
+                continue
+            header = _TOML_TABLE_LINE.match(line)
+            if header is not None:
+                table = None if header.group('array') else split_key(header.group('key'))
+                continue
+            match = _TOML_KEY_LINE.match(line)
+            if match is None:
+                continue
+            value = match.group('value')
+            split = _split_comment(value, self.parses)
+            # Collect the following lines of a multi-line array or string
+            while split is None and index < len(lines):
+                value += '\n' + lines[index].rstrip('\r\n')
+                index += 1
+                split = _split_comment(value, self.parses)
+            if split is None or table is None:
+                continue
+            try:
+                key = table + split_key(match.group('key'))
+            except ValueError:
+                continue
+            start = match.start('value')
+            end = start + len(split[0])
+            if index - 1 > first_line:
+                end = len(split[0]) - split[0].rindex('\n') - 1
+            located[key] = _Span(first_line, start, index - 1, end)
+        return located
+
+    def render(self, value: Any, span: _Span) -> Optional[str]:
+        import toml  # pylint: disable=import-outside-toplevel
+        if isinstance(value, dict):
+            return None
+        text = toml.dumps({'key': value})
+        if not text.startswith(self.prefix) or text.count('\n') != 1:
+            return None
+        return text[len(self.prefix):-1]
+
+    def parses(self, value: str) -> bool:
+        # The toml package accepts unterminated arrays, like "[1,"
+        return _balanced(value) and super().parses(value)
+
+    def loads(self, text: str) -> Any:
+        import toml  # pylint: disable=import-outside-toplevel
+        return toml.loads(text)
+
+    def dumps(self, mapping: dict) -> str:
+        import toml  # pylint: disable=import-outside-toplevel
+        return toml.dumps(mapping)
+
+
+def _file_format(path: str, yaml_backend: str) -> _Format:
+    '''
+    Help function for selecting the format of a file by its ending.
+    '''
+    if path.endswith(('.yaml', '.yml')):
+        return _Yaml(yaml_backend)
+    if path.endswith('.toml'):
+        return _Toml(yaml_backend)
+    raise ValueError(f'Unsupported file ending for: {path}')
+
+
+def set_in(mapping: dict, keys: Sequence[str], value: Any) -> None:
+    '''
+    Set a nested value in a dict in place, creating missing levels.
+
+    Args:
+        mapping (dict): The nested dictionary.
+        keys (Sequence[str]): The nested keys from outer to inner.
+        value (Any): The value to set.
+
+    Raises:
+        ValueError: If a key on the way points to a value that is not a dict.
+    '''
+    for index, key in enumerate(keys[:-1]):
+        child = mapping.setdefault(key, {})
+        if not isinstance(child, dict):
+            raise ValueError(
+                f'Can not set {".".join(keys)}, {".".join(keys[:index + 1])} is not a '
+                'mapping.')
+        mapping = child
+    mapping[keys[-1]] = value
+
+
+def _patch_text(text: str, updates: Dict[Key, Any], file_format: _Format) -> str:
+    '''
+    Apply updates to the text of a YAML or TOML file.
+
+    Args:
+        text (str): The content of the file.
+        updates (Dict[Key, Any]): The new values keyed by their dotted keys.
+        file_format (_Format): The format of the file.
+
+    Returns:
+        str: The updated content.
+    '''
+    updates = {split_key(key): value for key, value in updates.items()}
+    lines = text.splitlines(keepends=True)
+    # The values are located without the carriage returns of CRLF line terminators, the
+    # terminators of the file are kept and used for new lines
+    newline = '\r\n' if lines and lines[0].endswith('\r\n') else '\n'
+    located = file_format.locate([
+        line[:_line_end(line)] + ('\n' if _line_end(line) < len(line) else '')
+        for line in lines])
+    replacements = []
+    for keys, value in updates.items():
+        rendered = file_format.render(value, located[keys]) if keys in located else None
+        if rendered is None:
+            break
+        replacements.append((located[keys], rendered))
+    else:
+        replacements.sort()
+        overlapping = any(
+            (span.last_line, span.end) > (following.first_line, following.start)
+            for (span, _), (following, _) in zip(replacements, replacements[1:]))
+        if not overlapping:
+            # Replace from the end of the file, keeping the earlier locations valid
+            for span, rendered in reversed(replacements):
+                rendered = rendered.replace('\n', newline)
+                lines[span.first_line:span.last_line + 1] = [
+                    lines[span.first_line][:span.start] + rendered +
+                    lines[span.last_line][span.end:]]
+            return ''.join(lines)
+    # Parse and dump the whole file once
+    mapping = file_format.loads(text) or {}
+    for keys, value in updates.items():
+        set_in(mapping, keys, value)
+    return file_format.dumps(mapping).replace('\n', newline)
+
+
+def patch_file(path: str, updates: Dict[Key, Any], yaml_backend: str = 'auto') -> bool:
+    '''
+    Update nested keys in a YAML or TOML file with a single read and write.
+
+    Args:
+        path (str): The path to the file, ending with ".yaml", ".yml" or ".toml".
+        updates (Dict[Key, Any]): The new values keyed by their dotted keys, like
+        `{'project.name': 'my_schema'}`, or tuples of the key parts.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+
+    Returns:
+        bool: Whether the content of the file changed.
+
+    Raises:
+        ValueError: For unsupported file endings or keys pointing into values that are
+        not mappings.
+    '''
+    file_format = _file_format(path, yaml_backend)
+    # Without translating the line terminators, which are kept
+    with open(path, 'r', encoding='utf-8', newline='') as fh:
+        text = fh.read()
+    patched = _patch_text(text, updates, file_format)
+    if patched == text:
+        return False
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        fh.write(patched)
+    return True
+
+
+def patch_files(updates: Iterable[Tuple[str, Key, Any]],
+                yaml_backend: str = 'auto') -> List[str]:
+    '''
+    Apply a batch of updates across many YAML and TOML files.
+
+    The updates are grouped by file, so every file is read and written at most once.
+
+    Args:
+        updates (Iterable[Tuple[str, Key, Any]]): The `(path, key, value)` updates, see
+        `patch_file`.
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+
+    Returns:
+        List[str]: The paths of the files that changed.
+    '''
+    by_file: Dict[str, Dict[Key, Any]] = {}
+    for path, key, value in updates:
+        by_file.setdefault(path, {})[split_key(key)] = value
+    return [
+        path for path, file_updates in by_file.items()
+        if patch_file(path, file_updates, yaml_backend)
+    ]
@@ -0,0 +1,179 @@
+'''
+Per-phase timing and memory instrumentation of the conversion.
+'''
+
+import contextlib
+import json
+import time
+import tracemalloc
+import warnings
+from collections import Counter
+from typing import ContextManager, Iterator, Optional
+
+
+class Profiler:
+    '''
+    Collects the wall time and peak memory of the phases of a conversion.
+
+    Phases can be nested, for example the sections within the generation phase. The peak
+    memory is measured with `tracemalloc` and reported relative to the traced memory at
+    the start of the phase.
+
+    Args:
+        memory (bool, optional): Whether to trace the peak memory. Tracing slows down the
+        conversion considerably. Defaults to True.
+    '''
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.phases = []
+        self.warnings = Counter()
+        self._stack = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str, kind: str = 'phase') -> Iterator[None]:
+        '''
+        Context manager measuring a phase.
+
+        Warnings raised within top level phases are counted and passed on to the active
+        warning filters at the end of the phase.
+
+        Args:
+            name (str): The name of the phase.
+            kind (str, optional): The kind of the phase, like "phase" or "section".
+            Defaults to 'phase'.
+        '''
+        record = {
+            'name': name,
+            'kind': kind,
+            'depth': len(self._stack),
+            'seconds': 0.,
+            'peak_bytes': None,
+        }
+        self.phases.append(record)
+        caught = None
+        try:
+            with contextlib.ExitStack() as stack:
+                if record['depth'] == 0:
+                    caught = stack.enter_context(warnings.catch_warnings(record=True))
+                    warnings.simplefilter('always')
+                with self._measure(record):
+                    yield
+        finally:
+            if caught:
+                record['warnings'] = len(caught)
+                for warning in caught:
+                    self.warnings[f'{warning.category.__name__}: {warning.message}'] += 1
+                    warnings.warn_explicit(
+                        warning.message, warning.category, warning.filename,
+                        warning.lineno)
+
+    @contextlib.contextmanager
+    def _measure(self, record: dict) -> Iterator[None]:
+        '''
+        Context manager measuring the wall time and peak memory of a phase.
+        '''
+        started_tracing = False
+        start_memory = 0
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            start_memory, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Keep the peak of the enclosing phase before resetting it
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        frame = {'peak': 0}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._stack.pop()
+            if self.memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_bytes'] = peak - start_memory
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def report(self) -> dict:
+        '''
+        Create a JSON serializable report of all measured phases.
+
+        Returns:
+            dict: The phases in the order they were started and the warning counts.
+        '''
+        return {
+            'seconds': sum(
+                phase['seconds'] for phase in self.phases if phase['depth'] == 0),
+            'phases': self.phases,
+            'warnings': {
+                'count': sum(self.warnings.values()),
+                'messages': dict(self.warnings),
+            },
+        }
+
+    def to_json(self, indent: Optional[int] = 4) -> str:
+        '''
+        Render the report as JSON.
+
+        Args:
+            indent (Optional[int], optional): The JSON indentation. Defaults to 4.
+
+        Returns:
+            str: The report as JSON.
+        '''
+        return json.dumps(self.report(), indent=indent)
+
+    def format_table(self) -> str:
+        '''
+        Render the report as a human readable table.
+
+        Returns:
+            str: The table of the phases, indented by nesting depth, and the warnings.
+        '''
+        return format_report(self.report())
+
+
+def format_report(report: dict) -> str:
+    '''
+    Render a profiling report as a human readable table.
+
+    Args:
+        report (dict): The report created by `Profiler.report`.
+
+    Returns:
+        str: The table of the phases, indented by nesting depth, and the warnings.
+    '''
+    lines = [f'{"phase":<50} {"time [ms]":>10} {"peak [kB]":>10}']
+    for phase in report['phases']:
+        name = '  ' * phase['depth'] + phase['name']
+        peak = '-' if phase['peak_bytes'] is None else f'{phase["peak_bytes"] / 1e3:.1f}'
+        lines.append(f'{name[:50]:<50} {phase["seconds"] * 1e3:>10.2f} {peak:>10}')
+    lines.append(f'{"total":<50} {report["seconds"] * 1e3:>10.2f}')
+    lines.append(f'warnings: {report["warnings"]["count"]}')
+    for message, count in report['warnings']['messages'].items():
+        lines.append(f'{count:>6} x {message}')
+    return '\n'.join(lines)
+
+
+def profile_phase(profiler: Optional[Profiler], name: str,
+                  kind: str = 'phase') -> ContextManager[None]:
+    '''
+    Help function returning a phase of the profiler or a no-op without profiler.
+
+    Args:
+        profiler (Optional[Profiler]): The profiler or `None`.
+        name (str): The name of the phase.
+        kind (str, optional): The kind of the phase. Defaults to 'phase'.
+
+    Returns:
+        ContextManager[None]: The context manager measuring the phase.
+    '''
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name, kind)
@@ -0,0 +1,97 @@
+'''
+Rendering of file tree templates, like the NOMAD plugin scaffold, in a single pass.
+'''
+
+import functools
+import os
+import string
+from typing import Dict, List, Optional, Tuple
+
+# Folders of the template trees that are not part of the templates
+IGNORED_FOLDERS = ('__pycache__',)
+
+
+@functools.lru_cache(maxsize=None)
+def load_templates(directory: str) -> Tuple[Tuple[str, string.Template], ...]:
+    '''
+    Read all files of a template tree.
+
+    The templates are read once per process. Placeholders in the files are written as
+    `${name}`, see `string.Template`.
+
+    Args:
+        directory (str): The root folder of the template tree.
+
+    Returns:
+        Tuple[Tuple[str, string.Template], ...]: The paths relative to `directory`, with
+        "/" as separator, and the templates of all files sorted by path.
+    '''
+    templates = []
+    for root, folders, file_names in os.walk(directory):
+        folders[:] = sorted(
+            folder for folder in folders if folder not in IGNORED_FOLDERS)
+        for file_name in sorted(file_names):
+            path = os.path.join(root, file_name)
+            with open(path, 'r', encoding='utf8') as fh:
+                template = string.Template(fh.read())
+            templates.append(
+                (os.path.relpath(path, directory).replace(os.sep, '/'), template))
+    return tuple(templates)
+
+
+def render_templates(directory: str, values: Dict[str, str],
+                     renames: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    '''
+    Render a template tree in memory.
+
+    Args:
+        directory (str): The root folder of the template tree.
+        values (Dict[str, str]): The values of the placeholders. Unknown placeholders
+        are left as they are.
+        renames (Optional[Dict[str, str]], optional): New names of files and folders of
+        the template tree, like `{'plugin_name': 'my_schema'}`. Defaults to None.
+
+    Returns:
+        Dict[str, str]: The rendered content keyed by the relative path of each file.
+    '''
+    renames = renames or {}
+    files = {}
+    for path, template in load_templates(directory):
+        path = '/'.join(renames.get(part, part) for part in path.split('/'))
+        files[path] = template.safe_substitute(values)
+    return files
+
+
+def write_files(root: str, files: Dict[str, str], overwrite: bool = True) -> List[str]:
+    '''
+    Write files below a folder, skipping those that already have the content.
+
+    Unchanged files keep their modification time, so an existing tree can be updated in
+    place without triggering rebuilds. Other files in the folder are left untouched.
+
+    Args:
+        root (str): The folder the paths are relative to.
+        files (Dict[str, str]): The content keyed by the relative path of each file.
+        overwrite (bool, optional): Whether existing files with other content are
+        overwritten, otherwise only missing files are written, keeping the changes made
+        to the existing ones. Defaults to True.
+
+    Returns:
+        List[str]: The paths of the files that were written.
+    '''
+    written = []
+    for relative_path, content in files.items():
+        path = os.path.join(root, *relative_path.split('/'))
+        if not overwrite and os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf8') as fh:
+                if fh.read() == content:
+                    continue
+        except (OSError, UnicodeDecodeError):
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf8') as fh:
+            fh.write(content)
+        written.append(path)
+    return written
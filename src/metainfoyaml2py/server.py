@@ -0,0 +1,232 @@
+'''
+Long-running conversion server answering JSON lines requests over stdio or TCP.
+
+Each request is a JSON object on a single line:
+    {"id": 1, "yaml": "definitions: ...", "options": {"normalizers": true}}
+and is answered by a single line:
+    {"id": 1, "code": "...", "error": null, "warnings": [], "seconds": 0.004}
+The options are passed on to `convert_text`. Requests are answered as soon as they are
+converted, so the responses can arrive in a different order than the requests.
+'''
+
+import argparse
+import importlib
+import io
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import traceback
+import warnings
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Optional, TextIO
+
+from .metainfoyaml2py import YAML_BACKENDS, convert_text, load_standard_content
+
+# Conversions in the same process are serialized, since recording warnings changes the
+# global warning filters and the converter shares caches between conversions
+_conversion_lock = threading.Lock()
+
+
+def warm_up(yaml_backend: str = 'auto') -> None:
+    '''
+    Import the dependencies and read the templates used by the conversions, so that the
+    first request is as fast as the following ones.
+
+    Args:
+        yaml_backend (str, optional): The YAML backend, see `yaml_loader`.
+        Defaults to 'auto'.
+    '''
+    for module in ('autopep8', 'yaml'):
+        importlib.import_module(module)
+    load_standard_content(yaml_backend)
+
+
+def handle_request(request: dict) -> dict:
+    '''
+    Answer a single conversion request, capturing errors and warnings.
+
+    Requests handled by threads of the same process, like the connections of a
+    `ConversionServer` without executor, are converted one at a time.
+
+    Args:
+        request (dict): The request with the YAML text of the schema under "yaml" and
+        optionally an "id" and the "options" of `convert_text`.
+
+    Returns:
+        dict: The response with the "id" of the request, the generated "code" or the
+        "error" message, the "warnings" and the "seconds" spent on the conversion.
+    '''
+    start = time.perf_counter()
+    code = None
+    error = None
+    request_id = request.get('id') if isinstance(request, dict) else None
+    with _conversion_lock, warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get('yaml'), str):
+                raise ValueError(
+                    'The request needs the YAML text of the schema as "yaml".')
+            code = convert_text(request['yaml'], **request.get('options', {}))
+        except Exception as exc:  # pylint: disable=broad-except
+            error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+    return {
+        'id': request_id,
+        'code': code,
+        'error': error,
+        'warnings': [str(warning.message) for warning in caught],
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def line_writer(stream: TextIO) -> Callable[[dict], None]:
+    '''
+    Create a thread safe function writing responses as JSON lines to a stream.
+
+    Args:
+        stream (TextIO): The stream, like `sys.stdout`.
+
+    Returns:
+        Callable[[dict], None]: The function writing and flushing a single response.
+    '''
+    lock = threading.Lock()
+
+    def write(response: dict) -> None:
+        with lock:
+            stream.write(json.dumps(response) + '\n')
+            stream.flush()
+
+    return write
+
+
+def serve_lines(lines: Iterable[str], write: Callable[[dict], None],
+                executor: Optional[Executor] = None) -> None:
+    '''
+    Answer the JSON lines requests of a stream until it ends.
+
+    Args:
+        lines (Iterable[str]): The request lines, like `sys.stdin`.
+        write (Callable[[dict], None]): Function writing a response, see `line_writer`.
+        executor (Optional[Executor], optional): The executor converting the requests
+        concurrently. Defaults to None, converting them one after the other.
+    '''
+    futures = []
+
+    def done(future: Future) -> None:
+        try:
+            write(future.result())
+        except Exception as exc:  # pylint: disable=broad-except
+            write({'id': None, 'code': None, 'error': repr(exc), 'warnings': [],
+                   'seconds': 0.})
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as exc:
+            write({'id': None, 'code': None, 'error': f'Invalid JSON: {exc}',
+                   'warnings': [], 'seconds': 0.})
+            continue
+        if executor is None:
+            write(handle_request(request))
+        else:
+            future = executor.submit(handle_request, request)
+            future.add_done_callback(done)
+            futures.append(future)
+    wait(futures)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    '''
+    Handler answering the JSON lines requests of a TCP connection.
+    '''
+
+    def handle(self) -> None:
+        lines = io.TextIOWrapper(self.rfile, encoding='utf8')
+        stream = io.TextIOWrapper(self.wfile, encoding='utf8', write_through=True)
+        serve_lines(lines, line_writer(stream), self.server.executor)
+
+
+class ConversionServer(socketserver.ThreadingTCPServer):
+    '''
+    TCP server answering JSON lines conversion requests, see `serve_lines`.
+
+    Every connection is handled in its own thread and can send any number of requests.
+
+    Args:
+        address (tuple): The `(host, port)` to listen on, port 0 picks a free port.
+        executor (Optional[Executor], optional): The executor converting the requests
+        of all connections. Defaults to None, converting them in the connection threads
+        one at a time, see `handle_request`.
+    '''
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple, executor: Optional[Executor] = None):
+        super().__init__(address, _RequestHandler)
+        self.executor = executor
+
+
+def main(argv: Optional[list] = None) -> None:
+    '''
+    Main function of the `metainfo-yaml2py serve` command.
+
+    Args:
+        argv (Optional[list], optional): The command line arguments after "serve".
+        Defaults to None, using `sys.argv`.
+    '''
+    parser = argparse.ArgumentParser(
+        prog='metainfo-yaml2py serve',
+        description=('Answer JSON lines conversion requests on stdin/stdout or, with '
+                     '--port, on a local TCP socket.'),
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=None,
+        help='Listen on this TCP port instead of stdin/stdout, 0 picks a free port.',
+    )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='The host to listen on with --port. Defaults to "127.0.0.1".',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help=('The number of worker processes converting requests concurrently, 1 '
+              'converts them in the server process. Defaults to the number of CPUs.'),
+    )
+    parser.add_argument(
+        '--yaml_backend',
+        choices=YAML_BACKENDS,
+        default='auto',
+        help='The YAML backend that is warmed up. Defaults to "auto".',
+    )
+    args = parser.parse_args(argv)
+    warm_up(args.yaml_backend)
+    jobs = args.jobs or os.cpu_count() or 1
+    executor = None
+    if jobs > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=jobs, initializer=warm_up, initargs=(args.yaml_backend,))
+        # Start all workers before the first request
+        wait([executor.submit(warm_up, args.yaml_backend) for _ in range(jobs)])
+    try:
+        if args.port is None:
+            serve_lines(sys.stdin, line_writer(sys.stdout), executor)
+            return
+        with ConversionServer((args.host, args.port), executor) as server:
+            host, port = server.server_address[:2]
+            print(f'Listening on {host}:{port}', file=sys.stderr, flush=True)
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown()
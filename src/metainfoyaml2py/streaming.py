@@ -0,0 +1,224 @@
+'''
+Reading the sections of a metainfo YAML schema one at a time.
+
+The schema is walked through the events of the YAML parser, and only the section that
+is currently read is composed and constructed, so that the memory needed is bounded by
+the largest section instead of the whole schema. Both the libyaml and the pure python
+backend are supported, see `yaml_loader`.
+'''
+
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .metainfoyaml2py import yaml_loader
+
+
+def _compose(loader: Any, anchors: Dict[str, Any]) -> Any:
+    '''
+    Help function composing the node whose first event is next, like the composer of
+    pyyaml but without recursion and keeping the anchors across calls.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    # The open collections with the pending key of mappings
+    stack: List[list] = []
+    while True:
+        event = loader.get_event()
+        if isinstance(event, yaml.AliasEvent):
+            if event.anchor not in anchors:
+                raise yaml.composer.ComposerError(
+                    None, None, f'found undefined alias {event.anchor!r}',
+                    event.start_mark)
+            node = anchors[event.anchor]
+        elif isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == '!':
+                tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+            node = yaml.ScalarNode(
+                tag, event.value, event.start_mark, event.end_mark, style=event.style)
+            if event.anchor is not None:
+                anchors[event.anchor] = node
+        elif isinstance(event, yaml.CollectionStartEvent):
+            kind = (
+                yaml.MappingNode if isinstance(event, yaml.MappingStartEvent)
+                else yaml.SequenceNode)
+            tag = event.tag
+            if tag is None or tag == '!':
+                tag = loader.resolve(kind, None, event.implicit)
+            node = kind(tag, [], event.start_mark, None, flow_style=event.flow_style)
+            if event.anchor is not None:
+                anchors[event.anchor] = node
+            stack.append([node, None])
+            continue
+        else:
+            # The end of the innermost collection
+            node = stack.pop()[0]
+            node.end_mark = event.end_mark
+        if not stack:
+            return node
+        parent = stack[-1]
+        if isinstance(parent[0], yaml.SequenceNode):
+            parent[0].value.append(node)
+        elif parent[1] is None:
+            parent[1] = node
+        else:
+            parent[0].value.append((parent[1], node))
+            parent[1] = None
+
+
+def load_document(stream: Union[str, IO], backend: str = 'auto') -> Any:
+    '''
+    Load a single YAML document like `yaml.load`, composing it without recursion.
+
+    The composer of the pure python backend is recursive and exceeds the recursion
+    limit for documents nested a few hundred levels deep, see `_compose`.
+
+    Args:
+        stream (Union[str, IO]): The YAML text or an open file.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+
+    Returns:
+        Any: The content of the document, `None` for an empty stream.
+
+    Raises:
+        yaml.YAMLError: If the stream is not valid YAML or has more than one document.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    loader = yaml_loader(backend)(stream)
+    try:
+        loader.get_event()
+        node = None
+        if not loader.check_event(yaml.StreamEndEvent):
+            loader.get_event()
+            node = _compose(loader, {})
+            loader.get_event()
+        if not loader.check_event(yaml.StreamEndEvent):
+            event = loader.get_event()
+            raise yaml.composer.ComposerError(
+                'expected a single document in the stream', None,
+                'but found another document', event.start_mark)
+        return None if node is None else loader.construct_document(node)
+    finally:
+        loader.dispose()
+
+
+def _skip(loader: Any) -> None:
+    '''
+    Help function skipping the events of the node whose first event is next.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if isinstance(event, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, yaml.CollectionEndEvent):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _iter_keys(loader: Any, anchors: Dict[str, Any]) -> Iterator[Any]:
+    '''
+    Help function iterating over the keys of the mapping whose start event is next.
+
+    The events of the value of each key have to be consumed before the next key.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    loader.get_event()
+    while not loader.check_event(yaml.MappingEndEvent):
+        yield loader.construct_document(_compose(loader, anchors))
+    loader.get_event()
+
+
+def _find_definitions(loader: Any, anchors: Dict[str, Any], path: str) -> None:
+    '''
+    Help function moving the loader to the start of the "definitions" mapping of the
+    first document.
+
+    Raises:
+        ValueError: If the document has no "definitions" mapping.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    loader.get_event()
+    if loader.check_event(yaml.DocumentStartEvent):
+        loader.get_event()
+        if loader.check_event(yaml.MappingStartEvent):
+            for key in _iter_keys(loader, anchors):
+                if key == 'definitions' and loader.check_event(yaml.MappingStartEvent):
+                    return
+                _compose(loader, anchors)
+    raise ValueError(f'No "definitions" key found in YAML file: {path}')
+
+
+def read_outline(path: str, backend: str = 'auto') -> Tuple[Optional[Any], List[str]]:
+    '''
+    Read the package name and the names of the top level sections of a schema.
+
+    The sections themselves are skipped on the level of parser events, without
+    composing them.
+
+    Args:
+        path (str): The path to the YAML schema.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+
+    Returns:
+        Tuple[Optional[Any], List[str]]: The "name" of the definitions, `None` if it is
+        not given, and the names of the sections in the order of the schema.
+
+    Raises:
+        ValueError: If the schema has no "definitions" key.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    name = None
+    section_names = []
+    with open(path, 'r', encoding='utf8') as file:
+        loader = yaml_loader(backend)(file)
+        try:
+            anchors: Dict[str, Any] = {}
+            _find_definitions(loader, anchors, path)
+            for key in _iter_keys(loader, anchors):
+                if key == 'sections' and loader.check_event(yaml.MappingStartEvent):
+                    for section_name in _iter_keys(loader, anchors):
+                        section_names.append(section_name)
+                        _skip(loader)
+                elif key == 'name':
+                    name = loader.construct_document(_compose(loader, anchors))
+                else:
+                    _skip(loader)
+        finally:
+            loader.dispose()
+    return name, section_names
+
+
+def iter_sections(path: str, backend: str = 'auto') -> Iterator[Tuple[str, dict]]:
+    '''
+    Read the top level sections of a schema one at a time.
+
+    Each section is constructed from the parser events when it is complete, and the
+    events of the rest of the schema are read only when the next section is requested.
+    YAML aliases can refer to anchors anywhere before them.
+
+    Args:
+        path (str): The path to the YAML schema.
+        backend (str, optional): The YAML backend, see `yaml_loader`. Defaults to 'auto'.
+
+    Yields:
+        Tuple[str, dict]: The name of a section and its YAML content.
+
+    Raises:
+        ValueError: If the schema has no "definitions" key.
+    '''
+    import yaml  # pylint: disable=import-outside-toplevel
+    with open(path, 'r', encoding='utf8') as file:
+        loader = yaml_loader(backend)(file)
+        try:
+            anchors: Dict[str, Any] = {}
+            _find_definitions(loader, anchors, path)
+            for key in _iter_keys(loader, anchors):
+                if key != 'sections' or not loader.check_event(yaml.MappingStartEvent):
+                    _compose(loader, anchors)
+                    continue
+                for section_name in _iter_keys(loader, anchors):
+                    section = loader.construct_document(_compose(loader, anchors))
+                    yield section_name, section if section is not None else {}
+        finally:
+            loader.dispose()
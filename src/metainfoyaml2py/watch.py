@@ -0,0 +1,159 @@
+'''
+Watch mode regenerating the Python code of YAML schemas when they change.
+'''
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .batch import ConversionResult, convert_many, expand_paths
+from .profiling import format_report
+
+
+def snapshot(paths: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    '''
+    Take a snapshot of the modification time and size of all schema files.
+
+    Paths are expanded like in `convert_many`, so new files in watched directories or
+    matching watched glob patterns are picked up. Paths that currently match no files
+    are ignored.
+
+    Args:
+        paths (Iterable[str]): File paths, directories and glob patterns of the schemas.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: The modification time in ns and size of each file.
+    '''
+    stats = {}
+    for path in paths:
+        try:
+            yaml_paths = expand_paths([path])
+        except FileNotFoundError:
+            continue
+        for yaml_path in yaml_paths:
+            try:
+                stat = os.stat(yaml_path)
+            except OSError:
+                continue
+            stats[yaml_path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def print_results(results: List[ConversionResult], profiles: bool = True) -> None:
+    '''
+    Print the latency, warnings, errors and profile of each regenerated schema.
+
+    Args:
+        results (List[ConversionResult]): The results of the conversions.
+        profiles (bool, optional): Whether to print the profiles of the conversions.
+        Defaults to True.
+    '''
+    for result in results:
+        status = 'regenerated' if result.ok else 'FAILED'
+        print(f'[{time.strftime("%H:%M:%S")}] {result.yaml_path} {status} '
+              f'in {result.seconds * 1e3:.0f} ms', flush=True)
+        for message in result.warnings:
+            print(f'    WARNING: {message}', flush=True)
+        if not result.ok:
+            print(f'    ERROR: {result.error}', flush=True)
+        if profiles and result.profile is not None:
+            print(format_report(result.profile), flush=True)
+
+
+def watch(paths: Iterable[str], interval: float = 0.5, debounce: float = 0.2,
+          jobs: Optional[int] = None,
+          callback: Callable[[List[ConversionResult]], None] = print_results,
+          max_cycles: Optional[int] = None, profile_json: Optional[str] = None,
+          **options) -> None:
+    '''
+    Convert the schemas and keep regenerating those that change until interrupted.
+
+    The files are polled every `interval` seconds. Once a change is detected, the files
+    are polled every `debounce` seconds until they stop changing, so that a burst of
+    saves results in a single regeneration. Only the changed schemas, and the schemas
+    referencing sections of changed files, are regenerated and errors are reported
+    through `callback` without stopping the watch. The worker processes are started
+    once and kept warm for the whole watch.
+
+    Args:
+        paths (Iterable[str]): File paths, directories and glob patterns of the schemas.
+        interval (float, optional): The polling interval in seconds. Defaults to 0.5.
+        debounce (float, optional): The time in seconds the files need to be unchanged
+        before they are regenerated. Defaults to 0.2.
+        jobs (Optional[int], optional): The number of worker processes, see
+        `convert_many`. Defaults to None.
+        callback (Callable[[List[ConversionResult]], None], optional): Function called
+        with the results of each regeneration. Defaults to `print_results`.
+        max_cycles (Optional[int], optional): Stop after this many polls, mainly useful
+        for scripting. Defaults to None, watching until interrupted.
+        profile_json (Optional[str], optional): A JSON file to which the latest
+        profiling reports of all schemas are written after each regeneration, which
+        enables `profile`. Defaults to None.
+        **options: Keyword arguments passed on to `convert_many`, like `profile`, and
+        `yaml2py`.
+    '''
+    paths = list(paths)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    # The schemas referencing each referenced file
+    dependents: Dict[str, Set[str]] = {}
+    # The latest profiling reports keyed by the paths of the schemas
+    reports: Dict[str, dict] = {}
+    if profile_json is not None:
+        options['profile'] = True
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def poll() -> Tuple[Dict[str, Tuple[int, int]], Dict[str, Tuple[int, int]]]:
+        return snapshot(paths), snapshot(dependents)
+
+    def convert(yaml_paths: List[str]) -> None:
+        results = convert_many(yaml_paths, jobs=1, executor=executor, **options)
+        for result in results:
+            for schemas in dependents.values():
+                schemas.discard(result.yaml_path)
+            for dependency in result.dependencies:
+                dependents.setdefault(dependency, set()).add(result.yaml_path)
+            if result.profile is not None:
+                reports[result.yaml_path] = result.profile
+        if profile_json is not None:
+            with open(profile_json, 'w', encoding='utf8') as fh:
+                json.dump(reports, fh, indent=4)
+        callback(results)
+
+    try:
+        schemas = snapshot(paths)
+        convert(list(schemas))
+        previous = schemas, snapshot(dependents)
+        cycle = 0
+        while max_cycles is None or cycle < max_cycles:
+            cycle += 1
+            time.sleep(interval)
+            current = poll()
+            if current == previous:
+                continue
+            while True:
+                time.sleep(debounce)
+                latest = poll()
+                if latest == current:
+                    break
+                current = latest
+            schemas, files = current
+            changed = [
+                yaml_path for yaml_path, stat in schemas.items()
+                if previous[0].get(yaml_path) != stat
+            ]
+            for file in set(files) | set(previous[1]):
+                if files.get(file) != previous[1].get(file):
+                    changed.extend(
+                        yaml_path for yaml_path in sorted(dependents.get(file, ()))
+                        if yaml_path in schemas)
+            previous = current
+            if changed:
+                convert(list(dict.fromkeys(changed)))
+                # The references of the regenerated schemas may have changed
+                previous = schemas, snapshot(dependents)
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,78 @@
+'''
+Checks of the asyncio entry points.
+'''
+
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from metainfoyaml2py.aio import convert_async, convert_many_async, convert_text_async
+from metainfoyaml2py.batch import convert_many
+from metainfoyaml2py.metainfoyaml2py import convert_text
+
+SCHEMA = '''
+definitions:
+  sections:
+    Sample:
+      quantities:
+        name:
+          type: str
+'''
+
+
+def test_convert_text_async():
+    code = asyncio.run(convert_text_async(SCHEMA, formatter='none'))
+    assert code == convert_text(SCHEMA, formatter='none')
+
+
+def test_convert_async_captures_errors(tmp_path):
+    yaml_path = tmp_path / 'invalid.schema.archive.yaml'
+    yaml_path.write_text('sections: {}\n', encoding='utf8')
+    result = asyncio.run(convert_async(str(yaml_path), output_dir=str(tmp_path)))
+    assert not result.ok
+    assert 'No "definitions" key found' in result.error
+
+
+@pytest.mark.parametrize('executor', [None, 'threads'], ids=['processes', 'threads'])
+def test_convert_many_async_matches_convert_many(tmp_path, executor):
+    schemas = tmp_path / 'schemas'
+    (schemas / 'nested').mkdir(parents=True)
+    for path in ('b', 'a', 'nested/b', 'nested/c'):
+        (schemas / f'{path}.schema.archive.yaml').write_text(
+            SCHEMA if path != 'nested/c' else 'sections: {}\n', encoding='utf8')
+
+    async def convert(output_dir):
+        # The event loop keeps running while the schemas are converted
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        # Without an executor, a process pool is created
+        with ThreadPoolExecutor(2) if executor else contextlib.nullcontext() as pool:
+            results = await convert_many_async(
+                [str(schemas)], executor=pool, limit=2, output_dir=str(output_dir),
+                formatter='none', ir_cache=False)
+        ticker.cancel()
+        assert ticks > 0
+        return results
+
+    (tmp_path / 'async').mkdir()
+    (tmp_path / 'sync').mkdir()
+    results = asyncio.run(convert(tmp_path / 'async'))
+    expected = convert_many(
+        [str(schemas)], jobs=1, output_dir=str(tmp_path / 'sync'), formatter='none',
+        ir_cache=False)
+    assert [(result.yaml_path, result.ok, result.error) for result in results] == [
+        (result.yaml_path, result.ok, result.error) for result in expected]
+    assert [result.ok for result in results] == [True, True, False, False]
+    assert 'is already written by' in results[2].error
+    assert (tmp_path / 'async' / 'a.py').read_text(encoding='utf8') == (
+        tmp_path / 'sync' / 'a.py').read_text(encoding='utf8')
+
@@ -0,0 +1,32 @@
+'''
+Checks of the batch conversion of many schemas.
+'''
+
+from metainfoyaml2py import batch
+
+SCHEMA = '''
+definitions:
+  name: Samples
+  sections:
+    Sample:
+      quantities:
+        name:
+          type: str
+'''
+
+
+def test_plugin_collision_without_parsing(tmp_path, monkeypatch):
+    paths = []
+    for name in ('a', 'b'):
+        yaml_path = tmp_path / f'{name}.schema.archive.yaml'
+        yaml_path.write_text(SCHEMA, encoding='utf8')
+        paths.append(str(yaml_path))
+
+    def load_package(*args):
+        raise AssertionError('The sections are parsed')
+
+    monkeypatch.setattr('metainfoyaml2py.metainfoyaml2py.load_package', load_package)
+    results = batch.check_outputs(paths, {'plugin': True})
+    assert list(results) == [paths[1]]
+    assert results[paths[1]].error == (
+        f'Output plugin samples_plugin is already written by: {paths[0]}')
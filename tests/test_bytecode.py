@@ -0,0 +1,35 @@
+'''
+Checks of the byte compilation of generated modules.
+'''
+
+import os
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+# A quantity name that is not a python identifier generates invalid code
+INVALID_SCHEMA = '''
+definitions:
+  sections:
+    Sample:
+      quantities:
+        '3':
+          type: str
+'''
+
+
+@pytest.mark.parametrize('options', [
+    {}, {'formatter': 'none'}, {'split': True}, {'stream': True}],
+    ids=['autopep8', 'none', 'split', 'stream'])
+def test_invalid_code_is_not_written(tmp_path, options):
+    yaml_path = tmp_path / 'invalid.schema.archive.yaml'
+    yaml_path.write_text(INVALID_SCHEMA, encoding='utf8')
+    output_dir = tmp_path / 'output'
+    cache_dir = tmp_path / 'cache'
+    output_dir.mkdir()
+    with pytest.raises(ValueError, match='Invalid python code'):
+        yaml2py(str(yaml_path), str(output_dir), cache_dir=str(cache_dir),
+                bytecode=[0], ir_cache=False, **options)
+    assert os.listdir(output_dir) == []
+    assert not cache_dir.exists() or os.listdir(cache_dir) == []
@@ -0,0 +1,60 @@
+'''
+Checks of the incremental build cache.
+'''
+
+from metainfoyaml2py import cache
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+SCHEMA = '''
+definitions:
+  name: Samples
+  sections:
+    Sample:
+      quantities:
+        name:
+          type: str
+'''
+
+
+def test_same_content_different_modules(tmp_path):
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    for name in ('a', 'b'):
+        yaml_path = tmp_path / f'{name}.schema.archive.yaml'
+        yaml_path.write_text(SCHEMA, encoding='utf8')
+        yaml2py(str(yaml_path), str(output_dir), cache_dir=str(tmp_path / 'cache'),
+                ir_cache=False)
+    assert sorted(path.name for path in output_dir.iterdir()) == ['a.py', 'b.py']
+    assert (output_dir / 'b.py').read_text(encoding='utf8') == (
+        output_dir / 'a.py').read_text(encoding='utf8')
+
+
+def test_restore_unchanged_and_changed(tmp_path):
+    yaml_path = tmp_path / 'samples.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA, encoding='utf8')
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    cache_dir = tmp_path / 'cache'
+    yaml2py(str(yaml_path), str(output_dir), cache_dir=str(cache_dir), ir_cache=False)
+    expected = (output_dir / 'samples.py').read_text(encoding='utf8')
+    (output_dir / 'samples.py').unlink()
+    yaml2py(str(yaml_path), str(output_dir), cache_dir=str(cache_dir), ir_cache=False)
+    assert (output_dir / 'samples.py').read_text(encoding='utf8') == expected
+    assert len(list(cache_dir.iterdir())) == 1
+    # A changed schema gets a new entry
+    yaml_path.write_text(SCHEMA.replace('name:\n', 'title:\n'), encoding='utf8')
+    yaml2py(str(yaml_path), str(output_dir), cache_dir=str(cache_dir), ir_cache=False)
+    assert 'title' in (output_dir / 'samples.py').read_text(encoding='utf8')
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_changed_dependency_is_not_restored(tmp_path):
+    dependency = tmp_path / 'base.txt'
+    dependency.write_text('base', encoding='utf8')
+    output = tmp_path / 'output.py'
+    output.write_text('code', encoding='utf8')
+    cache.store(str(tmp_path / 'cache'), 'key', str(tmp_path), [str(output)],
+                dependencies=[str(dependency)])
+    assert cache.restore(str(tmp_path / 'cache'), 'key', str(tmp_path))
+    dependency.write_text('changed', encoding='utf8')
+    assert not cache.restore(str(tmp_path / 'cache'), 'key', str(tmp_path))
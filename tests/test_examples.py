@@ -0,0 +1,46 @@
+'''
+Checks that the bundled example outputs match what the converter generates.
+'''
+
+import os
+import warnings
+
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example')
+EXAMPLE_SCHEMA = os.path.join(EXAMPLE_DIR, 'example.schema.archive.yaml')
+
+
+def _read_tree(directory: str) -> dict:
+    '''
+    Help function reading all files of a folder keyed by their relative path.
+    '''
+    files = {}
+    for root, folders, file_names in os.walk(directory):
+        folders[:] = [folder for folder in folders if folder != '__pycache__']
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            with open(path, encoding='utf8') as file:
+                files[os.path.relpath(path, directory)] = file.read()
+    return files
+
+
+def _convert(output_dir: str, **options) -> None:
+    '''
+    Help function converting the example schema with empty normalizers.
+    '''
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yaml2py(EXAMPLE_SCHEMA, output_dir, normalizers=True, ir_cache=False, **options)
+
+
+def test_example_module(tmp_path):
+    _convert(str(tmp_path))
+    with open(os.path.join(EXAMPLE_DIR, 'example.py'), encoding='utf8') as file:
+        assert _read_tree(str(tmp_path)) == {'example.py': file.read()}
+
+
+def test_example_plugin(tmp_path):
+    _convert(str(tmp_path), plugin=True)
+    assert _read_tree(str(tmp_path / 'example_schema_plugin')) == _read_tree(
+        os.path.join(EXAMPLE_DIR, 'example_schema_plugin'))
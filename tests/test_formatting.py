@@ -0,0 +1,40 @@
+'''
+Checks that the generated code does not depend on the autopep8 pass.
+'''
+
+import glob
+import os
+import warnings
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import module_name, yaml2py
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example')
+EXAMPLES = sorted(glob.glob(
+    os.path.join(EXAMPLE_DIR, '**', '*.schema.archive.yaml'), recursive=True))
+
+
+def _convert(yaml_path: str, output_dir: str, **options) -> str:
+    '''
+    Help function converting a schema and returning the generated code.
+    '''
+    os.makedirs(output_dir)
+    with warnings.catch_warnings():
+        # Like the example with references to sections of other files
+        warnings.simplefilter('ignore')
+        yaml2py(yaml_path, output_dir, ir_cache=False, **options)
+    with open(os.path.join(output_dir, f'{module_name(yaml_path)}.py'),
+              encoding='utf8') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('normalizers', [False, True])
+@pytest.mark.parametrize('yaml_path', EXAMPLES, ids=os.path.basename)
+def test_formatter_none_matches_autopep8(yaml_path, normalizers, tmp_path):
+    formatted = _convert(
+        yaml_path, str(tmp_path / 'autopep8'), normalizers=normalizers,
+        formatter='autopep8')
+    unformatted = _convert(
+        yaml_path, str(tmp_path / 'none'), normalizers=normalizers, formatter='none')
+    assert unformatted == formatted
@@ -0,0 +1,67 @@
+'''
+Checks of the on-disk cache of the intermediate representation.
+'''
+
+import os
+import pickle
+
+import pytest
+
+from metainfoyaml2py import ir
+from metainfoyaml2py.metainfoyaml2py import load_package
+
+SCHEMA = '''
+definitions:
+  name: Samples
+  sections:
+    Sample:
+      quantities:
+        name:
+          type: str
+'''
+
+
+@pytest.fixture
+def yaml_path(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    path = tmp_path / 'schemas' / 'samples.schema.archive.yaml'
+    path.parent.mkdir()
+    path.write_text(SCHEMA, encoding='utf8')
+    return str(path)
+
+
+def test_cache_is_not_written_next_to_schema(yaml_path):
+    package = load_package(yaml_path)
+    assert os.listdir(os.path.dirname(yaml_path)) == ['samples.schema.archive.yaml']
+    assert os.path.dirname(ir.cache_path(yaml_path)) == ir.cache_dir()
+    assert os.stat(os.path.join(ir.cache_dir(), 'key')).st_mode & 0o777 == 0o600
+    assert ir.load_cached(yaml_path, os.stat(yaml_path), 'auto') == package
+
+
+def test_changed_schema_invalidates_cache(yaml_path):
+    load_package(yaml_path)
+    with open(yaml_path, 'a', encoding='utf8') as fh:
+        fh.write('        # changed size\n')
+    assert ir.load_cached(yaml_path, os.stat(yaml_path), 'auto') is None
+    assert ir.load_cached(yaml_path, os.stat(yaml_path), 'c') is None
+
+
+class Exploit:
+    '''
+    Object recording if it is unpickled.
+    '''
+    unpickled = False
+
+    def __reduce__(self):
+        return setattr, (Exploit, 'unpickled', True)
+
+
+def test_unsigned_cache_is_not_unpickled(yaml_path):
+    load_package(yaml_path)
+    stat = os.stat(yaml_path)
+    data = pickle.dumps((ir._stamp(yaml_path, stat, 'auto'), Exploit()))
+    for digest in (b'\0' * 32, ir._digest(os.urandom(32), data)):
+        with open(ir.cache_path(yaml_path), 'wb') as fh:
+            fh.write(digest + data)
+        assert ir.load_cached(yaml_path, stat, 'auto') is None
+    assert not Exploit.unpickled
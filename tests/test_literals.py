@@ -0,0 +1,28 @@
+'''
+Checks that values of the schema are rendered as valid Python literals.
+'''
+
+import ast
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import convert_text
+
+SCHEMA = '''
+definitions:
+  sections:
+    Sample:
+      quantities:
+        name:
+          type: str
+'''
+
+
+@pytest.mark.parametrize('package_name', ["It's tricky", 'say "hi"', 'back\\slash', 42])
+def test_package_name_literal(package_name):
+    code = convert_text(SCHEMA, package_name=package_name, formatter='none')
+    package = next(
+        node.value for node in ast.parse(code).body
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name)
+        and node.targets[0].id == 'm_package')
+    assert ast.literal_eval(package.keywords[0].value) == str(package_name)
@@ -0,0 +1,44 @@
+'''
+Checks of the conversion of deeply nested schemas.
+'''
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import load_yaml, yaml2py
+
+# Deeper than the recursion limit of the python composer of pyyaml
+DEPTH = 1000
+
+
+def nested_schema(depth: int) -> str:
+    '''
+    A schema with inline sub sections nested `depth` levels deep, in flow style to keep
+    the file small.
+    '''
+    section = '{quantities: {name: {type: str}}}'
+    for level in range(depth):
+        section = f'{{sub_sections: {{level{level}: {{section: {section}}}}}}}'
+    return f'definitions:\n  sections:\n    Root: {section}\n'
+
+
+@pytest.mark.parametrize('stream', [False, True], ids=['default', 'stream'])
+def test_python_backend(tmp_path, stream):
+    yaml_path = tmp_path / 'nested.schema.archive.yaml'
+    yaml_path.write_text(nested_schema(DEPTH), encoding='utf8')
+    yaml2py(str(yaml_path), str(tmp_path), formatter='none', yaml_backend='python',
+            ir_cache=False, stream=stream)
+    code = (tmp_path / 'nested.py').read_text(encoding='utf8')
+    assert code.count('(ArchiveSection):') == DEPTH + 1
+
+
+@pytest.mark.parametrize('text', [
+    '', 'a: 1\n', '--- [1, {b: &x 2}, *x]\n', 'a: !!str 1\nb: {<<: {c: 1}, d: 2}\n',
+], ids=['empty', 'mapping', 'alias', 'tag and merge'])
+def test_load_yaml_backends_agree(text):
+    assert load_yaml(text, 'python') == load_yaml(text, 'auto')
+
+
+def test_load_yaml_single_document():
+    import yaml  # pylint: disable=import-outside-toplevel
+    with pytest.raises(yaml.YAMLError, match='single document'):
+        load_yaml('a: 1\n---\nb: 2\n', 'python')
@@ -0,0 +1,68 @@
+'''
+Checks of rendering the sections of a schema in a pool of worker processes.
+'''
+
+import warnings
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import SymbolTable, yaml2py
+from metainfoyaml2py.parallel import MIN_CHUNK_SIZE, split_order
+
+SECTIONS = 3 * MIN_CHUNK_SIZE
+
+
+def _schema(sections: int) -> str:
+    '''
+    A schema whose sections inherit from, contain and reference sections further down.
+    '''
+    lines = ['definitions:', '  sections:']
+    for index in range(sections):
+        following = (index + 7) % sections
+        lines.extend([
+            f'    Section{index}:',
+            f'      base_sections: ["#/Section{(index + 1) % sections}"]'
+            if index % 10 == 5 else '      base_sections: []',
+            '      quantities:',
+            f'        reference: {{type: "#/Section{following}"}}',
+            '      sub_sections:',
+            f'        inline{index}: {{section: {{quantities: {{x: {{type: int}}}}}}}}',
+            f'        other: {{section: "#/Section{following}"}}',
+            # Raises a warning
+            '        unknown: {section: "some.module"}' if index == 3 else '',
+        ])
+    return '\n'.join(lines) + '\n'
+
+
+@pytest.mark.parametrize('formatter', ['autopep8', 'none'])
+def test_jobs_match_single_process(tmp_path, formatter):
+    yaml_path = tmp_path / 'large.schema.archive.yaml'
+    yaml_path.write_text(_schema(SECTIONS), encoding='utf8')
+    outputs = []
+    for jobs in (1, 4):
+        output_dir = tmp_path / f'jobs_{jobs}'
+        output_dir.mkdir()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            yaml2py(str(yaml_path), str(output_dir), formatter=formatter, ir_cache=False,
+                    jobs=jobs)
+        outputs.append((
+            (output_dir / 'large.py').read_text(encoding='utf8'),
+            [str(warning.message) for warning in caught],
+        ))
+    assert outputs[1] == outputs[0]
+    assert outputs[0][1] == ['Unable to import subsection: unknown.']
+
+
+def test_split_order():
+    symbols = SymbolTable({
+        f'Section{index}': {'sub_sections': {
+            f'inline{index}': {'section': {}}}}
+        for index in range(10)
+    })
+    chunks = split_order(symbols, 3)
+    assert [name for chunk in chunks for name in chunk] == symbols.order
+    assert len(chunks) == 3
+    # Every chunk ends with a top level section, after its inline sub sections
+    assert all(symbols.symbols[chunk[-1]].top_level for chunk in chunks)
+    assert split_order(symbols, 1) == [symbols.order]
@@ -0,0 +1,174 @@
+'''
+Checks of the updates of nested keys in YAML and TOML files.
+'''
+
+import pytest
+
+from metainfoyaml2py.patch import patch_file, patch_files, split_key
+
+YAML = '''\
+# The plugins of the deployment
+plugins:
+  # Included plugins
+  include: ['schemas/example']  # flow sequence
+  options:
+    "schemas/example":
+      python_package: example  # the package
+      flow: {a: 1, b: 2}
+    other:
+      - name: first
+normalize: true
+'''
+
+TOML = '''\
+# Project metadata
+[project]
+name = "example"  # the name
+version = "0.1.0"
+dependencies = [
+    "nomad-lab",  # the framework
+]
+
+[project.urls]
+homepage = "https://example.org"
+
+[tool.setuptools.package-data]
+example = ["*.yaml"]
+'''
+
+
+def patched(tmp_path, name, text, updates):
+    path = tmp_path / name
+    path.write_bytes(text.encode('utf8'))
+    changed = patch_file(str(path), updates)
+    return changed, path.read_bytes().decode('utf8')
+
+
+@pytest.mark.parametrize('key, parts', [
+    ('project.name', ('project', 'name')),
+    ('plugins.options."schemas/example".python_package',
+     ('plugins', 'options', 'schemas/example', 'python_package')),
+    ("a.'b.c'. d ", ('a', 'b.c', 'd')),
+    (('a', 'b.c'), ('a', 'b.c')),
+])
+def test_split_key(key, parts):
+    assert split_key(key) == parts
+
+
+@pytest.mark.parametrize('key', ['', 'a..b', '"a'])
+def test_split_invalid_key(key):
+    with pytest.raises(ValueError, match='Invalid dotted key'):
+        split_key(key)
+
+
+def test_yaml_keeps_comments_and_order(tmp_path):
+    changed, text = patched(tmp_path, 'nomad.yaml', YAML, {
+        'plugins.options."schemas/example".python_package': 'renamed',
+        'plugins.include': ['schemas/example', 'schemas/other'],
+        'plugins.options."schemas/example".flow': {'a': 3},
+        'normalize': False,
+    })
+    assert changed
+    assert text == YAML.replace(
+        'python_package: example', 'python_package: renamed').replace(
+        "['schemas/example']", '[schemas/example, schemas/other]').replace(
+        '{a: 1, b: 2}', '{a: 3}').replace('normalize: true', 'normalize: false')
+
+
+def test_yaml_block_mapping(tmp_path):
+    _, text = patched(tmp_path, 'nomad.yaml', YAML, {
+        'plugins.options.other': {'name': 'second', 'items': [1, 2]},
+    })
+    assert text.endswith(
+        '    other:\n'
+        '      name: second\n'
+        '      items:\n'
+        '      - 1\n'
+        '      - 2\n'
+        'normalize: true\n')
+    assert text.startswith(YAML[:YAML.index('    other:')])
+
+
+def test_toml_keeps_comments_and_order(tmp_path):
+    changed, text = patched(tmp_path, 'pyproject.toml', TOML, {
+        'project.name': 'renamed',
+        'project.dependencies': ['nomad-lab>=1.2'],
+        'project.urls.homepage': 'https://example.com',
+        'tool.setuptools.package-data.example': ['*.yaml', '*.json'],
+    })
+    assert changed
+    assert text == TOML.replace('"example"  #', '"renamed"  #').replace(
+        '[\n    "nomad-lab",  # the framework\n]', '[ "nomad-lab>=1.2",]').replace(
+        'example.org', 'example.com').replace('["*.yaml"]', '[ "*.yaml", "*.json",]')
+
+
+def test_unchanged_file(tmp_path):
+    changed, text = patched(
+        tmp_path, 'pyproject.toml', TOML, {'project.version': '0.1.0'})
+    assert not changed
+    assert text == TOML
+
+
+@pytest.mark.parametrize('name, text, updates, expected', [
+    # A new key
+    ('nomad.yaml', YAML, {'plugins.exclude': ['old']}, {'plugins.exclude': ['old']}),
+    # A YAML key containing another updated key, which are applied in order
+    ('nomad.yaml', YAML, {'plugins.options."schemas/example".flow': {},
+                          'plugins.options."schemas/example"': {'python_package': 'x'}},
+     {'plugins.options."schemas/example"': {'python_package': 'x'}}),
+    # A TOML table, which is not replaced in the text
+    ('pyproject.toml', TOML, {'project.urls': {'docs': 'https://docs.org'},
+                              'project.name': 'renamed'},
+     {'project.urls': {'docs': 'https://docs.org'}, 'project.name': 'renamed'}),
+], ids=['new key', 'containing key', 'table'])
+def test_fallback_dumps_whole_file(tmp_path, name, text, updates, expected):
+    import toml  # pylint: disable=import-outside-toplevel
+    import yaml  # pylint: disable=import-outside-toplevel
+    _, patched_text = patched(tmp_path, name, text, updates)
+    loads = toml.loads if name.endswith('.toml') else yaml.safe_load
+    result = loads(patched_text)
+    assert '#' not in patched_text
+    assert list(result) == list(loads(text))
+    for key, value in expected.items():
+        mapping = result
+        for part in split_key(key)[:-1]:
+            mapping = mapping[part]
+        assert mapping[split_key(key)[-1]] == value
+
+
+def test_not_a_mapping(tmp_path):
+    with pytest.raises(ValueError, match='plugins.include is not a mapping'):
+        patched(tmp_path, 'nomad.yaml', YAML, {'plugins.include.name': 'x'})
+
+
+def test_unsupported_ending(tmp_path):
+    with pytest.raises(ValueError, match='Unsupported file ending'):
+        patched(tmp_path, 'nomad.json', '{}', {'a': 1})
+
+
+@pytest.mark.parametrize('name, text, updates', [
+    ('nomad.yaml', YAML, {'plugins.options."schemas/example".python_package': 'x',
+                          'plugins.options.other': {'name': 'second'}}),
+    ('pyproject.toml', TOML, {'project.name': 'renamed'}),
+    ('nomad.yaml', YAML, {'plugins.exclude': ['old']}),
+], ids=['yaml', 'toml', 'fallback'])
+def test_crlf_line_endings_are_kept(tmp_path, name, text, updates):
+    changed, patched_text = patched(tmp_path, name, text.replace('\n', '\r\n'), updates)
+    assert changed
+    assert '\n' not in patched_text.replace('\r\n', '')
+    assert patched_text.replace('\r\n', '\n') == patched(
+        tmp_path, 'lf_' + name, text, updates)[1]
+
+
+def test_patch_files_groups_updates(tmp_path):
+    (tmp_path / 'nomad.yaml').write_text(YAML, encoding='utf8')
+    (tmp_path / 'pyproject.toml').write_text(TOML, encoding='utf8')
+    changed = patch_files([
+        (str(tmp_path / 'nomad.yaml'), 'normalize', False),
+        (str(tmp_path / 'pyproject.toml'), 'project.version', '0.1.0'),
+        (str(tmp_path / 'nomad.yaml'), ('plugins', 'include'), []),
+    ])
+    assert changed == [str(tmp_path / 'nomad.yaml')]
+    text = (tmp_path / 'nomad.yaml').read_text(encoding='utf8')
+    assert 'include: []  # flow sequence' in text
+    assert 'normalize: false' in text
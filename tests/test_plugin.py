@@ -0,0 +1,47 @@
+'''
+Checks of the creation and update of NOMAD plugins.
+'''
+
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+SCHEMA = '''
+definitions:
+  name: Samples
+  sections:
+    Sample:
+      quantities:
+        %s:
+          type: str
+'''
+
+
+def test_update_keeps_edited_templates(tmp_path):
+    yaml_path = tmp_path / 'samples.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA % 'name', encoding='utf8')
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    yaml2py(str(yaml_path), str(output_dir), plugin=True, ir_cache=False)
+    plugin = output_dir / 'samples_plugin'
+    for file_name in ('pyproject.toml', 'README.md'):
+        with open(plugin / file_name, 'a', encoding='utf8') as fh:
+            fh.write('# Edited\n')
+    (plugin / 'LICENSE').unlink()
+    yaml_path.write_text(SCHEMA % 'title', encoding='utf8')
+    yaml2py(str(yaml_path), str(output_dir), plugin=True, ir_cache=False)
+    for file_name in ('pyproject.toml', 'README.md'):
+        assert (plugin / file_name).read_text(encoding='utf8').endswith('# Edited\n')
+    assert (plugin / 'LICENSE').exists()
+    assert 'title = Quantity' in (plugin / 'src' / 'samples' / 'schema.py').read_text(
+        encoding='utf8')
+
+
+def test_switching_to_split_package(tmp_path):
+    yaml_path = tmp_path / 'samples.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA % 'name', encoding='utf8')
+    init = tmp_path / 'samples_plugin' / 'src' / 'samples' / '__init__.py'
+    yaml2py(str(yaml_path), str(tmp_path), plugin=True, split=True, ir_cache=False)
+    split_init = init.read_text(encoding='utf8')
+    yaml2py(str(yaml_path), str(tmp_path), plugin=True, ir_cache=False)
+    assert init.read_text(encoding='utf8') == 'from .schema import *'
+    yaml2py(str(yaml_path), str(tmp_path), plugin=True, split=True, ir_cache=False)
+    assert init.read_text(encoding='utf8') == split_init
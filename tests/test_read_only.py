@@ -0,0 +1,54 @@
+'''
+Checks that rendering a schema does not modify the loaded definitions.
+'''
+
+import copy
+import glob
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from metainfoyaml2py import metainfoyaml2py
+from metainfoyaml2py.metainfoyaml2py import (
+    SymbolTable, iter_module, load_package, load_standard_content, read_yaml)
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example')
+EXAMPLES = sorted(glob.glob(
+    os.path.join(EXAMPLE_DIR, '**', '*.schema.archive.yaml'), recursive=True))
+
+
+def _render(yaml_path: str, sections: dict) -> str:
+    '''
+    Help function rendering a module from sections that were loaded once.
+    '''
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        symbols = SymbolTable(sections, yaml_path, ir_cache=False)
+        return ''.join(iter_module(
+            load_standard_content(), 'example', sections, True, symbols=symbols))
+
+
+@pytest.mark.parametrize('yaml_path', EXAMPLES, ids=os.path.basename)
+def test_render_yaml_twice(yaml_path):
+    sections = read_yaml(yaml_path)['definitions']['sections']
+    loaded = copy.deepcopy(sections)
+    first = _render(yaml_path, sections)
+    assert _render(yaml_path, sections) == first
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        rendered = list(executor.map(lambda _: _render(yaml_path, sections), range(8)))
+    assert rendered == [first] * 8
+    assert sections == loaded
+
+
+@pytest.mark.parametrize('yaml_path', EXAMPLES, ids=os.path.basename)
+def test_render_package_twice(yaml_path):
+    metainfoyaml2py._schema_cache.clear()  # pylint: disable=protected-access
+    package = load_package(yaml_path, ir_cache=False)
+    first = _render(yaml_path, package.sections)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        rendered = list(executor.map(
+            lambda _: _render(yaml_path, package.sections), range(8)))
+    assert rendered == [first] * 8
+    assert _render(yaml_path, read_yaml(yaml_path)['definitions']['sections']) == first
@@ -0,0 +1,95 @@
+'''
+Checks of references to sections of other schema files.
+'''
+
+import os
+import warnings
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example')
+BASE = '''
+definitions:
+  name: Base Classes
+  sections:
+    Experiment:
+      quantities:
+        name:
+          type: str
+'''
+SCHEMA = '''
+definitions:
+  sections:
+    Growth:
+      base_sections:
+        - %s
+'''
+
+
+def _convert(yaml_path, output_dir, **options):
+    '''
+    Help function converting a schema, checking that all references are resolved, and
+    returning the dependencies.
+    '''
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        dependencies = yaml2py(str(yaml_path), str(output_dir), ir_cache=False, **options)
+    assert not [
+        warning.message for warning in caught
+        if str(warning.message).startswith('Unable')]
+    return dependencies
+
+
+def test_example_imports_referenced_section(tmp_path):
+    yaml_path = os.path.join(
+        EXAMPLE_DIR, 'mbe_sige_example', 'mbe_SiGe.schema.archive.yaml')
+    dependencies = _convert(yaml_path, tmp_path)
+    assert dependencies == [os.path.abspath(os.path.join(
+        EXAMPLE_DIR, 'mbe_sige_example', 'base_classes.schema.archive.yaml'))]
+    code = (tmp_path / 'mbe_SiGe.py').read_text(encoding='utf8')
+    assert 'from .base_classes import (\n    Experiment,\n)\n' in code
+    assert 'class GrowthLog(' in code
+
+
+@pytest.mark.parametrize('reference', [
+    'base.schema.archive.yaml#Experiment',
+    'base.schema.archive.yaml#/Experiment',
+    'base.schema.archive.yaml#/definitions/sections/Experiment',
+    '../upload/raw/base.schema.archive.yaml#Experiment',
+])
+@pytest.mark.parametrize('options, module', [
+    ({}, '.base'),
+    ({'plugin': True}, 'base_classes.schema'),
+    ({'split': True}, '..base'),
+], ids=['module', 'plugin', 'split'])
+def test_reference_forms(tmp_path, reference, options, module):
+    (tmp_path / 'base.schema.archive.yaml').write_text(BASE, encoding='utf8')
+    yaml_path = tmp_path / 'growth.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA % reference, encoding='utf8')
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    _convert(yaml_path, output_dir, **options)
+    output = {
+        'plugin': output_dir / 'growth_plugin' / 'src' / 'growth' / 'schema.py',
+        'split': output_dir / 'growth' / '_growth.py',
+    }.get(next(iter(options), None), output_dir / 'growth.py')
+    code = output.read_text(encoding='utf8')
+    assert f'from {module} import (\n    Experiment,\n)\n' in code
+    assert 'class Growth(Experiment, ArchiveSection):' in code
+
+
+@pytest.mark.parametrize('reference, message', [
+    ('base.schema.archive.yaml#Sample', 'Section Sample is not defined in'),
+    ('missing.schema.archive.yaml#Sample', 'Referenced schema not found'),
+], ids=['section', 'file'])
+def test_unresolved_reference(tmp_path, reference, message):
+    (tmp_path / 'base.schema.archive.yaml').write_text(BASE, encoding='utf8')
+    yaml_path = tmp_path / 'growth.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA % reference, encoding='utf8')
+    with pytest.warns(
+            UserWarning, match=f'Unable to resolve reference {reference}: {message}'):
+        yaml2py(str(yaml_path), str(tmp_path), ir_cache=False)
+    assert 'class Growth(ArchiveSection):' in (tmp_path / 'growth.py').read_text(
+        encoding='utf8')
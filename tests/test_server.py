@@ -0,0 +1,49 @@
+'''
+Checks of the conversion server.
+'''
+
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metainfoyaml2py.server import ConversionServer
+
+SCHEMA = '''
+definitions:
+  sections:
+    Sample:
+      base_sections:
+        - other_%d.schema.archive.yaml#Base
+'''
+
+
+def _request(address: tuple, request_id: int) -> dict:
+    '''
+    Help function sending a request over a new connection and reading the response.
+    '''
+    with socket.create_connection(address) as connection:
+        request = {'id': request_id, 'yaml': SCHEMA % request_id,
+                   'options': {'formatter': 'none'}}
+        connection.sendall((json.dumps(request) + '\n').encode('utf8'))
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile('r', encoding='utf8') as lines:
+            return json.loads(lines.readline())
+
+
+def test_concurrent_connections_keep_their_warnings():
+    with ConversionServer(('127.0.0.1', 0)) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                responses = list(executor.map(
+                    lambda request_id: _request(server.server_address, request_id),
+                    range(40)))
+        finally:
+            server.shutdown()
+    for request_id, response in enumerate(responses):
+        assert response['id'] == request_id
+        assert response['error'] is None
+        assert len(response['warnings']) == 1
+        assert f'other_{request_id}.schema' in response['warnings'][0]
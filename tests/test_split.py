@@ -0,0 +1,85 @@
+'''
+Checks of split packages importing their sections on first access.
+'''
+
+import ast
+
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+SCHEMA = '''
+definitions:
+  name: Samples
+  sections:
+    Sample:
+      base_sections:
+        - '#/Measurement'
+      sub_sections:
+        layer:
+          section:
+            quantities:
+              thickness:
+                type: float
+    Measurement:
+      sub_sections:
+        instrument:
+          section: '#/Instrument'
+    Instrument:
+      sub_sections:
+        measurement:
+          section: '#/Measurement'
+'''
+
+
+def _split(tmp_path, **options) -> dict:
+    '''
+    Help function converting the schema into a split package and reading its modules.
+    '''
+    yaml_path = tmp_path / 'samples.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA, encoding='utf8')
+    output_dir = tmp_path / str(options)
+    output_dir.mkdir()
+    yaml2py(str(yaml_path), str(output_dir), split=True, ir_cache=False, **options)
+    return {
+        path.name: path.read_text(encoding='utf8')
+        for path in sorted((output_dir / 'samples').iterdir())
+    }
+
+
+def _classes(code: str) -> list:
+    return [node.name for node in ast.parse(code).body if isinstance(node, ast.ClassDef)]
+
+
+def test_modules_and_lazy_loader(tmp_path):
+    modules = _split(tmp_path)
+    # Sections depending on each other in a cycle share a module
+    assert {name: _classes(code) for name, code in modules.items()} == {
+        '__init__.py': [],
+        '_measurement.py': ['Instrument', 'Measurement'],
+        '_sample.py': ['Layer', 'Sample'],
+    }
+    init = ast.parse(modules['__init__.py'])
+    section_modules = next(
+        node.value for node in init.body if isinstance(node, ast.Assign)
+        and node.targets[0].id == '_SECTION_MODULES')
+    assert ast.literal_eval(section_modules) == {
+        'Instrument': '._measurement', 'Measurement': '._measurement',
+        'Layer': '._sample', 'Sample': '._sample',
+    }
+    assert '__getattr__' in [
+        node.name for node in init.body if isinstance(node, ast.FunctionDef)]
+    assert 'from ._measurement import (\n    Measurement,\n)\n' in modules['_sample.py']
+    # The sections are registered in the package of their module, although the module
+    # does not initialize it
+    assert 'from . import (\n    m_package,\n)\n' in modules['_sample.py']
+
+
+def test_package_is_initialized_once(tmp_path):
+    modules = _split(tmp_path)
+    for name, code in modules.items():
+        count = code.count('m_package.__init_metainfo__()')
+        assert count == (name == '__init__.py'), name
+    assert modules['__init__.py'].endswith('\n\n\nm_package.__init_metainfo__()\n')
+
+
+def test_formatter_none_matches_autopep8(tmp_path):
+    assert _split(tmp_path, formatter='none') == _split(tmp_path)
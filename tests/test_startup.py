@@ -0,0 +1,32 @@
+'''
+Checks that the command line interface starts without importing heavy modules.
+'''
+
+import subprocess
+import sys
+
+SCRIPT = '''
+import sys
+from metainfoyaml2py.metainfoyaml2py import main
+try:
+    main()
+except SystemExit:
+    pass
+print(' '.join(sorted(sys.modules)))
+'''
+# Only imported when converting, not for the help of the command line interface
+HEAVY_MODULES = ('yaml', '_yaml', 'toml', 'autopep8', 'pkg_resources')
+CONVERSION_MODULES = (
+    'aio', 'archives', 'batch', 'bytecode', 'parallel', 'patch', 'server', 'streaming',
+    'watch')
+
+
+def test_help_imports():
+    process = subprocess.run(
+        [sys.executable, '-c', SCRIPT, '--help'], check=True, capture_output=True,
+        text=True)
+    modules = set(process.stdout.splitlines()[-1].split())
+    assert 'metainfoyaml2py.metainfoyaml2py' in modules
+    assert not {
+        module for module in modules if module.split('.')[0] in HEAVY_MODULES}
+    assert not modules & {f'metainfoyaml2py.{module}' for module in CONVERSION_MODULES}
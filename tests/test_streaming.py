@@ -0,0 +1,35 @@
+'''
+Checks of the conversion of schemas one top level section at a time.
+'''
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import yaml2py
+
+SCHEMA = '''
+definitions:
+  name: %s
+  sections:
+    Sample:
+      quantities:
+        %s:
+          type: str
+'''
+
+
+@pytest.mark.parametrize('package_name, quantity_name', [
+    ('Samples', 'name'),
+    ('"It\'s tricky"', 'name'),
+    # Generates invalid code, which is written like in the default mode
+    ('Samples', "'3'"),
+], ids=['plain', 'quoted package', 'invalid quantity'])
+def test_stream_matches_default(tmp_path, package_name, quantity_name):
+    yaml_path = tmp_path / 'samples.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA % (package_name, quantity_name), encoding='utf8')
+    outputs = []
+    for stream in (False, True):
+        output_dir = tmp_path / f'stream_{stream}'
+        output_dir.mkdir()
+        yaml2py(str(yaml_path), str(output_dir), stream=stream, ir_cache=False)
+        outputs.append((output_dir / 'samples.py').read_text(encoding='utf8'))
+    assert outputs[1] == outputs[0]
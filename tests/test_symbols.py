@@ -0,0 +1,75 @@
+'''
+Checks of the symbol table determining the names and order of the classes.
+'''
+
+import pytest
+
+from metainfoyaml2py.metainfoyaml2py import (
+    SymbolTable, iter_module, load_standard_content)
+
+
+def test_bases_and_inline_sections_are_defined_first():
+    symbols = SymbolTable({
+        'Child': {'base_sections': ['#/Parent']},
+        'Parent': {
+            'sub_sections': {'layer': {'section': {'base_sections': ['Base']}}},
+        },
+        'Base': {},
+    })
+    assert symbols.order == ['Base', 'Layer', 'Parent', 'Child']
+    assert symbols.inline_name('Parent', 'layer') == 'Layer'
+    assert symbols.path('Layer') == 'Parent.sub_sections.layer'
+    assert not any(symbols.proxies(name) for name in symbols.order)
+
+
+def test_forward_references_are_proxies():
+    sections = {
+        'Tree': {'sub_sections': {
+            'children': {'section': '#/Tree'}, 'leaf': {'section': '#/Leaf'}}},
+        'Leaf': {'sub_sections': {'tree': {'section': '#/Tree'}}},
+    }
+    symbols = SymbolTable(sections)
+    assert symbols.order == ['Leaf', 'Tree']
+    assert symbols.proxies('Leaf') == {'Tree'}
+    assert symbols.proxies('Tree') == {'Tree'}
+    code = ''.join(iter_module(
+        load_standard_content(), 'trees', sections, symbols=symbols))
+    assert code.count("section_def=SectionProxy('Tree')") == 2
+    assert 'section_def=Leaf,' in code
+
+
+def test_colliding_inline_names_are_renamed():
+    with pytest.warns(UserWarning, match=(
+            'The class name Layer of Sample.sub_sections.layer is already used, naming '
+            'it SampleLayer instead.')):
+        symbols = SymbolTable({
+            'Layer': {},
+            'Sample': {'sub_sections': {'layer': {'section': {}}}},
+        })
+    assert symbols.order == ['Layer', 'SampleLayer', 'Sample']
+    assert symbols.inline_name('Sample', 'layer') == 'SampleLayer'
+
+
+def test_memoized_class_names(monkeypatch):
+    symbols = SymbolTable({'Sample': {'sub_sections': {
+        'thin_film': {'section': {}}, 'substrate': {'section': '#/Substrate'}}}})
+    assert symbols.class_name('thin_film') == 'ThinFilm'
+    monkeypatch.setattr('metainfoyaml2py.metainfoyaml2py._to_camel_case', None)
+    assert symbols.class_name('thin_film') == 'ThinFilm'
+    # Generating the classes does not convert the names again
+    code = ''.join(iter_module(
+        load_standard_content(), 'samples', {'Sample': symbols.symbols['Sample'].section},
+        symbols=symbols))
+    assert 'section_def=ThinFilm,' in code
+
+
+@pytest.mark.parametrize('sections, cycle', [
+    ({'A': {'base_sections': ['#/B']}, 'B': {'base_sections': ['A']}}, 'A -> B -> A'),
+    ({'A': {'base_sections': ['A']}}, 'A -> A'),
+    ({'A': {'sub_sections': {'inner': {'section': {'base_sections': ['#/A']}}}},
+      'C': {'base_sections': ['B']}, 'B': {'base_sections': ['C']}}, 'C -> B -> C'),
+], ids=['two', 'self', 'three'])
+def test_cyclic_inheritance(sections, cycle):
+    with pytest.raises(
+            ValueError, match=f'Cyclic inheritance between the sections: {cycle}.'):
+        SymbolTable(sections)
@@ -0,0 +1,29 @@
+'''
+Checks of the watch mode.
+'''
+
+import json
+
+from metainfoyaml2py.watch import watch
+
+SCHEMA = '''
+definitions:
+  sections:
+    Sample:
+      quantities:
+        name:
+          type: str
+'''
+
+
+def test_profile_json(tmp_path):
+    yaml_path = tmp_path / 'samples.schema.archive.yaml'
+    yaml_path.write_text(SCHEMA, encoding='utf8')
+    profile_json = tmp_path / 'profile.json'
+    results = []
+    watch([str(yaml_path)], jobs=1, callback=results.append, max_cycles=0,
+          profile_json=str(profile_json), output_dir=str(tmp_path), ir_cache=False)
+    assert [result.ok for result in results[0]] == [True]
+    reports = json.loads(profile_json.read_text(encoding='utf8'))
+    assert list(reports) == [str(yaml_path)]
+    assert reports[str(yaml_path)] == results[0][0].profile